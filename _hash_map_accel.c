@@ -0,0 +1,553 @@
+/*
+ * Description: Optional C implementations of the hash maps' hot loops.
+ *
+ * base_structures imports this module when it has been built (see
+ * build_accel.py) and uses it in place of the pure Python versions of:
+ *
+ *   hash_function_1, hash_function_2, hash_function_fnv1a
+ *                      same results as the Python functions, bit for bit
+ *   chain_find         LinkedList.contains(): walk a chain of SLNodes
+ *   find_index         the open addressing map's linear and quadratic probe
+ *                      loop over the table's underlying list
+ *   bloom_add, bloom_might_contain
+ *                      BloomFilter.add() and might_contain() on its bytearray
+ *
+ * Nodes and entries are read straight from their __slots__, at the offsets
+ * their classes' member descriptors give, which are looked up the first
+ * time an instance of each class is seen. The Python classes in
+ * base_structures stay the only definition of the data, and objects of any
+ * other class are still read through their attributes.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <structmember.h>
+#include <stdint.h>
+
+#define FNV_64_OFFSET_BASIS 0xCBF29CE484222325ULL
+#define FNV_64_PRIME 0x100000001B3ULL
+#define GOLDEN_64 0x9E3779B97F4A7C15ULL
+
+static PyObject *str_key;
+static PyObject *str_hash;
+static PyObject *str_next;
+static PyObject *str_is_tombstone;
+
+
+/*
+ * Unsigned 128-bit sum, kept as two 64-bit halves so that the code builds
+ * with any C compiler: hash_function_1 and hash_function_2 add up more than
+ * 64 bits' worth for long keys, and MSVC has no 128-bit integer type.
+ */
+typedef struct {
+    uint64_t high;
+    uint64_t low;
+} uint128_sum;
+
+
+/* Add a 64-bit value to the sum. */
+static inline void
+sum_add(uint128_sum *sum, uint64_t value)
+{
+    sum->low += value;
+    if (sum->low < value) {
+        sum->high++;
+    }
+}
+
+
+/* Add the full 128-bit product of two 64-bit values to the sum. */
+static inline void
+sum_add_product(uint128_sum *sum, uint64_t a, uint64_t b)
+{
+#if defined(__SIZEOF_INT128__)
+    unsigned __int128 product = (unsigned __int128)a * b;
+    uint64_t high = (uint64_t)(product >> 64);
+    uint64_t low = (uint64_t)product;
+#else
+    /* Schoolbook multiplication of the 32-bit halves */
+    uint64_t low_low = (a & 0xFFFFFFFFULL) * (b & 0xFFFFFFFFULL);
+    uint64_t high_low = (a >> 32) * (b & 0xFFFFFFFFULL);
+    uint64_t low_high = (a & 0xFFFFFFFFULL) * (b >> 32);
+    uint64_t high_high = (a >> 32) * (b >> 32);
+    uint64_t middle = (low_low >> 32) + (high_low & 0xFFFFFFFFULL) + (low_high & 0xFFFFFFFFULL);
+    uint64_t low = (middle << 32) | (low_low & 0xFFFFFFFFULL);
+    uint64_t high = high_high + (high_low >> 32) + (low_high >> 32) + (middle >> 32);
+#endif
+
+    sum_add(sum, low);
+    sum->high += high;
+}
+
+
+/* Return an unsigned 128-bit sum as a Python int. */
+static PyObject *
+long_from_uint128(uint128_sum sum)
+{
+    uint64_t high = sum.high;
+    uint64_t low = sum.low;
+    PyObject *result, *shift, *shifted, *low_part;
+
+    if (high == 0) {
+        return PyLong_FromUnsignedLongLong(low);
+    }
+
+    result = PyLong_FromUnsignedLongLong(high);
+    shift = PyLong_FromLong(64);
+    if (result == NULL || shift == NULL) {
+        Py_XDECREF(result);
+        Py_XDECREF(shift);
+        return NULL;
+    }
+    shifted = PyNumber_Lshift(result, shift);
+    Py_DECREF(result);
+    Py_DECREF(shift);
+    if (shifted == NULL) {
+        return NULL;
+    }
+    low_part = PyLong_FromUnsignedLongLong(low);
+    if (low_part == NULL) {
+        Py_DECREF(shifted);
+        return NULL;
+    }
+    result = PyNumber_Or(shifted, low_part);
+    Py_DECREF(shifted);
+    Py_DECREF(low_part);
+    return result;
+}
+
+
+PyDoc_STRVAR(hash_function_1_doc,
+"hash_function_1(key)\n--\n\n"
+"Sample Hash function #1 to be used with HashMap implementation");
+
+static PyObject *
+hash_function_1(PyObject *module, PyObject *key)
+{
+    uint128_sum hash = {0, 0};
+    Py_ssize_t i, length;
+    int kind;
+    const void *data;
+
+    if (!PyUnicode_Check(key)) {
+        PyErr_Format(PyExc_TypeError, "key must be str, not %.200s", Py_TYPE(key)->tp_name);
+        return NULL;
+    }
+
+    length = PyUnicode_GET_LENGTH(key);
+    kind = PyUnicode_KIND(key);
+    data = PyUnicode_DATA(key);
+    for (i = 0; i < length; i++) {
+        sum_add(&hash, PyUnicode_READ(kind, data, i));
+    }
+    return long_from_uint128(hash);
+}
+
+
+PyDoc_STRVAR(hash_function_2_doc,
+"hash_function_2(key)\n--\n\n"
+"Sample Hash function #2 to be used with HashMap implementation");
+
+static PyObject *
+hash_function_2(PyObject *module, PyObject *key)
+{
+    uint128_sum hash = {0, 0};
+    Py_ssize_t i, length;
+    int kind;
+    const void *data;
+
+    if (!PyUnicode_Check(key)) {
+        PyErr_Format(PyExc_TypeError, "key must be str, not %.200s", Py_TYPE(key)->tp_name);
+        return NULL;
+    }
+
+    length = PyUnicode_GET_LENGTH(key);
+    kind = PyUnicode_KIND(key);
+    data = PyUnicode_DATA(key);
+    for (i = 0; i < length; i++) {
+        sum_add_product(&hash, (uint64_t)(i + 1), PyUnicode_READ(kind, data, i));
+    }
+    return long_from_uint128(hash);
+}
+
+
+PyDoc_STRVAR(hash_function_fnv1a_doc,
+"hash_function_fnv1a(key)\n--\n\n"
+"64-bit FNV-1a hash of the UTF-8 encoding of the key.");
+
+static PyObject *
+hash_function_fnv1a(PyObject *module, PyObject *key)
+{
+    uint64_t hash = FNV_64_OFFSET_BASIS;
+    Py_ssize_t i, length;
+    const unsigned char *bytes;
+
+    if (!PyUnicode_Check(key)) {
+        PyErr_Format(PyExc_TypeError, "key must be str, not %.200s", Py_TYPE(key)->tp_name);
+        return NULL;
+    }
+
+    bytes = (const unsigned char *)PyUnicode_AsUTF8AndSize(key, &length);
+    if (bytes == NULL) {
+        return NULL;
+    }
+    for (i = 0; i < length; i++) {
+        hash = (hash ^ bytes[i]) * FNV_64_PRIME;
+    }
+    return PyLong_FromUnsignedLongLong(hash);
+}
+
+
+/* Offsets of the slots of one class: key, hash and next or is_tombstone */
+typedef struct {
+    PyTypeObject *type;
+    Py_ssize_t key;
+    Py_ssize_t hash;
+    Py_ssize_t link;
+} slot_layout;
+
+static slot_layout node_layout;
+static slot_layout entry_layout;
+
+
+/* Return the offset of a T_OBJECT_EX slot of the type, or -1 if it has none. */
+static Py_ssize_t
+slot_offset(PyTypeObject *type, PyObject *name)
+{
+    PyObject *descr = PyObject_GetAttr((PyObject *)type, name);
+    Py_ssize_t offset = -1;
+
+    if (descr == NULL) {
+        PyErr_Clear();
+        return -1;
+    }
+    if (Py_IS_TYPE(descr, &PyMemberDescr_Type)
+        && ((PyMemberDescrObject *)descr)->d_member->type == T_OBJECT_EX) {
+        offset = ((PyMemberDescrObject *)descr)->d_member->offset;
+    }
+    Py_DECREF(descr);
+    return offset;
+}
+
+
+/*
+ * Return the layout to read the object with: the one already resolved if
+ * the object is of that class, one resolved now for the first class seen,
+ * or NULL to read the object through its attributes.
+ */
+static const slot_layout *
+layout_for(slot_layout *layout, PyObject *object, PyObject *link_name)
+{
+    PyTypeObject *type = Py_TYPE(object);
+
+    if (layout->type == type) {
+        return layout;
+    }
+    if (layout->type != NULL) {
+        return NULL;
+    }
+
+    layout->key = slot_offset(type, str_key);
+    layout->hash = slot_offset(type, str_hash);
+    layout->link = slot_offset(type, link_name);
+    if (layout->key < 0 || layout->hash < 0 || layout->link < 0) {
+        return NULL;
+    }
+    Py_INCREF(type);
+    layout->type = type;
+    return layout;
+}
+
+
+/* Return a new reference to a slot, or attribute without a layout. */
+static PyObject *
+read_slot(PyObject *object, const slot_layout *layout, Py_ssize_t offset, PyObject *name)
+{
+    PyObject *value;
+
+    if (layout == NULL) {
+        return PyObject_GetAttr(object, name);
+    }
+    value = *(PyObject **)((char *)object + offset);
+    if (value == NULL) {
+        PyErr_SetObject(PyExc_AttributeError, name);
+        return NULL;
+    }
+    Py_INCREF(value);
+    return value;
+}
+
+
+/*
+ * Return 1 if the object's cached hash equals hash (or hash is None) and
+ * its key equals key, 0 if not, -1 on error.
+ */
+static int
+matches(PyObject *object, const slot_layout *layout, PyObject *key, PyObject *hash)
+{
+    PyObject *value;
+    int equal;
+
+    if (hash != Py_None) {
+        value = read_slot(object, layout, layout ? layout->hash : 0, str_hash);
+        if (value == NULL) {
+            return -1;
+        }
+        equal = PyObject_RichCompareBool(value, hash, Py_EQ);
+        Py_DECREF(value);
+        if (equal != 1) {
+            return equal;
+        }
+    }
+
+    value = read_slot(object, layout, layout ? layout->key : 0, str_key);
+    if (value == NULL) {
+        return -1;
+    }
+    equal = PyObject_RichCompareBool(value, key, Py_EQ);
+    Py_DECREF(value);
+    return equal;
+}
+
+
+PyDoc_STRVAR(chain_find_doc,
+"chain_find(node, key, hash)\n--\n\n"
+"Return the first node of the chain starting at node whose key matches,\n"
+"comparing cached hashes first unless hash is None, or None if no match.");
+
+static PyObject *
+chain_find(PyObject *module, PyObject *const *args, Py_ssize_t nargs)
+{
+    PyObject *node, *key, *hash, *next;
+    const slot_layout *layout;
+    int found;
+
+    if (nargs != 3) {
+        PyErr_SetString(PyExc_TypeError, "chain_find() takes exactly 3 arguments");
+        return NULL;
+    }
+    node = args[0];
+    key = args[1];
+    hash = args[2];
+
+    Py_INCREF(node);
+    while (node != Py_None) {
+        layout = layout_for(&node_layout, node, str_next);
+        found = matches(node, layout, key, hash);
+        if (found != 0) {
+            if (found < 0) {
+                Py_DECREF(node);
+                return NULL;
+            }
+            return node;
+        }
+        next = read_slot(node, layout, layout ? layout->link : 0, str_next);
+        Py_DECREF(node);
+        if (next == NULL) {
+            return NULL;
+        }
+        node = next;
+    }
+    return node;
+}
+
+
+PyDoc_STRVAR(find_index_doc,
+"find_index(buckets, key, hash, index, capacity, step_increment)\n--\n\n"
+"Probe the list of HashEntry objects from index, stepping by 1, then\n"
+"1 + step_increment, then 1 + 2 * step_increment and so on, for at most\n"
+"capacity buckets. Return the index of the live entry holding the key,\n"
+"or None once an empty bucket is reached.");
+
+static PyObject *
+find_index(PyObject *module, PyObject *const *args, Py_ssize_t nargs)
+{
+    PyObject *buckets, *key, *hash, *entry, *tombstone;
+    const slot_layout *layout;
+    Py_ssize_t index, capacity, step_increment, step, j;
+    int found;
+
+    if (nargs != 6) {
+        PyErr_SetString(PyExc_TypeError, "find_index() takes exactly 6 arguments");
+        return NULL;
+    }
+    buckets = args[0];
+    key = args[1];
+    hash = args[2];
+    if (!PyList_Check(buckets)) {
+        PyErr_SetString(PyExc_TypeError, "buckets must be a list");
+        return NULL;
+    }
+    index = PyLong_AsSsize_t(args[3]);
+    capacity = PyLong_AsSsize_t(args[4]);
+    step_increment = PyLong_AsSsize_t(args[5]);
+    if (PyErr_Occurred()) {
+        return NULL;
+    }
+    if (capacity < 1 || capacity > PyList_GET_SIZE(buckets) || index < 0 || index >= capacity) {
+        PyErr_SetString(PyExc_IndexError, "probe outside the table");
+        return NULL;
+    }
+
+    step = 1;
+    for (j = 0; j < capacity; j++) {
+        entry = PyList_GET_ITEM(buckets, index);
+        if (entry == Py_None) {
+            Py_RETURN_NONE;
+        }
+
+        Py_INCREF(entry);
+        layout = layout_for(&entry_layout, entry, str_is_tombstone);
+        found = matches(entry, layout, key, hash);
+        if (found == 1) {
+            tombstone = read_slot(entry, layout, layout ? layout->link : 0, str_is_tombstone);
+            if (tombstone == NULL) {
+                Py_DECREF(entry);
+                return NULL;
+            }
+            found = tombstone == Py_False;
+            Py_DECREF(tombstone);
+        }
+        Py_DECREF(entry);
+
+        if (found < 0) {
+            return NULL;
+        }
+        if (found) {
+            return PyLong_FromSsize_t(index);
+        }
+
+        index = (Py_ssize_t)(((size_t)index + (size_t)step) % (size_t)capacity);
+        step += step_increment;
+    }
+    Py_RETURN_NONE;
+}
+
+
+/*
+ * Check the arguments shared by bloom_add and bloom_might_contain and set
+ * the first and second bit offsets of the hash and the filter's bit mask.
+ * Returns the number of bits per hash, or -1 on error.
+ */
+static Py_ssize_t
+bloom_arguments(PyObject *const *args, Py_ssize_t nargs, const char *name,
+                uint64_t *first, uint64_t *second, uint64_t *mask)
+{
+    Py_ssize_t size, hash_count;
+    uint64_t hash;
+
+    if (nargs != 3) {
+        PyErr_Format(PyExc_TypeError, "%s() takes exactly 3 arguments", name);
+        return -1;
+    }
+    if (!PyByteArray_Check(args[0])) {
+        PyErr_SetString(PyExc_TypeError, "bits must be a bytearray");
+        return -1;
+    }
+    size = PyByteArray_GET_SIZE(args[0]) * 8;
+    if (size == 0 || (size & (size - 1)) != 0) {
+        PyErr_SetString(PyExc_ValueError, "bits must hold a power of two number of bits");
+        return -1;
+    }
+
+    /* Any size of int, reduced mod 2**64 like the & _MASK_64 in Python */
+    hash = PyLong_AsUnsignedLongLongMask(args[1]);
+    hash_count = PyLong_AsSsize_t(args[2]);
+    if (PyErr_Occurred()) {
+        return -1;
+    }
+
+    hash *= GOLDEN_64;
+    hash ^= hash >> 32;
+    *first = hash & 0xFFFFFFFFULL;
+    *second = (hash >> 32) | 1;
+    *mask = (uint64_t)size - 1;
+    return hash_count;
+}
+
+
+PyDoc_STRVAR(bloom_add_doc,
+"bloom_add(bits, hash, hash_count)\n--\n\n"
+"Set the hash_count bits of the hash in the bytearray, as BloomFilter.add().");
+
+static PyObject *
+bloom_add(PyObject *module, PyObject *const *args, Py_ssize_t nargs)
+{
+    uint64_t first, second, mask, index;
+    Py_ssize_t i, hash_count;
+    unsigned char *bits;
+
+    hash_count = bloom_arguments(args, nargs, "bloom_add", &first, &second, &mask);
+    if (hash_count < 0) {
+        return NULL;
+    }
+
+    bits = (unsigned char *)PyByteArray_AS_STRING(args[0]);
+    for (i = 0; i < hash_count; i++) {
+        index = (first + (uint64_t)i * second) & mask;
+        bits[index >> 3] |= (unsigned char)(1 << (index & 7));
+    }
+    Py_RETURN_NONE;
+}
+
+
+PyDoc_STRVAR(bloom_might_contain_doc,
+"bloom_might_contain(bits, hash, hash_count)\n--\n\n"
+"Return False if any of the hash_count bits of the hash is clear in the\n"
+"bytearray, as BloomFilter.might_contain().");
+
+static PyObject *
+bloom_might_contain(PyObject *module, PyObject *const *args, Py_ssize_t nargs)
+{
+    uint64_t first, second, mask, index;
+    Py_ssize_t i, hash_count;
+    const unsigned char *bits;
+
+    hash_count = bloom_arguments(args, nargs, "bloom_might_contain", &first, &second, &mask);
+    if (hash_count < 0) {
+        return NULL;
+    }
+
+    bits = (const unsigned char *)PyByteArray_AS_STRING(args[0]);
+    for (i = 0; i < hash_count; i++) {
+        index = (first + (uint64_t)i * second) & mask;
+        if (!(bits[index >> 3] & (1 << (index & 7)))) {
+            Py_RETURN_FALSE;
+        }
+    }
+    Py_RETURN_TRUE;
+}
+
+
+static PyMethodDef accel_methods[] = {
+    {"hash_function_1", (PyCFunction)hash_function_1, METH_O, hash_function_1_doc},
+    {"hash_function_2", (PyCFunction)hash_function_2, METH_O, hash_function_2_doc},
+    {"hash_function_fnv1a", (PyCFunction)hash_function_fnv1a, METH_O, hash_function_fnv1a_doc},
+    {"chain_find", (PyCFunction)(void (*)(void))chain_find, METH_FASTCALL, chain_find_doc},
+    {"find_index", (PyCFunction)(void (*)(void))find_index, METH_FASTCALL, find_index_doc},
+    {"bloom_add", (PyCFunction)(void (*)(void))bloom_add, METH_FASTCALL, bloom_add_doc},
+    {"bloom_might_contain", (PyCFunction)(void (*)(void))bloom_might_contain, METH_FASTCALL,
+     bloom_might_contain_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef accel_module = {
+    PyModuleDef_HEAD_INIT,
+    "_hash_map_accel",
+    "Optional C implementations of the hash maps' hot loops.",
+    -1,
+    accel_methods
+};
+
+PyMODINIT_FUNC
+PyInit__hash_map_accel(void)
+{
+    str_key = PyUnicode_InternFromString("key");
+    str_hash = PyUnicode_InternFromString("hash");
+    str_next = PyUnicode_InternFromString("next");
+    str_is_tombstone = PyUnicode_InternFromString("is_tombstone");
+    if (str_key == NULL || str_hash == NULL || str_next == NULL || str_is_tombstone == NULL) {
+        return NULL;
+    }
+    return PyModule_Create(&accel_module);
+}
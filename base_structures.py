@@ -1,3 +1,14 @@
+import math
+import os
+
+# Optional C implementations of the hot loops, built by build_accel.py.
+# Set HASH_MAP_PURE_PYTHON=1 to run the pure Python code even when it is built.
+accelerator = None
+if os.environ.get('HASH_MAP_PURE_PYTHON', '0') in ('', '0'):
+    try:
+        import _hash_map_accel as accelerator
+    except ImportError:
+        pass
 
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
@@ -10,18 +21,18 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, pop, swap, get_at_index, set_at_index, length, get_list
     """
 
+    __slots__ = ('_data',)
+
     def __init__(self, arr=None) -> None:
         """Initialize new dynamic array using a list."""
         self._data = arr.copy() if arr else []
 
     def __iter__(self):
-        """
-        Disable iterator capability for DynamicArray class
-        """
-        return None
+        """Return an iterator over the elements, in index order."""
+        return iter(self._data)
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -63,6 +74,13 @@ class DynamicArray:
         """Return length of array."""
         return len(self._data)
 
+    def get_list(self) -> list:
+        """
+        Return the underlying list itself, not a copy, so bulk operations
+        can index it without a bounds-checked method call per element.
+        """
+        return self._data
+
 
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
@@ -82,6 +100,388 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# 64-bit constants shared by the well-mixing hash functions below
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+FNV_64_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_64_PRIME = 0x100000001B3
+
+
+def hash_function_fnv1a(key: str) -> int:
+    """
+    64-bit FNV-1a hash of the UTF-8 encoding of the key.
+    Every byte is folded in with an xor followed by a multiply, so keys that
+    only differ in character order or in one digit land far apart.
+    """
+    hash = FNV_64_OFFSET_BASIS
+    for byte in key.encode('utf-8'):
+        hash = ((hash ^ byte) * FNV_64_PRIME) & _MASK_64
+    return hash
+
+
+# The C versions give the same hashes, so tables built by either backend
+# (including ones written to disk) can be read by the other
+if accelerator != None:
+    hash_function_1 = accelerator.hash_function_1
+    hash_function_2 = accelerator.hash_function_2
+    hash_function_fnv1a = accelerator.hash_function_fnv1a
+
+
+def _rotate_left_64(value: int, bits: int) -> int:
+    """Rotate a 64-bit integer left by the given number of bits."""
+    return ((value << bits) | (value >> (64 - bits))) & _MASK_64
+
+
+class SipHash:
+    """
+    Keyed SipHash-2-4 over the UTF-8 encoding of a key.
+    Instances are callable, so they can be passed as the `function` argument
+    of either HashMap. Without the secret an attacker cannot precompute
+    colliding keys, which keeps chains and probe sequences short even on
+    adversarial input.
+    """
+
+    def __init__(self, secret: bytes) -> None:
+        """Initialize the hash with a 16 byte secret."""
+        if len(secret) != 16:
+            raise ValueError("SipHash secret must be exactly 16 bytes")
+        self._k0 = int.from_bytes(secret[:8], 'little')
+        self._k1 = int.from_bytes(secret[8:], 'little')
+
+    @property
+    def secret(self) -> bytes:
+        """The 16 byte secret the hash was initialized with."""
+        return self._k0.to_bytes(8, 'little') + self._k1.to_bytes(8, 'little')
+
+    def __call__(self, key: str) -> int:
+        """Return the 64-bit SipHash-2-4 of the given key."""
+        return self.hash_bytes(key.encode('utf-8'))
+
+    def hash_bytes(self, data: bytes) -> int:
+        """Return the 64-bit SipHash-2-4 of a byte string."""
+        v0 = self._k0 ^ 0x736F6D6570736575
+        v1 = self._k1 ^ 0x646F72616E646F6D
+        v2 = self._k0 ^ 0x6C7967656E657261
+        v3 = self._k1 ^ 0x7465646279746573
+
+        # Process full 8 byte words, then the tail padded with the length
+        length = len(data)
+        tail = length - length % 8
+        words = [int.from_bytes(data[i:i + 8], 'little') for i in range(0, tail, 8)]
+        words.append(int.from_bytes(data[tail:], 'little') | ((length & 0xFF) << 56))
+
+        for word in words:
+            v3 ^= word
+            for _ in range(2):
+                v0, v1, v2, v3 = self._round(v0, v1, v2, v3)
+            v0 ^= word
+
+        v2 ^= 0xFF
+        for _ in range(4):
+            v0, v1, v2, v3 = self._round(v0, v1, v2, v3)
+
+        return v0 ^ v1 ^ v2 ^ v3
+
+    @staticmethod
+    def _round(v0: int, v1: int, v2: int, v3: int) -> tuple:
+        """Perform a single SipRound on the four state words."""
+        v0 = (v0 + v1) & _MASK_64
+        v1 = _rotate_left_64(v1, 13) ^ v0
+        v0 = _rotate_left_64(v0, 32)
+        v2 = (v2 + v3) & _MASK_64
+        v3 = _rotate_left_64(v3, 16) ^ v2
+        v0 = (v0 + v3) & _MASK_64
+        v3 = _rotate_left_64(v3, 21) ^ v0
+        v2 = (v2 + v1) & _MASK_64
+        v1 = _rotate_left_64(v1, 17) ^ v2
+        v2 = _rotate_left_64(v2, 32)
+        return v0, v1, v2, v3
+
+
+# Ready to use SipHash instance with a fixed secret, so results are
+# reproducible between runs. Build your own SipHash for a private secret.
+hash_function_siphash = SipHash(b'4Looped-hash-map')
+
+
+def hash_function_builtin(key: str) -> int:
+    """
+    Wrap Python's built-in hash() (SipHash over the string's bytes in CPython).
+    This is by far the fastest option since it runs in C and is cached on the
+    string object, but str hashes are salted per process (see PYTHONHASHSEED),
+    so values must not be stored or shared between processes.
+    """
+    return hash(key) & _MASK_64
+
+
+# 2**64 divided by the golden ratio, the Fibonacci hashing multiplier
+_GOLDEN_64 = 0x9E3779B97F4A7C15
+
+
+def mix_hash(hash: int) -> int:
+    """
+    Finalize a hash so that every bit of it affects the low bits.
+    Tables with a power of two capacity index with the low bits alone, so
+    without this, hashes that only differ in their high bits (or that are
+    all multiples of a power of two) would pile into the same buckets.
+    """
+    hash = (hash * _GOLDEN_64) & _MASK_64
+    return hash ^ (hash >> 32)
+
+
+class MixedHash:
+    """
+    Callable wrapping a hash function with mix_hash(), used by hash maps in
+    power of two capacity mode.
+    """
+
+    __slots__ = ('function',)
+
+    def __init__(self, function: callable) -> None:
+        """Initialize with the hash function to wrap."""
+        self.function = function
+
+    def __call__(self, key: str) -> int:
+        """Return the mixed hash of the given key."""
+        # Same as mix_hash(), inlined since this runs on every operation
+        hash = (self.function(key) * _GOLDEN_64) & _MASK_64
+        return hash ^ (hash >> 32)
+
+
+class BloomFilter:
+    """
+    Bit array answering "definitely absent" or "maybe present" for hashes,
+    used by the open addressing map to skip probing for most missing keys.
+    Each hash sets hash_count bits, at first + i * second for a single mixed
+    64-bit hash split in two, so no further hash functions are called.
+    Bits are never cleared, so removed keys keep passing until the owner
+    rebuilds the filter, which is_stale() tells it to do.
+    """
+
+    __slots__ = ('_bits', '_mask', '_hash_count', '_count', '_keys')
+
+    def __init__(self, keys: int, bits_per_key: int = 10) -> None:
+        """
+        Initialize an empty filter sized for the given number of keys, with
+        the bit count rounded up to a power of two and the number of bits
+        per hash that minimizes false positives for bits_per_key.
+        """
+        if bits_per_key < 1:
+            raise ValueError("bits_per_key must be at least 1")
+
+        size = 64
+        while size < keys * bits_per_key:
+            size *= 2
+
+        self._bits = bytearray(size // 8)
+        self._mask = size - 1
+        self._hash_count = max(1, round(bits_per_key * math.log(2)))
+        self._count = 0
+        self._keys = keys
+
+    def add(self, hash: int) -> None:
+        """Record the hash as present."""
+        self._count += 1
+        if accelerator != None:
+            accelerator.bloom_add(self._bits, hash, self._hash_count)
+            return
+
+        hash = (hash * _GOLDEN_64) & _MASK_64
+        hash ^= hash >> 32
+        first, second = hash & 0xFFFFFFFF, (hash >> 32) | 1
+        bits, mask = self._bits, self._mask
+        for i in range(self._hash_count):
+            index = (first + i * second) & mask
+            bits[index >> 3] |= 1 << (index & 7)
+
+    def might_contain(self, hash: int) -> bool:
+        """Return False if the hash was never added, True if it may have been."""
+        if accelerator != None:
+            return accelerator.bloom_might_contain(self._bits, hash, self._hash_count)
+
+        hash = (hash * _GOLDEN_64) & _MASK_64
+        hash ^= hash >> 32
+        first, second = hash & 0xFFFFFFFF, (hash >> 32) | 1
+        bits, mask = self._bits, self._mask
+        for i in range(self._hash_count):
+            index = (first + i * second) & mask
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    def is_stale(self, live: int) -> bool:
+        """
+        Return True once the hashes added beyond the given number of live
+        keys, those of removed keys, reach half the keys the filter was
+        sized for, past which they noticeably raise the false positive rate.
+        Rebuilding at that point costs amortized O(1) per removal.
+        """
+        return self._count - live >= (self._keys + 1) // 2
+
+    def fill_ratio(self) -> float:
+        """Return the fraction of bits that are set."""
+        return sum(bin(byte).count('1') for byte in self._bits) / (self._mask + 1)
+
+    def false_positive_rate(self) -> float:
+        """
+        Return the estimated chance that a hash never added passes, the
+        fill ratio to the power of the number of bits per hash.
+        """
+        return self.fill_ratio() ** self._hash_count
+
+    def describe(self) -> dict:
+        """Return the filter's size and fill as a dict of plain values."""
+        return {
+            'bits': self._mask + 1,
+            'hash_count': self._hash_count,
+            'added': self._count,
+            'fill_ratio': self.fill_ratio(),
+            'estimated_false_positive_rate': self.false_positive_rate(),
+        }
+
+
+# Hash functions that give the same hash in every process, by name, so a
+# table written to disk can be reopened with the function that laid it out
+PERSISTENT_HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'hash_function_fnv1a': hash_function_fnv1a,
+}
+
+
+def describe_hash_function(function: callable) -> object:
+    """
+    Return a JSON-serializable description of a hash function, for
+    load_hash_function() to recreate it in another process.
+    Raises ValueError for functions that are not reproducible, such as
+    hash_function_builtin, whose results are salted per process.
+    """
+    if isinstance(function, MixedHash):
+        return {'mixed': describe_hash_function(function.function)}
+    if isinstance(function, SipHash):
+        return {'siphash': function.secret.hex()}
+    for name, persistent in PERSISTENT_HASH_FUNCTIONS.items():
+        if function is persistent:
+            return name
+    raise ValueError(f"{getattr(function, '__name__', function)!r} does not give "
+                     f"the same hashes in every process")
+
+
+def load_hash_function(description: object) -> callable:
+    """Return the hash function described by describe_hash_function()."""
+    if isinstance(description, dict) and 'mixed' in description:
+        return MixedHash(load_hash_function(description['mixed']))
+    if isinstance(description, dict) and 'siphash' in description:
+        return SipHash(bytes.fromhex(description['siphash']))
+    if description in PERSISTENT_HASH_FUNCTIONS:
+        return PERSISTENT_HASH_FUNCTIONS[description]
+    raise ValueError(f"unknown hash function {description!r}")
+
+
+class ResizePolicy:
+    """
+    Decides when a hash map resizes itself
+    max_load: load factor at which the map grows (None never grows)
+    min_load: load factor below which removals shrink the map (0 never shrinks)
+    growth_factor: capacity is multiplied by this to grow, divided to shrink
+    A map never shrinks below the capacity it was created with.
+    """
+
+    __slots__ = ('max_load', 'min_load', 'growth_factor')
+
+    def __init__(self,
+                 max_load: float = None,
+                 min_load: float = 0.0,
+                 growth_factor: float = 2.0) -> None:
+        """Initialize and validate the thresholds."""
+        if max_load != None and max_load <= 0:
+            raise ValueError("max_load must be positive")
+        if min_load < 0:
+            raise ValueError("min_load must not be negative")
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+
+        # A shrink must not leave the map loaded enough to grow straight back
+        if max_load != None and min_load * growth_factor >= max_load:
+            raise ValueError("min_load * growth_factor must be below max_load")
+
+        self.max_load = max_load
+        self.min_load = min_load
+        self.growth_factor = growth_factor
+
+    def __repr__(self) -> str:
+        """Override repr method to provide more readable output."""
+        return (f"ResizePolicy(max_load={self.max_load}, min_load={self.min_load}, "
+                f"growth_factor={self.growth_factor})")
+
+    def grown(self, capacity: int) -> int:
+        """Return the capacity to grow to from the given one."""
+        return max(capacity + 1, int(capacity * self.growth_factor))
+
+    def shrunk(self, capacity: int) -> int:
+        """Return the capacity to shrink to from the given one."""
+        return int(capacity / self.growth_factor)
+
+
+class HashMapView:
+    """
+    Lazy view of the contents of a HashMap, as returned by its keys(),
+    values() and items() methods. Nothing is copied: every iteration walks
+    the map's buckets in place, and the view reflects later changes.
+    """
+
+    __slots__ = ('_map',)
+
+    def __init__(self, map: object) -> None:
+        """Initialize the view of the given map."""
+        self._map = map
+
+    def __len__(self) -> int:
+        """Return the number of keys in the map."""
+        return self._map.get_size()
+
+    def __repr__(self) -> str:
+        """Override repr to list the view's contents, like a dict view does."""
+        return f"{type(self).__name__}({list(self)})"
+
+
+class KeysView(HashMapView):
+    """Lazy view of the keys of a HashMap."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        """Return an iterator over the keys."""
+        return (entry.key for entry in self._map._iter_entries())
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if the key is in the map."""
+        return self._map.contains_key(key)
+
+
+class ValuesView(HashMapView):
+    """Lazy view of the values of a HashMap."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        """Return an iterator over the values."""
+        return (entry.value for entry in self._map._iter_entries())
+
+
+class ItemsView(HashMapView):
+    """Lazy view of the (key, value) pairs of a HashMap."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        """Return an iterator over the (key, value) pairs."""
+        return ((entry.key, entry.value) for entry in self._map._iter_entries())
+
+    def __contains__(self, item: tuple) -> bool:
+        """Return True if the key is in the map with the given value."""
+        key, value = item
+        return key in self._map and self._map[key] == value
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -89,11 +489,18 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    # A map holds one node per key, so skip the per-instance __dict__
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        The full hash of the key is cached so the map never has to recompute it.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -105,6 +512,8 @@ class LinkedListIterator:
     Separate iterator class for LinkedList
     """
 
+    __slots__ = ('_node',)
+
     def __init__(self, current_node: SLNode) -> None:
         """Initialize the iterator with a node."""
         self._node = current_node
@@ -130,6 +539,8 @@ class LinkedList:
     Supported methods are: insert, remove, contains, length, iterator
     """
 
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -154,35 +565,63 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node at front of the list, caching the key's hash if given."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None, stats: object = None) -> bool:
         """
         Remove first node with matching key.
+        If the key's hash is given, nodes with a different cached hash are
+        skipped without comparing keys.
+        If stats is given, the nodes examined are added to its probed count.
         Return True if removal was successful, False otherwise.
         """
-        previous, node = None, self._head
+        previous, node, count = None, self._head, 0
         while node:
+            count += 1
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
+                if stats is not None:
+                    stats.probed += count
                 return True
 
             previous, node = node, node.next
+
+        if stats is not None:
+            stats.probed += count
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None, stats: object = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If the key's hash is given, nodes with a different cached hash are
+        skipped without comparing keys.
+        If stats is given, the nodes examined are added to its probed count,
+        walking the list in Python rather than in the accelerator.
+        """
+        if stats is not None:
+            node, count = self._head, 0
+            while node:
+                count += 1
+                if (hash is None or node.hash == hash) and node.key == key:
+                    break
+                node = node.next
+            stats.probed += count
+            return node
+
+        if accelerator != None:
+            return accelerator.chain_find(self._head, key, hash)
+
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -196,10 +635,17 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    # A map holds one entry per key, so skip the per-instance __dict__
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        The full hash of the key is cached so the map never has to recompute it.
+        """
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
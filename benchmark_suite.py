@@ -0,0 +1,299 @@
+# Description: Reproducible benchmark suite comparing the hash maps with the built-in dict.
+#
+# Every combination of map, hash function, key distribution and size runs
+# the same operations, each timed as the best of --repeat runs on a freshly
+# built map:
+#
+#   insert        put() every key into an empty map, resizing as it goes
+#   lookup_hit    get() every key, in shuffled order
+#   lookup_miss   get() as many keys that are not in the map
+#   delete_churn  remove() half the keys and put() them back
+#   resize        resize_table() to double the capacity
+#   iteration     walk every (key, value) pair through items()
+#   increment_stream
+#                 count a skewed stream of the keys with increment()
+#
+# find_mode, the modes of that stream, is timed once per key set, for
+# hash_map_sc.find_mode() on a DynamicArray (which always hashes with
+# hash_function_1) and for collections.Counter on a list.
+#
+# Results are written as JSON, together with the settings and environment
+# they were measured in, and a previous results file can be compared against
+# to flag regressions:
+#
+#   python benchmark_suite.py --sizes 10000 100000 --output results.json
+#   python benchmark_suite.py --compare results.json --threshold 0.1
+
+
+import argparse
+import collections
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import DynamicArray, ResizePolicy
+from benchmarks import (HASH_FUNCTIONS, anagram_keys, sequential_keys,
+                        url_keys, uuid_keys)
+
+
+KEY_DISTRIBUTIONS = {
+    'sequential': lambda count, seed: sequential_keys(count),
+    'anagram': lambda count, seed: anagram_keys(count),
+    'uuid': uuid_keys,
+    'url': url_keys,
+}
+
+
+class DictMap:
+    """The built-in dict behind the HashMap method names the suite calls."""
+
+    def __init__(self) -> None:
+        """Initialize an empty dict."""
+        self._dict = {}
+
+    def put(self, key: str, value: object) -> None:
+        """Updates the key/value pair."""
+        self._dict[key] = value
+
+    def get(self, key: str) -> object:
+        """Returns the value of the key, or None if it is absent."""
+        return self._dict.get(key)
+
+    def remove(self, key: str) -> None:
+        """Removes the key, ignoring keys that are absent."""
+        self._dict.pop(key, None)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """Adds delta to the count of the key, counting from 0, and returns it."""
+        count = self._dict.get(key, 0) + delta
+        self._dict[key] = count
+        return count
+
+    def get_capacity(self) -> int:
+        """Returns the number of keys, as a dict does not expose its table size."""
+        return len(self._dict)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """Rebuilds the table, ignoring the capacity."""
+        # A dict can not be sized directly; copying it rebuilds its table
+        self._dict = dict(self._dict)
+
+    def items(self):
+        """Returns a view of the (key, value) pairs."""
+        return self._dict.items()
+
+
+def counter_find_mode(elements: list) -> (list, int):
+    """Return the modes of the elements and their frequency, using Counter."""
+    counts = collections.Counter(elements)
+    highest_count = max(counts.values(), default=0)
+    return [key for key, count in counts.items() if count == highest_count], highest_count
+
+
+# (structure, hash function) -> (container the stream is passed in, find_mode)
+MODE_FINDERS = {
+    ('dict', 'builtin'): (list, counter_find_mode),
+    ('separate_chaining', 'hash_function_1'): (DynamicArray, hash_map_sc.find_mode),
+}
+
+
+def map_factories(function: callable) -> dict:
+    """Return name -> callable creating an empty map that hashes with function."""
+    return {
+        'separate_chaining': lambda: hash_map_sc.HashMap(11, function, policy=ResizePolicy(max_load=1.0)),
+        'open_addressing': lambda: hash_map_oa.HashMap(11, function),
+    }
+
+
+def best_time(setup: callable, run: callable, repeat: int) -> float:
+    """
+    Return the fastest of repeat timings of run(state), with a new
+    state = setup() made untimed before each.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(new_map: callable, keys: list, misses: list, stream: list, repeat: int) -> dict:
+    """Return operation -> (seconds, operations timed) for one map and key set."""
+    shuffled = keys[:]
+    random.Random(len(keys)).shuffle(shuffled)
+    half = keys[::2]
+
+    def built():
+        m = new_map()
+        for i, key in enumerate(keys):
+            m.put(key, i)
+        return m
+
+    def insert(m):
+        for i, key in enumerate(keys):
+            m.put(key, i)
+
+    def lookup_hit(m):
+        for key in shuffled:
+            m.get(key)
+
+    def lookup_miss(m):
+        for key in misses:
+            m.get(key)
+
+    def delete_churn(m):
+        for key in half:
+            m.remove(key)
+        for key in half:
+            m.put(key, 0)
+
+    def resize(m):
+        m.resize_table(2 * m.get_capacity())
+
+    def iteration(m):
+        for _ in m.items():
+            pass
+
+    def increment_stream(m):
+        for key in stream:
+            m.increment(key)
+
+    timings = {
+        'insert': (new_map, insert, len(keys)),
+        'lookup_hit': (built, lookup_hit, len(keys)),
+        'lookup_miss': (built, lookup_miss, len(misses)),
+        'delete_churn': (built, delete_churn, 2 * len(half)),
+        'resize': (built, resize, len(keys)),
+        'iteration': (built, iteration, len(keys)),
+        'increment_stream': (new_map, increment_stream, len(stream)),
+    }
+    return {operation: (best_time(setup, run, repeat), count)
+            for operation, (setup, run, count) in timings.items()}
+
+
+def environment() -> dict:
+    """Return what the results were measured on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': sys.version,
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'commit': commit,
+    }
+
+
+def run_suite(sizes: list, functions: list, distributions: list, repeat: int, seed: int) -> list:
+    """Run every combination and return a list of result records."""
+    results = []
+    for size in sizes:
+        for distribution in distributions:
+            keys = KEY_DISTRIBUTIONS[distribution](size, seed)
+            misses = ['missing' + key for key in keys]
+
+            # Skewed stream: eight keys in ten come from the first tenth of the keys
+            rng = random.Random(seed)
+            hot = keys[:max(1, size // 10)]
+            stream = [rng.choice(hot) if rng.random() < 0.8 else rng.choice(keys) for _ in range(size)]
+
+            structures = [('dict', 'builtin', DictMap)]
+            for function_name in functions:
+                for name, new_map in map_factories(HASH_FUNCTIONS[function_name]).items():
+                    structures.append((name, function_name, new_map))
+
+            def add(structure, function_name, operation, seconds, count):
+                results.append({
+                    'structure': structure,
+                    'hash_function': function_name,
+                    'distribution': distribution,
+                    'size': size,
+                    'operation': operation,
+                    'seconds': seconds,
+                    'ns_per_op': seconds / count * 1e9,
+                })
+                print(f"{structure:<20}{function_name:<18}{distribution:<12}{size:>9}"
+                      f"{operation:>17}{seconds / count * 1e9:>12.0f} ns/op", file=sys.stderr)
+
+            for structure, function_name, new_map in structures:
+                for operation, (seconds, count) in measure(new_map, keys, misses, stream, repeat).items():
+                    add(structure, function_name, operation, seconds, count)
+
+            for (structure, function_name), (container, find_mode) in MODE_FINDERS.items():
+                seconds = best_time(lambda: container(stream), find_mode, repeat)
+                add(structure, function_name, 'find_mode', seconds, len(stream))
+    return results
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """
+    Return the results at least threshold (a fraction) slower per operation
+    than the matching record of the baseline, with the baseline time added.
+    """
+    def identity(record):
+        return (record['structure'], record['hash_function'], record['distribution'],
+                record['size'], record['operation'])
+
+    previous = {identity(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get(identity(record))
+        if old != None and record['ns_per_op'] > old['ns_per_op'] * (1 + threshold):
+            regressions.append(dict(record, baseline_ns_per_op=old['ns_per_op']))
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """Run the suite from the command line. Returns 1 if regressions were found."""
+    parser = argparse.ArgumentParser(description="Benchmark the hash maps against dict.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** 4, 10 ** 5])
+    parser.add_argument('--functions', nargs='+', default=['fnv1a', 'builtin'], choices=HASH_FUNCTIONS)
+    parser.add_argument('--distributions', nargs='+', default=list(KEY_DISTRIBUTIONS),
+                        choices=KEY_DISTRIBUTIONS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file to write the JSON results to (default stdout)")
+    parser.add_argument('--compare', help="previous JSON results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="fraction slower than the previous results that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.functions, args.distributions, args.repeat, args.seed)
+    report = {
+        'settings': {name: getattr(args, name) for name in ('sizes', 'functions', 'distributions',
+                                                            'repeat', 'seed')},
+        'environment': environment(),
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file)['results'], args.threshold)
+        for record in regressions:
+            print(f"REGRESSION {record['structure']} {record['hash_function']} {record['distribution']} "
+                  f"{record['size']} {record['operation']}: {record['baseline_ns_per_op']:.0f} -> "
+                  f"{record['ns_per_op']:.0f} ns/op", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,979 @@
+# Description: Benchmarks for the separate chaining and open addressing hash maps.
+#
+# Run every benchmark:         python benchmarks.py
+# Run only some of them:       python benchmarks.py hash-distribution
+
+
+import asyncio
+import gc
+import json
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+import frequency_counter
+import hash_map_async
+import hash_map_concurrent
+import hash_map_mmap
+import hash_map_oa
+import hash_map_sc
+import hash_map_sc_compact
+import hash_map_sharded
+import hash_map_snapshot
+import hash_vectorized
+from base_structures import (DynamicArray, MixedHash, ResizePolicy,
+                             accelerator, hash_function_1, hash_function_2,
+                             hash_function_builtin, hash_function_fnv1a,
+                             hash_function_siphash)
+
+
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a': hash_function_fnv1a,
+    'siphash': hash_function_siphash,
+    'builtin': hash_function_builtin,
+}
+
+# Registry of benchmark name -> function, filled in by the @benchmark decorator
+BENCHMARKS = {}
+
+
+def benchmark(name: str) -> callable:
+    """Register a benchmark function under the given name."""
+    def register(function: callable) -> callable:
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def timed(function: callable, *args) -> float:
+    """Call function with the given arguments and return elapsed seconds."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+# ------------------- KEY SETS --------------------------------------------- #
+
+def sequential_keys(count: int) -> list:
+    """Return keys 'key0', 'key1', ... like most real-world id schemes."""
+    return ['key' + str(i) for i in range(count)]
+
+
+def anagram_keys(count: int) -> list:
+    """Return keys that are all permutations of a small set of letters."""
+    keys = []
+    letters = 'abcdefghij'
+    i = 0
+    while len(keys) < count:
+        # Rotate and swap letters so every key uses the same characters
+        rotated = letters[i % 10:] + letters[:i % 10]
+        swap = (i // 10) % 9
+        chars = list(rotated)
+        chars[swap], chars[swap + 1] = chars[swap + 1], chars[swap]
+        keys.append(''.join(chars) + str(i // 90))
+        i += 1
+    return keys
+
+
+def uuid_keys(count: int, seed: int = 0) -> list:
+    """Return random version 4 UUID strings, the same ones for the same seed."""
+    rng = random.Random(seed)
+    return [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count)]
+
+
+def url_keys(count: int, seed: int = 0) -> list:
+    """
+    Return long URLs that share their scheme, host and most of their path,
+    so they only differ late in the string, the same ones for the same seed.
+    """
+    rng = random.Random(seed)
+    sections = ['products', 'articles', 'users', 'search', 'static/assets']
+    return [f"https://www.example.com/{rng.choice(sections)}/{rng.getrandbits(32):08x}"
+            f"/{'detail' if i % 2 else 'overview'}?session={rng.getrandbits(64):016x}&page={i}"
+            for i in range(count)]
+
+
+# ------------------- MEASUREMENTS ----------------------------------------- #
+
+def average_chain_length(m: hash_map_sc.HashMap) -> tuple:
+    """Return (mean, max) length of the non-empty chains of a SC map."""
+    lengths = [m.get_bucket(i).length() for i in range(m.get_capacity())]
+    used = [length for length in lengths if length]
+    return sum(used) / len(used), max(used)
+
+
+def average_probe_count(m: hash_map_oa.HashMap, hash_function: callable, keys: list,
+                        probing: object = None) -> tuple:
+    """Return (mean, max) number of buckets inspected to find each key in an OA map."""
+    probing = probing if probing != None else hash_map_oa.QuadraticProbing()
+    capacity = m.get_capacity()
+    counts = []
+    for key in keys:
+        hash = hash_function(key)
+        index = hash % capacity
+        step = probing.step(key, hash, capacity)
+        j = 0
+        while m.get_bucket(index).key != key:
+            j += 1
+            index = probing.next_index(index, j, step, capacity)
+        counts.append(j + 1)
+    return sum(counts) / len(counts), max(counts)
+
+
+# ------------------- BENCHMARKS ------------------------------------------- #
+
+@benchmark('hash-distribution')
+def bench_hash_distribution(count: int = 5000) -> None:
+    """Compare chain length and probe count for every hash function."""
+    key_sets = {'sequential': sequential_keys(count), 'anagram': anagram_keys(count)}
+
+    print(f"{'keys':<12}{'function':<18}{'SC mean':>9}{'SC max':>8}"
+          f"{'OA mean':>9}{'OA max':>8}{'put s':>8}")
+    for key_name, keys in key_sets.items():
+        for function_name, function in HASH_FUNCTIONS.items():
+            sc_map = hash_map_sc.HashMap(count, function)
+            oa_map = hash_map_oa.HashMap(count * 2, function)
+
+            def fill():
+                for key in keys:
+                    sc_map.put(key, key)
+                    oa_map.put(key, key)
+
+            elapsed = timed(fill)
+            chain_mean, chain_max = average_chain_length(sc_map)
+            probe_mean, probe_max = average_probe_count(oa_map, function, keys)
+            print(f"{key_name:<12}{function_name:<18}{chain_mean:>9.2f}{chain_max:>8}"
+                  f"{probe_mean:>9.2f}{probe_max:>8}{elapsed:>8.3f}")
+
+
+@benchmark('oa-grow')
+def bench_oa_grow(count: int = 10 ** 6) -> None:
+    """Time doubling an open addressing map holding count keys."""
+    keys = sequential_keys(count)
+    m = hash_map_oa.HashMap(count * 2 + 1, hash_function_builtin)
+    for key in keys:
+        m.put(key, key)
+
+    # Remove a tenth of the keys so there are tombstones to drop
+    for key in keys[::10]:
+        m.remove(key)
+
+    def put_per_entry():
+        # What resize_table used to do: a fresh map and a put() per entry
+        new_map = hash_map_oa.HashMap(m.get_capacity() * 2, hash_function_builtin)
+        pairs = m.get_keys_and_values()
+        for i in range(pairs.length()):
+            new_map.put(*pairs[i])
+
+    print(f"keys: {m.get_size()}, tombstones: {m.get_tombstone_count()}, capacity: {m.get_capacity()}")
+    print(f"put() per entry : {timed(put_per_entry):.3f} s")
+    print(f"resize_table()  : {timed(m.resize_table, m.get_capacity() * 2):.3f} s")
+    print(f"capacity after  : {m.get_capacity()}, tombstones: {m.get_tombstone_count()}")
+
+
+def put_latencies(m: object, keys: list, max_load: float = None) -> list:
+    """
+    Put every key, returning the latency of each put in seconds.
+    With max_load set the table is resized whenever the load exceeds it,
+    for maps that do not grow on their own.
+    """
+    latencies = []
+    clock = time.perf_counter
+
+    # Full collections over millions of nodes cause spikes of their own
+    gc.disable()
+    try:
+        for key in keys:
+            start = clock()
+            m.put(key, key)
+            if max_load != None and m.table_load() > max_load:
+                m.resize_table(m.get_capacity() * 2)
+            latencies.append(clock() - start)
+    finally:
+        gc.enable()
+
+    return latencies
+
+
+def percentile(samples: list, fraction: float) -> float:
+    """Return the given percentile (0 to 1) of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@benchmark('incremental-rehash')
+def bench_incremental_rehash(count: int = 10 ** 6) -> None:
+    """Compare put latency percentiles with and without incremental rehashing."""
+    keys = sequential_keys(count)
+    print(f"{'map':<20}{'total s':>9}{'p50 us':>9}{'p99 us':>9}{'max ms':>10}")
+    for incremental in (False, True):
+        maps = {
+            'SC': (hash_map_sc.HashMap(11, hash_function_builtin, incremental), 4),
+            'OA': (hash_map_oa.HashMap(11, hash_function_builtin, incremental), None),
+        }
+        for name, (m, max_load) in maps.items():
+            latencies = put_latencies(m, keys, max_load)
+            label = name + (' incremental' if incremental else '')
+            print(f"{label:<20}{sum(latencies):>9.3f}{percentile(latencies, 0.5) * 1e6:>9.2f}"
+                  f"{percentile(latencies, 0.99) * 1e6:>9.2f}{max(latencies) * 1e3:>10.2f}")
+
+
+def traced_memory(build: callable) -> tuple:
+    """
+    Call build() and return (result, bytes allocated by it that are still alive).
+    Objects created before the call, like the keys themselves, are not counted.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+@benchmark('memory')
+def bench_memory(sizes: tuple = (10 ** 5, 10 ** 6, 10 ** 7)) -> None:
+    """Compare the memory held by each map at several sizes."""
+    print(f"{'map':<14}{'keys':>10}{'capacity':>10}{'MiB':>10}{'bytes/key':>11}{'put s':>8}")
+    for count in sizes:
+        keys = sequential_keys(count)
+        maps = (
+            ('SC', lambda: hash_map_sc.HashMap(count, hash_function_builtin)),
+            ('SC compact', lambda: hash_map_sc_compact.HashMap(count, hash_function_builtin)),
+            ('OA', lambda: hash_map_oa.HashMap(count * 2, hash_function_builtin)),
+        )
+        for name, new_map in maps:
+
+            def build():
+                m = new_map()
+                for key in keys:
+                    m.put(key, key)
+                return m
+
+            start = time.perf_counter()
+            m, allocated = traced_memory(build)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<14}{count:>10}{m.get_capacity():>10}{allocated / 2 ** 20:>10.2f}"
+                  f"{allocated / count:>11.1f}{elapsed:>8.3f}")
+            del m
+
+PROBING_STRATEGIES = {
+    'linear': hash_map_oa.LinearProbing(),
+    'quadratic': hash_map_oa.QuadraticProbing(),
+    'double': hash_map_oa.DoubleHashing(),
+    'double (fnv1a)': hash_map_oa.DoubleHashing(hash_function_fnv1a),
+    'robin hood': hash_map_oa.RobinHoodProbing(),
+}
+
+
+@benchmark('probing')
+def bench_probing(capacity: int = 100003, loads: tuple = (0.25, 0.5, 0.7, 0.9)) -> None:
+    """Compare probe lengths and throughput of each probing strategy across load factors."""
+    print(f"{'strategy':<16}{'load':>6}{'mean':>8}{'max':>6}{'put/s':>11}{'get/s':>11}{'miss/s':>11}")
+    for load in loads:
+        count = int(capacity * load)
+        keys = sequential_keys(count)
+        missing = ['missing' + key for key in keys]
+        for name, probing in PROBING_STRATEGIES.items():
+
+            # Let each strategy fill up as far as it supports without growing
+            if load > probing.load_limit:
+                continue
+            policy = ResizePolicy(max_load=probing.load_limit)
+            m = hash_map_oa.HashMap(capacity, hash_function_builtin, probing=probing, policy=policy)
+
+            def put_all():
+                for key in keys:
+                    m.put(key, key)
+
+            def get_all(keys):
+                for key in keys:
+                    m.get(key)
+
+            put_time = timed(put_all)
+            get_time = timed(get_all, keys)
+            miss_time = timed(get_all, missing)
+            mean, longest = average_probe_count(m, hash_function_builtin, keys, probing)
+            print(f"{name:<16}{load:>6.2f}{mean:>8.3f}{longest:>6}{count / put_time:>11.0f}"
+                  f"{count / get_time:>11.0f}{count / miss_time:>11.0f}")
+
+
+@benchmark('power-of-two')
+def bench_power_of_two(count: int = 200000,
+                       functions: tuple = ('fnv1a', 'siphash', 'builtin')) -> None:
+    """Compare prime modulo capacities against mixed power of two capacities."""
+    # hash_function_1 and 2 give the same hash to most sequential keys, which
+    # no mixer can separate again, so they are left out by default
+    keys = sequential_keys(count)
+    missing = ['missing' + key for key in keys]
+    print(f"{'map':<5}{'function':<18}{'mode':<14}{'capacity':>10}{'new s':>8}"
+          f"{'put/s':>11}{'get/s':>11}{'miss/s':>11}")
+    for function_name in functions:
+        function = HASH_FUNCTIONS[function_name]
+        for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+            for power_of_two in (False, True):
+                policy = ResizePolicy(max_load=1.0 if module is hash_map_sc else 0.5)
+
+                # Creating the map includes finding its prime or power of two capacity
+                start = time.perf_counter()
+                m = module.HashMap(count * 2, function, policy=policy, power_of_two=power_of_two)
+                new_time = time.perf_counter() - start
+
+                def put_all():
+                    for key in keys:
+                        m.put(key, key)
+
+                def get_all(keys):
+                    for key in keys:
+                        m.get(key)
+
+                put_time = timed(put_all)
+                get_time = timed(get_all, keys)
+                miss_time = timed(get_all, missing)
+                mode = 'power of two' if power_of_two else 'prime'
+                print(f"{name:<5}{function_name:<18}{mode:<14}{m.get_capacity():>10}{new_time:>8.4f}"
+                      f"{count / put_time:>11.0f}{count / get_time:>11.0f}{count / miss_time:>11.0f}")
+
+
+@benchmark('batch')
+def bench_batch(count: int = 10 ** 6) -> None:
+    """Compare per-key loops against the batch operations of both maps."""
+    keys = sequential_keys(count)
+    pairs = [(key, key) for key in keys]
+    missing = ['missing' + key for key in keys]
+    print(f"{'map':<5}{'operation':<16}{'loop s':>9}{'batch s':>9}{'speedup':>9}")
+    for name, module, policy in (('SC', hash_map_sc, ResizePolicy(max_load=1.0)),
+                                 ('OA', hash_map_oa, None)):
+        loop_map = module.HashMap(11, hash_function_builtin, policy=policy)
+        batch_map = module.HashMap(11, hash_function_builtin, policy=policy)
+
+        def put_loop():
+            for key, value in pairs:
+                loop_map.put(key, value)
+
+        def get_loop(keys):
+            for key in keys:
+                loop_map.get(key)
+
+        def contains_loop(keys):
+            for key in keys:
+                loop_map.contains_key(key)
+
+        def remove_loop():
+            for key in keys:
+                loop_map.remove(key)
+
+        operations = (
+            ('put', put_loop, (), batch_map.put_many, pairs),
+            ('get hit', get_loop, (keys,), batch_map.get_many, keys),
+            ('get miss', get_loop, (missing,), batch_map.get_many, missing),
+            ('contains hit', contains_loop, (keys,), batch_map.contains_many, keys),
+            ('remove', remove_loop, (), batch_map.remove_many, keys),
+        )
+        for operation, loop, loop_args, batch, batch_arg in operations:
+            loop_time = timed(loop, *loop_args)
+            batch_time = timed(batch, batch_arg)
+            print(f"{name:<5}{operation:<16}{loop_time:>9.3f}{batch_time:>9.3f}"
+                  f"{loop_time / batch_time:>8.2f}x")
+
+
+@benchmark('vectorized-hash')
+def bench_vectorized_hash(count: int = 10 ** 6) -> None:
+    """Compare scalar hashing of a key batch with hash_many(), and bulk loads using each."""
+    if hash_vectorized.is_accelerated(hash_function_1):
+        print("hash_many() calls the C accelerator's functions directly, "
+              "run with HASH_MAP_PURE_PYTHON=1 to compare NumPy")
+    elif not hash_vectorized.is_vectorized(hash_function_1):
+        print("NumPy is not installed, skipping")
+        return
+
+    keys = sequential_keys(count)
+    print(f"{'function':<22}{'scalar s':>10}{'hash_many s':>13}{'speedup':>9}")
+    for name in ('hash_function_1', 'hash_function_2', 'fnv1a'):
+        for function in (HASH_FUNCTIONS[name], MixedHash(HASH_FUNCTIONS[name])):
+            label = name + (' mixed' if isinstance(function, MixedHash) else '')
+            start = time.perf_counter()
+            scalar = list(map(function, keys))
+            scalar_time = time.perf_counter() - start
+            start = time.perf_counter()
+            vectorized = hash_vectorized.hash_many(function, keys)
+            vectorized_time = time.perf_counter() - start
+            assert scalar == vectorized
+            print(f"{label:<22}{scalar_time:>10.3f}{vectorized_time:>13.3f}"
+                  f"{scalar_time / vectorized_time:>8.2f}x")
+
+    pairs = [(key, key) for key in keys]
+    print(f"\n{'put_many (fnv1a)':<22}{'scalar s':>10}{'vectorized s':>13}{'speedup':>9}")
+    for name, module, policy in (('SC', hash_map_sc, ResizePolicy(max_load=1.0)),
+                                 ('OA', hash_map_oa, None)):
+        times = []
+        for vectorized in (False, True):
+            m = module.HashMap(count * 2, hash_function_fnv1a, policy=policy)
+            times.append(timed(m.put_many, pairs, vectorized))
+        print(f"{name:<22}{times[0]:>10.3f}{times[1]:>13.3f}{times[0] / times[1]:>8.2f}x")
+
+
+def traced_peak(scan: callable) -> int:
+    """Call scan() and return the peak bytes allocated while it ran."""
+    tracemalloc.start()
+    try:
+        scan()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@benchmark('iteration')
+def bench_iteration(count: int = 10 ** 6) -> None:
+    """Compare scanning a map through get_keys_and_values() and through items()."""
+    keys = sequential_keys(count)
+    print(f"{'map':<5}{'scan':<24}{'s':>8}{'peak MiB':>10}")
+    for name, module, policy in (('SC', hash_map_sc, ResizePolicy(max_load=1.0)),
+                                 ('OA', hash_map_oa, None)):
+        m = module.HashMap(11, hash_function_builtin, policy=policy)
+        m.put_many((key, key) for key in keys)
+
+        def copy_scan():
+            pairs = m.get_keys_and_values()
+            for i in range(pairs.length()):
+                key, value = pairs[i]
+
+        def view_scan():
+            for key, value in m.items():
+                pass
+
+        for label, scan in (('get_keys_and_values()', copy_scan), ('items()', view_scan)):
+            # Tracing slows allocations down, so time a separate run
+            elapsed = timed(scan)
+            peak = traced_peak(scan)
+            print(f"{name:<5}{label:<24}{elapsed:>8.3f}{peak / 2 ** 20:>10.2f}")
+
+
+def find_mode_get_put(da: DynamicArray) -> tuple:
+    """find_mode() as it used to count: a get() and then a put() per element."""
+    map = hash_map_sc.HashMap(policy=ResizePolicy(max_load=8))
+    highest_count = 0
+    for element in range(da.length()):
+        count = map.get(da[element])
+        count = 1 if count == None else count + 1
+        map.put(da[element], count)
+        highest_count = max(highest_count, count)
+    return [key for key, count in map.items() if count == highest_count], highest_count
+
+
+@benchmark('frequency-count')
+def bench_frequency_count(count: int = 10 ** 6, distinct: tuple = (100, 10 ** 4, 10 ** 5)) -> None:
+    """Compare counting with get() + put() against a single increment() per key."""
+    print(f"{'counter':<22}{'distinct':>10}{'s':>8}{'keys/s':>11}")
+    for distinct_count in distinct:
+        keys = sequential_keys(distinct_count)
+        stream = [keys[(i * 7919) % distinct_count] for i in range(count)]
+
+        def count_with(new_map, increment):
+            def run():
+                m = new_map()
+                for key in stream:
+                    increment(m, key)
+            return run
+
+        def get_put(m, key):
+            value = m.get(key)
+            m.put(key, 1 if value == None else value + 1)
+
+        def dict_count(m, key):
+            m[key] = m.get(key, 0) + 1
+
+        counters = (
+            ('SC get + put', lambda: hash_map_sc.HashMap(11, hash_function_builtin, policy=ResizePolicy(max_load=1.0)), get_put),
+            ('SC increment', lambda: hash_map_sc.HashMap(11, hash_function_builtin, policy=ResizePolicy(max_load=1.0)), hash_map_sc.HashMap.increment),
+            ('OA get + put', lambda: hash_map_oa.HashMap(11, hash_function_builtin), get_put),
+            ('OA increment', lambda: hash_map_oa.HashMap(11, hash_function_builtin), hash_map_oa.HashMap.increment),
+            ('dict', dict, dict_count),
+        )
+        for name, new_map, increment in counters:
+            elapsed = timed(count_with(new_map, increment))
+            print(f"{name:<22}{distinct_count:>10}{elapsed:>8.3f}{count / elapsed:>11.0f}")
+
+        # find_mode() itself, whose default hash_function_1 gives most
+        # sequential keys the same few hashes, so only for small key sets
+        if distinct_count > 10 ** 4:
+            continue
+        da = DynamicArray(stream)
+        old_time = timed(find_mode_get_put, da)
+        new_time = timed(hash_map_sc.find_mode, da)
+        print(f"{'find_mode get + put':<22}{distinct_count:>10}{old_time:>8.3f}{count / old_time:>11.0f}")
+        print(f"{'find_mode increment':<22}{distinct_count:>10}{new_time:>8.3f}{count / new_time:>11.0f}")
+
+
+def skewed_keys(count: int, distinct: int) -> list:
+    """Return count keys drawn from distinct ones with a Zipf-like skew."""
+    keys = sequential_keys(distinct)
+    return [keys[int(distinct ** ((i * 0.6180339887) % 1)) - 1] for i in range(count)]
+
+
+@benchmark('streaming')
+def bench_streaming(count: int = 10 ** 6, distinct: int = 10 ** 4, k: int = 10) -> None:
+    """Compare find_mode() with the streaming exact and approximate counters."""
+    stream = skewed_keys(count, distinct)
+
+    def find_mode_run():
+        return hash_map_sc.find_mode(DynamicArray(stream))
+
+    def streaming_run(new_counter):
+        def run():
+            # Read the running answers after every chunk, as a live consumer would
+            counter = new_counter()
+            for total in counter.consume(iter(stream)):
+                counter.mode()
+                counter.top()
+            return counter
+        return run
+
+    runs = (
+        ('find_mode', find_mode_run),
+        ('exact', streaming_run(lambda: frequency_counter.FrequencyCounter(k))),
+        ('approximate', streaming_run(lambda: frequency_counter.ApproximateFrequencyCounter(k))),
+    )
+
+    print(f"{'counter':<14}{'s':>8}{'peak MiB':>10}{'mode freq':>11}{'top-k hits':>12}")
+    true_top = None
+    for name, run in runs:
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        peak = traced_peak(run)
+
+        if name == 'find_mode':
+            frequency, hits = result[1], '-'
+        else:
+            frequency = result.mode()[1]
+            top = {key for key, top_count in result.top()}
+            true_top = top if true_top == None else true_top
+            hits = len(top & true_top)
+        print(f"{name:<14}{elapsed:>8.3f}{peak / 2 ** 20:>10.2f}{frequency:>11}{hits:>12}")
+
+
+@benchmark('mmap')
+def bench_mmap(count: int = 10 ** 6, lookups: int = 10 ** 5) -> None:
+    """
+    Compare rebuilding an open addressing table from scratch with reopening
+    a memory-mapped copy of it, and lookups in memory and through the map.
+    """
+    keys = sequential_keys(count)
+    path = os.path.join(tempfile.mkdtemp(), 'table.hmap')
+
+    def rebuild():
+        m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+        for i, key in enumerate(keys):
+            m.put(key, i)
+        return m
+
+    start = time.perf_counter()
+    m = rebuild()
+    rebuild_time = time.perf_counter() - start
+    build_time = timed(hash_map_mmap.build_mapped, m, path)
+
+    start = time.perf_counter()
+    mapped = hash_map_mmap.MappedHashMap(path)
+    mapped.get(keys[0])
+    open_time = time.perf_counter() - start
+
+    print(f"{'rebuild with put()':<28}{rebuild_time:>10.4f} s")
+    print(f"{'build_mapped()':<28}{build_time:>10.4f} s{os.path.getsize(path) / 2 ** 20:>10.1f} MiB")
+    print(f"{'open + first lookup':<28}{open_time:>10.4f} s")
+
+    sample = keys[::max(1, count // lookups)]
+    misses = ['missing' + str(i) for i in range(len(sample))]
+    print(f"\n{'lookups/s':<16}{'in memory':>14}{'mapped':>14}")
+    for name, probe in (('hit', sample), ('miss', misses)):
+        memory_time = timed(lambda: [m.get(key) for key in probe])
+        mapped_time = timed(lambda: [mapped.get(key) for key in probe])
+        print(f"{name:<16}{len(probe) / memory_time:>14.0f}{len(probe) / mapped_time:>14.0f}")
+
+    mapped.close()
+    os.remove(path)
+
+
+@benchmark('snapshot')
+def bench_snapshot(sizes: tuple = (10 ** 6, 10 ** 7)) -> None:
+    """
+    Compare binary snapshots with pickling the key/value pairs and putting
+    them back, and with pickling the whole map object.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'map.bin')
+
+    def pickle_pairs(m):
+        with open(path, 'wb') as file:
+            pickle.dump(m.get_keys_and_values().get_list(), file, pickle.HIGHEST_PROTOCOL)
+
+    def unpickle_pairs(new_map):
+        with open(path, 'rb') as file:
+            pairs = pickle.load(file)
+        m = new_map()
+        for key, value in pairs:
+            m.put(key, value)
+
+    def pickle_map(m):
+        with open(path, 'wb') as file:
+            pickle.dump(m, file, pickle.HIGHEST_PROTOCOL)
+
+    def unpickle_map(new_map):
+        with open(path, 'rb') as file:
+            pickle.load(file)
+
+    formats = (
+        ('pickle pairs + put', pickle_pairs, unpickle_pairs),
+        ('pickle map', pickle_map, unpickle_map),
+        ('snapshot', lambda m: hash_map_snapshot.save_snapshot(m, path),
+         lambda new_map: hash_map_snapshot.load_snapshot(path)),
+    )
+    maps = (
+        ('SC', lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0))),
+        ('OA', lambda: hash_map_oa.HashMap(11, hash_function_fnv1a)),
+    )
+
+    print(f"{'map':<4}{'format':<20}{'entries':>10}{'save s':>9}{'load s':>9}{'MiB':>9}")
+    for count in sizes:
+        for map_name, new_map in maps:
+            m = new_map()
+            m.put_many((key, i) for i, key in enumerate(sequential_keys(count)))
+            gc.collect()
+            for format_name, save, load in formats:
+                # Pickling holds a memo of every object it has seen, which
+                # does not fit in memory next to 10^7 entries
+                if format_name != 'snapshot' and count > 10 ** 6:
+                    continue
+                save_time = timed(save, m)
+                size = os.path.getsize(path)
+                load_time = timed(load, new_map)
+                print(f"{map_name:<4}{format_name:<20}{count:>10}{save_time:>9.2f}{load_time:>9.2f}"
+                      f"{size / 2 ** 20:>9.1f}")
+            del m
+            gc.collect()
+
+    os.remove(path)
+
+@benchmark('sharded')
+def bench_sharded(count: int = 10 ** 6, shard_count: int = 8) -> None:
+    """
+    Time bulk builds and find_mode on a sharded map as the number of worker
+    processes grows, up to one per core, against a single HashMap. The
+    parent's own CPU time is work no worker can take over (partitioning,
+    pickling, loading the built shards, merging counts), so the unsharded
+    time divided by it is the most any number of cores could speed the
+    operation up.
+    """
+    pairs = [(key, i) for i, key in enumerate(sequential_keys(count))]
+    words = DynamicArray(skewed_keys(count, 10 ** 4))
+
+    policy = ResizePolicy(max_load=1.0)
+
+    def build(workers):
+        m = hash_map_sharded.ShardedHashMap(shard_count, hash_map_sc.HashMap, 11, hash_function_fnv1a,
+                                            policy=policy)
+        m.put_many(pairs, workers)
+
+    def timed_in_parent(function, *args):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        function(*args)
+        return time.perf_counter() - start, time.process_time() - start_cpu
+
+    single_build = timed(lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, policy=policy).put_many(pairs))
+    single_mode = timed(hash_map_sc.find_mode, words)
+    print(f"{os.cpu_count()} cores, {shard_count} shards\n")
+    print(f"{'workers':<10}{'put_many s':>12}{'parent cpu s':>14}{'bound':>7}"
+          f"{'find_mode s':>13}{'parent cpu s':>14}{'bound':>7}")
+    print(f"{'unsharded':<10}{single_build:>12.2f}{'':>21}{single_mode:>13.2f}")
+
+    workers = 1
+    while workers <= max(2, os.cpu_count() or 1):
+        build_time, build_cpu = timed_in_parent(build, workers)
+        mode_time, mode_cpu = timed_in_parent(hash_map_sharded.find_mode, words, workers)
+        print(f"{workers:<10}{build_time:>12.2f}{build_cpu:>14.2f}{single_build / build_cpu:>6.1f}x"
+              f"{mode_time:>13.2f}{mode_cpu:>14.2f}{single_mode / mode_cpu:>6.1f}x")
+        workers *= 2
+
+    print("\nbound: unsharded time / parent cpu, the speedup limit set by the parent's serial share."
+          "\nOne worker runs everything in the parent, and with fewer cores than workers the"
+          "\nworkers share them, so neither shows scaling.")
+
+
+class LockedHashMap:
+    """Separate chaining HashMap behind one lock, the simplest thread-safe baseline."""
+
+    def __init__(self) -> None:
+        """Initialize an empty map and its lock."""
+        self._map = hash_map_sc.HashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0))
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        """Updates the key/value pair, holding the lock."""
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """Returns the value of the key, holding the lock."""
+        with self._lock:
+            return self._map.get(key)
+
+
+@benchmark('concurrent')
+def bench_concurrent(count: int = 4 * 10 ** 5, thread_counts: tuple = (1, 2, 4, 8),
+                     read_fraction: float = 0.8) -> None:
+    """
+    Compare the striped-lock ConcurrentHashMap with a HashMap behind a single
+    lock as threads split a mixed put/get workload between them. Threads
+    only run in parallel on a free-threaded CPython build; with the GIL the
+    numbers show the cost of the locking instead.
+    """
+    keys = sequential_keys(count)
+    reads = int(read_fraction * 10)
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"GIL {'enabled' if gil else 'disabled'}, {reads * 10}% gets\n")
+
+    def work(m, part):
+        # Every key is put once, then read back reads times
+        for key in part:
+            m.put(key, 1)
+            for _ in range(reads):
+                m.get(key)
+
+    maps = (
+        ('single lock', LockedHashMap),
+        ('striped', lambda: hash_map_concurrent.ConcurrentHashMap(11, hash_function_fnv1a)),
+    )
+
+    print(f"{'threads':<10}" + ''.join(f"{name + ' ops/s':>22}" for name, _ in maps))
+    for thread_count in thread_counts:
+        row = f"{thread_count:<10}"
+        for _, new_map in maps:
+            m = new_map()
+            threads = [threading.Thread(target=work, args=(m, keys[i::thread_count]))
+                       for i in range(thread_count)]
+
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            row += f"{count * (1 + reads) / elapsed:>22.0f}"
+        print(row)
+
+async def loop_lag(work: callable, interval: float = 0.001) -> tuple:
+    """
+    Run the coroutine function work next to a task that wakes every interval
+    seconds, and return (seconds work took, worst wake-up delay in seconds).
+    """
+    lags = []
+    done = False
+
+    async def ticker():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - start - interval)
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, max(lags, default=elapsed)
+
+
+@benchmark('async')
+def bench_async(count: int = 10 ** 6, step: int = 1024) -> None:
+    """
+    Compare the event-loop stall of growing, resizing and scanning a map
+    with blocking HashMap calls against the cooperative AsyncHashMap ones.
+    What stall remains on the async side comes from full passes of the
+    cyclic garbage collector over the millions of nodes, which no amount of
+    yielding can split up.
+    """
+    pairs = [(key, i) for i, key in enumerate(sequential_keys(count))]
+    policy = ResizePolicy(max_load=1.0)
+
+    async def run():
+        print(f"{'operation':<28}{'blocking s':>12}{'max lag ms':>12}{'async s':>10}{'max lag ms':>12}")
+        blocking = hash_map_sc.HashMap(11, hash_function_fnv1a, policy=policy)
+        cooperative = hash_map_async.AsyncHashMap(hash_map_sc.HashMap, 11, hash_function_fnv1a,
+                                                  step=step, policy=policy)
+
+        async def blocking_put_many():
+            blocking.put_many(pairs)
+
+        async def blocking_resize():
+            blocking.resize_table(4 * count)
+
+        async def blocking_scan():
+            blocking.get_keys_and_values()
+
+        operations = (
+            ('put_many', blocking_put_many, lambda: cooperative.put_many(pairs)),
+            ('resize_table', blocking_resize, lambda: cooperative.resize_table(4 * count)),
+            ('get_keys_and_values', blocking_scan, cooperative.get_keys_and_values),
+        )
+        for name, blocking_work, cooperative_work in operations:
+            blocking_time, blocking_lag = await loop_lag(blocking_work)
+            async_time, async_lag = await loop_lag(cooperative_work)
+            print(f"{name:<28}{blocking_time:>12.2f}{blocking_lag * 1000:>12.1f}"
+                  f"{async_time:>10.2f}{async_lag * 1000:>12.1f}")
+
+    asyncio.run(run())
+
+def generic_get_sc(m: hash_map_sc.HashMap, key: str) -> object:
+    """get() on a SC map through its bucket lookup and chain iterator, the path before the fast path."""
+    hash = m._hash_function(key)
+    for node in m._bucket_for(hash):
+        if node.hash == hash and node.key == key:
+            return node.value
+    return None
+
+
+def generic_get_oa(m: hash_map_oa.HashMap, key: str) -> object:
+    """get() on an OA map through bounds-checked indexing and next_index(), the path before the fast path."""
+    hash = m._hash_function(key)
+    buckets = m._buckets
+    capacity = m.get_capacity()
+    index = hash % capacity
+    step = m._probing.step(key, hash, capacity)
+    j = 0
+    while j < capacity:
+        if buckets[index] == None:
+            return None
+        elif buckets[index].hash == hash and buckets[index].key == key and buckets[index].is_tombstone == False:
+            return buckets[index].value
+        j += 1
+        index = m._probing.next_index(index, j, step, capacity)
+    return None
+
+
+@benchmark('lookup')
+def bench_lookup(count: int = 10 ** 5, repeat: int = 5) -> None:
+    """
+    Compare get() with the generic lookup path it replaced, for hits and
+    misses in both maps, as the best of repeat passes. Keys are hashed with
+    the built-in hash so the hash function does not hide the difference.
+    """
+    keys = sequential_keys(count)
+    misses = ['missing' + key for key in keys]
+    maps = (
+        ('SC', hash_map_sc.HashMap(11, hash_function_builtin, policy=ResizePolicy(max_load=1.0)), generic_get_sc),
+        ('OA quadratic', hash_map_oa.HashMap(11, hash_function_builtin), generic_get_oa),
+        ('OA linear', hash_map_oa.HashMap(11, hash_function_builtin, probing=hash_map_oa.LinearProbing(),
+                                          policy=ResizePolicy(max_load=0.75)), generic_get_oa),
+    )
+
+    print(f"{'map':<16}{'lookups':<10}{'generic ns':>12}{'get() ns':>12}{'speedup':>10}")
+    for name, m, generic_get in maps:
+        m.put_many((key, i) for i, key in enumerate(keys))
+        for kind, probe in (('hit', keys), ('miss', misses)):
+            generic_time = min(timed(lambda: [generic_get(m, key) for key in probe]) for _ in range(repeat))
+            fast_time = min(timed(lambda: [m.get(key) for key in probe]) for _ in range(repeat))
+            print(f"{name:<16}{kind:<10}{generic_time / count * 1e9:>12.0f}{fast_time / count * 1e9:>12.0f}"
+                  f"{generic_time / fast_time:>9.2f}x")
+
+def backend_timings(count: int) -> dict:
+    """
+    Return seconds per operation for hashing, building and looking up count
+    keys with the backend this process imported.
+    """
+    keys = sequential_keys(count)
+    timings = {}
+    for name, function in (('hash_function_1', hash_function_1), ('fnv1a', hash_function_fnv1a)):
+        timings[f"hash {name}"] = timed(lambda: [function(key) for key in keys]) / count
+
+    maps = (
+        ('SC', lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0))),
+        ('OA', lambda: hash_map_oa.HashMap(11, hash_function_fnv1a)),
+    )
+    for name, new_map in maps:
+        m = new_map()
+        timings[f"{name} put"] = timed(lambda: [m.put(key, key) for key in keys]) / count
+        timings[f"{name} get"] = timed(lambda: [m.get(key) for key in keys]) / count
+    return timings
+
+
+@benchmark('accelerator')
+def bench_accelerator(count: int = 10 ** 5) -> None:
+    """
+    Compare the pure Python code with the C accelerator, each run in its
+    own process since the backend is picked at import.
+    """
+    if accelerator == None and os.environ.get('HASH_MAP_PURE_PYTHON', '0') in ('', '0'):
+        print("C accelerator not built, run python build_accel.py first")
+        return
+
+    results = {}
+    for backend in ('pure Python', 'C'):
+        env = dict(os.environ)
+        env.pop('HASH_MAP_PURE_PYTHON', None)
+        if backend == 'pure Python':
+            env['HASH_MAP_PURE_PYTHON'] = '1'
+        output = subprocess.run(
+            [sys.executable, '-c', f"import benchmarks, json; print(json.dumps(benchmarks.backend_timings({count})))"],
+            env=env, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+        results[backend] = json.loads(output.stdout.splitlines()[-1])
+
+    print(f"{'operation':<24}{'Python ns':>12}{'C ns':>10}{'speedup':>10}")
+    for operation, python_time in results['pure Python'].items():
+        c_time = results['C'][operation]
+        print(f"{operation:<24}{python_time * 1e9:>12.0f}{c_time * 1e9:>10.0f}{python_time / c_time:>9.2f}x")
+
+
+@benchmark('bloom')
+def bench_bloom(count: int = 10 ** 5, repeat: int = 5) -> None:
+    """
+    Compare lookups with and without the Bloom filter in open addressing
+    tables left full of tombstones by removing half their keys, for keys
+    never added, the removed keys (whose bits stay set until the table is
+    rebuilt) and hits, as the best of repeat passes.
+    """
+    keys = sequential_keys(count)
+    removed = keys[::2]
+    lookups = (('miss', ['missing' + key for key in keys[1::2]]), ('removed', removed), ('hit', keys[1::2]))
+
+    print(f"{'probing':<12}{'lookups':<10}{'plain ns':>10}{'bloom ns':>10}{'speedup':>10}{'FP rate':>10}")
+    for name, probing, max_load in (('quadratic', hash_map_oa.QuadraticProbing(), 0.5),
+                                    ('linear', hash_map_oa.LinearProbing(), 0.75)):
+        maps = []
+        for bits_per_key in (None, 10):
+            m = hash_map_oa.HashMap(11, hash_function_fnv1a, probing=probing,
+                                    policy=ResizePolicy(max_load=max_load), bloom_bits_per_key=bits_per_key)
+            m.put_many((key, i) for i, key in enumerate(keys))
+            m.remove_many(removed)
+            maps.append(m)
+
+        plain, guarded = maps
+        bloom = guarded.get_bloom_filter()
+        for kind, probe in lookups:
+            plain_time = min(timed(lambda: [plain.get(key) for key in probe]) for _ in range(repeat))
+            bloom_time = min(timed(lambda: [guarded.get(key) for key in probe]) for _ in range(repeat))
+            print(f"{name:<12}{kind:<10}{plain_time / len(probe) * 1e9:>10.0f}"
+                  f"{bloom_time / len(probe) * 1e9:>10.0f}{plain_time / bloom_time:>9.2f}x"
+                  f"{bloom.false_positive_rate():>10.4f}")
+
+
+if __name__ == "__main__":
+
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        print(f"\n{name}")
+        print('-' * len(name))
+        BENCHMARKS[name]()
@@ -0,0 +1,24 @@
+# Description: Builds the optional C accelerator next to the Python modules.
+#
+#   python build_accel.py
+#
+# This compiles _hash_map_accel.c in place with the setuptools and C compiler
+# of the running interpreter. base_structures picks the module up on its next
+# import; delete the compiled file (or set HASH_MAP_PURE_PYTHON=1) to go back
+# to the pure Python code.
+
+
+import os
+import sys
+
+from setuptools import Extension, setup
+
+
+if __name__ == "__main__":
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    setup(
+        name='hash_map_accel',
+        ext_modules=[Extension('_hash_map_accel', ['_hash_map_accel.c'], extra_compile_args=['-O2'])],
+        script_args=['build_ext', '--inplace'] + sys.argv[1:],
+    )
@@ -0,0 +1,363 @@
+# Description: Streaming frequency counting built on the separate chaining HashMap.
+#
+# find_mode() needs its whole input in a DynamicArray and scans every bucket
+# at the end to collect the modes. The counters below consume any iterable
+# of keys instead, one chunk at a time if wanted, and keep their answers up
+# to date as each key arrives, so mode() and top() are available at any
+# point without a scan:
+#
+#   FrequencyCounter               exact counts in a HashMap, plus the current
+#                                  mode(s) and a heap of the k most frequent keys
+#   ApproximateFrequencyCounter    bounded memory for unbounded streams: a
+#                                  Count-Min Sketch estimates the count of any
+#                                  key and Space-Saving tracks the heavy hitters
+
+
+import math
+from abc import ABC, abstractmethod
+from array import array
+from itertools import islice
+
+import hash_map_sc
+from base_structures import DynamicArray, ResizePolicy, hash_function_builtin, mix_hash
+
+
+class TopK:
+    """
+    Indexed min-heap of the k (key, count) pairs with the highest counts.
+    The smallest count sits at the root, so deciding whether a key makes
+    the top k takes O(1), and the position of every key is tracked so a
+    count already in the heap can be raised in O(log k).
+    """
+
+    __slots__ = ('_k', '_keys', '_counts', '_positions')
+
+    def __init__(self, k: int) -> None:
+        """Initialize an empty heap holding at most k keys."""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self._k = k
+        self._keys = []
+        self._counts = []
+        self._positions = {}
+
+    def __len__(self) -> int:
+        """Return the number of keys in the heap."""
+        return len(self._keys)
+
+    def is_full(self) -> bool:
+        """Return True once the heap holds k keys."""
+        return len(self._keys) == self._k
+
+    def get(self, key: object) -> int:
+        """Return the count of the key, or None if it is not in the heap."""
+        position = self._positions.get(key)
+        return None if position == None else self._counts[position]
+
+    def min_count(self) -> int:
+        """Return the smallest count in the heap, 0 if it is empty."""
+        return self._counts[0] if self._keys else 0
+
+    def offer(self, key: object, count: int) -> object:
+        """
+        Record that the key's count has grown to the given count. A key not
+        in a full heap takes the place of the smallest count if it beats it.
+        Returns the key that was pushed out, if any.
+        """
+        position = self._positions.get(key)
+        if position != None:
+            self._counts[position] = count
+            self._sift_down(position)
+            return None
+
+        if len(self._keys) < self._k:
+            self._keys.append(key)
+            self._counts.append(count)
+            self._positions[key] = len(self._keys) - 1
+            self._sift_up(len(self._keys) - 1)
+            return None
+
+        if count <= self._counts[0]:
+            return None
+
+        evicted = self._keys[0]
+        del self._positions[evicted]
+        self._keys[0] = key
+        self._counts[0] = count
+        self._positions[key] = 0
+        self._sift_down(0)
+        return evicted
+
+    def items(self) -> list:
+        """Return the (key, count) pairs, highest count first."""
+        return sorted(zip(self._keys, self._counts), key=lambda pair: pair[1], reverse=True)
+
+    def _swap(self, i: int, j: int) -> None:
+        """Swap two heap slots and update the positions of their keys."""
+        keys, counts = self._keys, self._counts
+        keys[i], keys[j] = keys[j], keys[i]
+        counts[i], counts[j] = counts[j], counts[i]
+        self._positions[keys[i]] = i
+        self._positions[keys[j]] = j
+
+    def _sift_up(self, position: int) -> None:
+        """Move a slot towards the root while it is smaller than its parent."""
+        while position > 0:
+            parent = (position - 1) // 2
+            if self._counts[parent] <= self._counts[position]:
+                return
+            self._swap(parent, position)
+            position = parent
+
+    def _sift_down(self, position: int) -> None:
+        """Move a slot towards the leaves while a child is smaller."""
+        size = len(self._keys)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self._counts[child] < self._counts[smallest]:
+                    smallest = child
+            if smallest == position:
+                return
+            self._swap(smallest, position)
+            position = smallest
+
+
+class _StreamingCounter(ABC):
+    """
+    Shared streaming interface: subclasses implement add(key, count) and
+    mode().
+    """
+
+    @abstractmethod
+    def add(self, key: object, count: int = 1) -> int:
+        """Count the key count more times and return its (estimated) count."""
+
+    def update(self, keys: object) -> None:
+        """Count every key of the given iterable once."""
+        add = self.add
+        for key in keys:
+            add(key)
+
+    def consume(self, keys: object, chunk_size: int = 10000):
+        """
+        Count the keys of any iterable or generator chunk_size at a time,
+        yielding the running total after each chunk so the caller can read
+        mode() or top() as the stream goes by.
+        """
+        iterator = iter(keys)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            self.update(chunk)
+            yield self._total
+
+    def get_total(self) -> int:
+        """Return the number of keys counted so far, repeats included."""
+        return self._total
+
+    @abstractmethod
+    def mode(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a dynamic array with the most frequent key(s) and
+        their frequency, like find_mode() does.
+        """
+
+    def top(self, n: int = None) -> DynamicArray:
+        """
+        Return a dynamic array of the (key, count) pairs of the n most
+        frequent keys (at most k, all k by default), highest count first.
+        """
+        items = self._top.items()
+        return DynamicArray(items[:n] if n != None else items)
+
+
+class FrequencyCounter(_StreamingCounter):
+    """
+    Exact streaming frequency counter.
+    Keys are counted with HashMap.increment(), and the current mode(s) and
+    the k most frequent keys are updated as every key arrives.
+    """
+
+    def __init__(self, k: int = 10, function: callable = hash_function_builtin) -> None:
+        """Initialize an empty counter tracking the k most frequent keys."""
+        self._counts = hash_map_sc.HashMap(11, function, policy=ResizePolicy(max_load=1.0))
+        self._top = TopK(k)
+        self._modes = DynamicArray()
+        self._highest = 0
+        self._total = 0
+
+    def __len__(self) -> int:
+        """Return the number of distinct keys counted."""
+        return self._counts.get_size()
+
+    def add(self, key: object, count: int = 1) -> int:
+        """Count the key count more times and return its new count."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        new_count = self._counts.increment(key, count)
+        self._total += count
+
+        # Counts only grow, so a key becomes the only mode as soon as it
+        # passes the highest count, and joins the modes when it reaches it
+        if new_count > self._highest:
+            self._highest = new_count
+            self._modes = DynamicArray([key])
+        elif new_count == self._highest:
+            self._modes.append(key)
+
+        self._top.offer(key, new_count)
+        return new_count
+
+    def count(self, key: object) -> int:
+        """Return how many times the key has been counted."""
+        count = self._counts.get(key)
+        return 0 if count == None else count
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a dynamic array with the most frequent key(s) and
+        their frequency, like find_mode() does.
+        """
+        return DynamicArray(self._modes.get_list()), self._highest
+
+
+class ApproximateFrequencyCounter(_StreamingCounter):
+    """
+    Approximate streaming frequency counter using bounded memory.
+
+    A Count-Min Sketch of depth rows of width counters estimates the count
+    of any key. Estimates never undercount, and with probability 1 - delta
+    they overcount by at most epsilon times the total count.
+    Space-Saving monitors a fixed number of keys (10 * k by default): a new
+    key replaces the one with the smallest count and inherits that count,
+    which bounds how far it can overcount. Every key counted more than
+    total / monitored times is monitored, and the k highest are reported.
+    """
+
+    def __init__(self,
+                 k: int = 10,
+                 epsilon: float = 0.001,
+                 delta: float = 0.01,
+                 function: callable = hash_function_builtin,
+                 monitored: int = None) -> None:
+        """Initialize an empty sketch sized for the given error bounds."""
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("epsilon and delta must be between 0 and 1")
+        monitored = monitored if monitored != None else 10 * k
+        if monitored < k:
+            raise ValueError("monitored must be at least k")
+
+        self._width = math.ceil(math.e / epsilon)
+        self._depth = math.ceil(math.log(1 / delta))
+        self._rows = [array('Q', bytes(8 * self._width)) for _ in range(self._depth)]
+        self._function = function
+
+        self._k = k
+        self._top = TopK(monitored)
+        self._errors = {}
+        self._total = 0
+
+    def _indexes(self, key: object) -> list:
+        """
+        Return the counter index of the key in each row, derived from a
+        single mixed 64-bit hash as first + row * second.
+        """
+        hash = mix_hash(self._function(key))
+        first, second = hash & 0xFFFFFFFF, (hash >> 32) | 1
+        width = self._width
+        return [(first + row * second) % width for row in range(self._depth)]
+
+    def add(self, key: object, count: int = 1) -> int:
+        """Count the key count more times and return its estimated count."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        self._total += count
+
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(key)):
+            row[index] += count
+            if estimate == None or row[index] < estimate:
+                estimate = row[index]
+
+        # Space-Saving: raise a monitored key, fill a free slot, or take the
+        # slot of the smallest count, inheriting it as possible overcount
+        current = self._top.get(key)
+        if current != None:
+            self._top.offer(key, current + count)
+        elif not self._top.is_full():
+            self._top.offer(key, count)
+            self._errors[key] = 0
+        else:
+            smallest = self._top.min_count()
+            evicted = self._top.offer(key, smallest + count)
+            del self._errors[evicted]
+            self._errors[key] = smallest
+
+        return estimate
+
+    def estimate(self, key: object) -> int:
+        """Return the estimated count of the key, never below its true count."""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def error(self, key: object) -> int:
+        """
+        Return how far a monitored key's Space-Saving count may exceed its
+        true count, or None if the key is not monitored.
+        """
+        return self._errors.get(key)
+
+    def top(self, n: int = None) -> DynamicArray:
+        """
+        Return a dynamic array of the (key, count) pairs of the n most
+        frequent monitored keys (at most k, all k by default), highest count
+        first. Each count is the tighter of the Space-Saving and Count-Min
+        estimates.
+        """
+        items = [(key, min(count, self.estimate(key))) for key, count in self._top.items()]
+        items.sort(key=lambda pair: pair[1], reverse=True)
+        return DynamicArray(items[:min(n, self._k) if n != None else self._k])
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a dynamic array with the most frequent monitored
+        key(s) and their estimated frequency.
+        """
+        items = self.top()
+        if items.length() == 0:
+            return DynamicArray(), 0
+        highest = items[0][1]
+        return DynamicArray([key for key, count in items if count == highest]), highest
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nFrequencyCounter - consume a generator")
+    print("--------------------------------------")
+    counter = FrequencyCounter(k=3)
+    stream = ('word' + str(i % 7 if i % 3 else 0) for i in range(100))
+    for total in counter.consume(stream, chunk_size=40):
+        mode, frequency = counter.mode()
+        print(f"Counted: {total}\nMode : {mode}, Frequency: {frequency}, Top: {counter.top()}")
+
+    print("\nFrequencyCounter - same modes as find_mode")
+    print("------------------------------------------")
+    da = DynamicArray(["one", "two", "three", "four", "five", "two", "four"])
+    counter = FrequencyCounter()
+    counter.update(da)
+    mode, frequency = counter.mode()
+    print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}")
+    mode, frequency = hash_map_sc.find_mode(da)
+    print(f"find_mode: {mode}, Frequency: {frequency}")
+
+    print("\nApproximateFrequencyCounter - heavy hitters")
+    print("-------------------------------------------")
+    counter = ApproximateFrequencyCounter(k=5, epsilon=0.01, delta=0.01)
+    counter.update('hot' + str(i % 3) if i % 2 else 'cold' + str(i) for i in range(10000))
+    print(f"Top: {counter.top(3)}")
+    print(f"hot0 estimate: {counter.estimate('hot0')}, Space-Saving error: {counter.error('hot0')}")
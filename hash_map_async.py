@@ -0,0 +1,284 @@
+# Description: asyncio facade over the separate chaining and open addressing hash maps.
+#
+# A HashMap used from an event loop blocks every other task for as long as a
+# single call runs, so a resize or a full scan of millions of entries stalls
+# the whole service. AsyncHashMap keeps every call short instead:
+#
+#   resizes     the wrapped map is created in incremental mode, so a resize
+#               only swaps in the new table, and resize_table() then moves
+#               step buckets over at a time, yielding to the loop in between
+#   bulk loads  put_many() and remove_many() work through step pairs at a
+#               time, growing the table cooperatively before each chunk so
+#               the map's own batch methods never have a rehash to finish
+#   scans       items(), keys(), values() and get_keys_and_values() walk
+#               step buckets at a time
+#
+# Single-key operations stay synchronous: in incremental mode they only ever
+# move the map's own rehash_step buckets along.
+#
+# The cyclic garbage collector can still stall the loop: its full passes
+# visit every node of every map at once. Services holding very large maps
+# can gc.freeze() them once loaded to leave them out of those passes.
+
+
+import asyncio
+from itertools import islice
+
+import hash_map_sc
+from base_structures import DynamicArray, hash_function_1
+
+
+class AsyncHashMap:
+    def __init__(self,
+                 map_type: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 step: int = 1024,
+                 **options) -> None:
+        """
+        Initialize new HashMap of the given map type (hash_map_sc.HashMap or
+        hash_map_oa.HashMap) in incremental mode, whose bulk operations yield
+        to the event loop after every step buckets or pairs. Any other
+        keyword arguments are passed on to the map.
+        """
+        if step < 1:
+            raise ValueError("step must be at least 1")
+
+        self._map = map_type(capacity, function, incremental=True, **options)
+        self._step = step
+        self._chained = isinstance(self._map, hash_map_sc.HashMap)
+
+    def get_map(self) -> object:
+        """
+        Return the wrapped HashMap
+        """
+        return self._map
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._map.table_load()
+
+    def is_rehashing(self) -> bool:
+        """
+        Returns True while a resize is moving entries over.
+        """
+        return self._map.is_rehashing()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+        self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map.
+        """
+        return self._map.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._map.remove(key)
+
+    def __contains__(self, key: str) -> bool:
+        """Returns True if the given key is in the hash map, see contains_key()."""
+        return self._map.contains_key(key)
+
+    def __len__(self) -> int:
+        """Returns the number of keys in the hash map."""
+        return self._map.get_size()
+
+    # ------------------- RESIZING --------------------------------------- #
+
+    async def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, moving step old
+        buckets over at a time and yielding to the event loop in between.
+        Other tasks may keep using the map while the entries move.
+        """
+        await self.finish_rehash()
+        self._map.resize_table(new_capacity)
+        await self.finish_rehash()
+
+    async def finish_rehash(self) -> None:
+        """
+        Moves every entry of a resize underway into the new table, step old
+        buckets at a time.
+        """
+        while not self._map.rehash_step(self._step):
+            await asyncio.sleep(0)
+
+    async def _reserve(self, size: int) -> None:
+        """
+        Grows the table cooperatively, if needed, so that the map's batch
+        methods can take entries up to the given size without resizing.
+        """
+        await self.finish_rehash()
+        self._map._grow_for(size)
+        await self.finish_rehash()
+
+    # ------------------- BULK OPERATIONS -------------------------------- #
+
+    async def put_many(self, pairs: object) -> None:
+        """
+        Updates every key/value pair of the given iterable or async iterable,
+        as calling put() on each in turn would, step pairs at a time.
+        """
+        async for chunk in self._chunks(pairs):
+            await self._reserve(self._map.get_size() + len(chunk))
+            self._map.put_many(chunk)
+            await asyncio.sleep(0)
+
+    async def get_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each given key, in
+        order, with None for keys that are not in the hash map.
+        """
+        values = []
+        async for chunk in self._chunks(keys):
+            await self.finish_rehash()
+            values.extend(self._map.get_many(chunk))
+            await asyncio.sleep(0)
+        return DynamicArray(values)
+
+    async def remove_many(self, keys: object) -> None:
+        """
+        Removes every given key from the hash map, ignoring keys that are
+        not in it, step keys at a time.
+        """
+        async for chunk in self._chunks(keys):
+            await self.finish_rehash()
+            self._map.remove_many(chunk)
+            await asyncio.sleep(0)
+        await self.finish_rehash()
+
+    async def _chunks(self, items: object):
+        """
+        Yields lists of up to step items from an iterable or async iterable.
+        """
+        if hasattr(items, '__aiter__'):
+            chunk = []
+            async for item in items:
+                chunk.append(item)
+                if len(chunk) == self._step:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+            return
+
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, self._step))
+            if not chunk:
+                return
+            yield chunk
+
+    # ------------------- SCANS ------------------------------------------ #
+
+    async def items(self):
+        """
+        Yields the (key, value) pairs in bucket order, yielding to the event
+        loop after every step buckets. Like a dict, raises RuntimeError if
+        the map gains or loses keys, or is resized, while a scan is underway.
+        """
+        async for entry in self._iter_entries():
+            yield entry.key, entry.value
+
+    async def keys(self):
+        """Yields the keys in bucket order, like items()."""
+        async for entry in self._iter_entries():
+            yield entry.key
+
+    async def values(self):
+        """Yields the values in bucket order, like items()."""
+        async for entry in self._iter_entries():
+            yield entry.value
+
+    async def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map.
+        """
+        return DynamicArray([pair async for pair in self.items()])
+
+    async def _iter_entries(self):
+        """
+        Yields every live node or entry of the map in place, step buckets
+        between each return to the event loop.
+        """
+        await self.finish_rehash()
+        buckets = self._map.get_buckets()
+        size = self._map.get_size()
+        table = buckets.get_list()
+
+        for start in range(0, len(table), self._step):
+
+            for bucket in table[start:start + self._step]:
+
+                if self._chained:
+                    entries = list(bucket)
+                elif bucket != None and bucket.is_tombstone == False:
+                    entries = (bucket,)
+                else:
+                    continue
+
+                for entry in entries:
+                    yield entry
+
+                    if self._map.get_size() != size or self._map.get_buckets() is not buckets:
+                        raise RuntimeError("HashMap changed size during iteration")
+
+            await asyncio.sleep(0)
+
+            if self._map.get_size() != size or self._map.get_buckets() is not buckets:
+                raise RuntimeError("HashMap changed size during iteration")
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+    from base_structures import ResizePolicy
+
+    async def main():
+        print("\nAsyncHashMap - separate chaining")
+        print("--------------------------------")
+        m = AsyncHashMap(hash_map_sc.HashMap, 53, hash_function_1, step=16,
+                         policy=ResizePolicy(max_load=1.0))
+        await m.put_many(('str' + str(i), i * 100) for i in range(150))
+        await m.resize_table(401)
+        print(m.get_size(), m.get_capacity(), m.get('str42'), len([key async for key in m.keys()]))
+
+        print("\nAsyncHashMap - open addressing")
+        print("------------------------------")
+        m = AsyncHashMap(hash_map_oa.HashMap, 53, hash_function_1, step=16)
+        await m.put_many(('str' + str(i), i * 100) for i in range(150))
+        await m.remove_many('str' + str(i) for i in range(0, 150, 2))
+        print(m.get_size(), m.get_capacity(), m.get('str43'), (await m.get_keys_and_values()).length())
+
+    asyncio.run(main())
@@ -0,0 +1,435 @@
+# Description: Thread-safe hash map using separate chaining and lock striping.
+#
+# The table is split into stripe_count ranges of consecutive buckets, each
+# guarded by its own lock, so threads writing to different ranges never wait
+# for each other:
+#
+#   writers     lock the stripe holding their bucket, then check the table
+#               they indexed is still the current one (a resize may have
+#               swapped it in the meantime) and retry if not
+#   readers     take no lock at all; the buckets and capacity are published
+#               together as one _Table object, so a reader always indexes
+#               a table with the capacity it was built for, and every chain
+#               update is a single reference assignment a reader sees either
+#               before or after
+#   resizes     take every stripe lock in order, copy the chains into a new
+#               table and publish it with one assignment
+#
+# Each stripe counts its own entries under its lock, and the size is the sum
+# of the stripe counts. Holding at most one stripe lock at a time (resizes
+# take them in a fixed order) means writers can never deadlock.
+
+
+import threading
+
+from base_structures import (DynamicArray, ItemsView, KeysView, LinkedList,
+                             ResizePolicy, ValuesView, hash_function_1)
+
+
+class _Table:
+    """The buckets of a ConcurrentHashMap and their count, swapped together."""
+
+    __slots__ = ('buckets', 'capacity')
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize a table of empty chains."""
+        self.buckets = DynamicArray([LinkedList() for _ in range(capacity)])
+        self.capacity = capacity
+
+
+class ConcurrentHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 policy: ResizePolicy = None,
+                 stripe_count: int = 16) -> None:
+        """
+        Initialize new thread-safe HashMap that uses separate chaining for
+        collision resolution and stripe_count locks over ranges of buckets.
+        The resize policy defaults to growing 2x at a load of 1.0.
+        """
+        if stripe_count < 1:
+            raise ValueError("stripe_count must be at least 1")
+
+        self._hash_function = function
+        self._policy = policy if policy != None else ResizePolicy(max_load=1.0)
+
+        # capacity must be a prime number
+        self._table = _Table(self._next_prime(max(capacity, 1)))
+        self._min_capacity = self._table.capacity
+
+        self._stripe_count = stripe_count
+        self._locks = [threading.Lock() for _ in range(stripe_count)]
+
+        # Entries per stripe, each only changed under its stripe's lock
+        self._counts = [0] * stripe_count
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as the
+        separate chaining HashMap
+        """
+        table = self._table
+        out = ''
+        for i in range(table.capacity):
+            out += str(i) + ': ' + str(table.buckets[i]) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number and the find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map. While other threads are writing, this is the
+        size at some point during the call.
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._table.capacity
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self.get_size() / self._table.capacity
+
+    # ------------------- LOCKING ---------------------------------------- #
+
+    def _lock_bucket(self, hash: int) -> tuple:
+        """
+        Acquires the lock of the stripe holding the hash's bucket in the
+        current table, retrying if a resize swaps the table first.
+        Returns (table, bucket index, stripe); the caller releases the lock.
+        """
+
+        while True:
+            table = self._table
+            index = hash % table.capacity
+            stripe = index * self._stripe_count // table.capacity
+
+            self._locks[stripe].acquire()
+            if self._table is table:
+                return table, index, stripe
+            self._locks[stripe].release()
+
+    def _lock_all(self) -> None:
+        """Acquires every stripe lock, always in the same order."""
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """Releases every stripe lock."""
+        for lock in reversed(self._locks):
+            lock.release()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+
+        self._upsert(key, lambda old_value: value, None)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, first adding the
+        key with the default value if it is not in the hash map. Atomic:
+        concurrent calls for the same key all return the same value.
+        """
+
+        return self._upsert(key, None, default)
+
+    def update_with(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Atomically replaces the value associated with the given key by
+        function(value), adding the key with function(default) if it is not
+        in the hash map. Returns the new value.
+        function is called with the key's stripe locked, so it must not use
+        the map itself.
+        """
+
+        return self._upsert(key, function, default)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Atomically adds delta to the count associated with the given key,
+        counting from 0 if the key is not in the hash map. Returns the new count.
+        """
+
+        return self._upsert(key, lambda count: count + delta, 0)
+
+    def _upsert(self, key: str, function: callable, default: object) -> object:
+        """
+        Applies function to the value of the key, or to default for a new
+        key, with the key's stripe locked. With function None an existing
+        value is kept and a new key gets default.
+        Returns the value the key ends up with.
+        """
+
+        hash = self._hash_function(key)
+        table, index, stripe = self._lock_bucket(hash)
+
+        try:
+            chain = table.buckets[index]
+            node = chain.contains(key, hash)
+
+            if node != None:
+                if function != None:
+                    node.value = function(node.value)
+                return node.value
+
+            value = default if function == None else function(default)
+            chain.insert(key, value, hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        # Grow outside the stripe lock, since resizing takes all of them
+        max_load = self._policy.max_load
+        if max_load != None and self.get_size() > max_load * table.capacity:
+            self._resize(self._policy.grown(table.capacity), table)
+
+        return value
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, without locking.
+        """
+
+        hash = self._hash_function(key)
+        table = self._table
+        node = table.buckets[hash % table.capacity].contains(key, hash)
+
+        if node == None:
+            return None
+
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, without locking.
+        """
+
+        hash = self._hash_function(key)
+        table = self._table
+
+        return table.buckets[hash % table.capacity].contains(key, hash) != None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+
+        self._remove(key)
+
+    def _remove(self, key: str) -> bool:
+        """
+        Removes the key under its stripe lock. Returns False if it was absent.
+        """
+
+        hash = self._hash_function(key)
+        table, index, stripe = self._lock_bucket(hash)
+
+        try:
+            if not table.buckets[index].remove(key, hash):
+                return False
+            self._counts[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+        # Shrink once removals leave the table sparse enough
+        capacity = table.capacity
+        if self.get_size() / capacity < self._policy.min_load and capacity > self._min_capacity:
+            self._resize(max(self._min_capacity, self._policy.shrunk(capacity)), table)
+
+        return True
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+
+        self._lock_all()
+        try:
+            self._table = _Table(self._table.capacity)
+            self._counts = [0] * self._stripe_count
+        finally:
+            self._unlock_all()
+
+    # ------------------- RESIZING --------------------------------------- #
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        Writers wait while the chains are copied; readers keep using the
+        old table until the new one is published.
+        """
+
+        if new_capacity < 1:
+            return
+
+        self._resize(new_capacity, None)
+
+    def _resize(self, new_capacity: int, expected: _Table) -> None:
+        """
+        Copies every chain into a new table of the next prime capacity and
+        publishes it. With an expected table given, does nothing if another
+        thread has already replaced it, so racing growth checks resize once.
+        """
+
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        self._lock_all()
+        try:
+            if expected != None and self._table is not expected:
+                return
+
+            old_table = self._table
+            new_table = _Table(new_capacity)
+            counts = [0] * self._stripe_count
+
+            # Copy the nodes instead of moving them, since lock-free readers
+            # may still be walking the old chains
+            new_buckets = new_table.buckets.get_list()
+            for chain in old_table.buckets:
+                for node in chain:
+                    new_index = node.hash % new_capacity
+                    new_buckets[new_index].insert(node.key, node.value, node.hash)
+                    counts[new_index * self._stripe_count // new_capacity] += 1
+
+            self._table = new_table
+            self._counts = counts
+        finally:
+            self._unlock_all()
+
+    # ------------------------------------------------------------------ #
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map.
+        """
+
+        return DynamicArray([(node.key, node.value) for node in self._iter_entries()])
+
+    # ------------------- MAPPING PROTOCOL ------------------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, raising KeyError if
+        the key is not in the hash map.
+        """
+
+        hash = self._hash_function(key)
+        table = self._table
+        node = table.buckets[hash % table.capacity].contains(key, hash)
+
+        if node == None:
+            raise KeyError(key)
+
+        return node.value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """
+        Adds or updates the key, like put().
+        """
+
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Removes the key, raising KeyError if it is not in the hash map.
+        """
+
+        if not self._remove(key):
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        """Returns True if the given key is in the hash map, see contains_key()."""
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        """Returns the number of keys in the hash map."""
+        return self.get_size()
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return iter(self.keys())
+
+    def keys(self) -> KeysView:
+        """Returns a view of the keys in bucket order."""
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """Returns a view of the values in bucket order."""
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Returns a view of the (key, value) pairs in bucket order."""
+        return ItemsView(self)
+
+    def _iter_entries(self):
+        """
+        Yields the nodes of the table current when iteration starts, without
+        locking. Iteration is weakly consistent: it never raises while other
+        threads write, and sees each of their changes either way, but every
+        entry present throughout is yielded exactly once.
+        """
+
+        for chain in self._table.buckets:
+            yield from chain
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nConcurrentHashMap - threads counting the same words")
+    print("---------------------------------------------------")
+    m = ConcurrentHashMap(11, hash_function_1)
+    words = ['word' + str(i % 50) for i in range(2000)]
+
+    def count_words():
+        for word in words:
+            m.increment(word)
+
+    threads = [threading.Thread(target=count_words) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(m.get_size(), m.get_capacity(), m.get('word7'), sum(m.values()))
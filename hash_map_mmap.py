@@ -0,0 +1,302 @@
+# Description: Memory-mapped, read-only open addressing table written from a HashMap.
+#
+# build_mapped() writes the bucket layout of an open addressing HashMap to a
+# file exactly as it sits in memory, and MappedHashMap opens that file with
+# mmap and probes it in place, so a process reopening a large table only
+# parses a header instead of putting every key again. The pages are read
+# lazily and shared through the OS page cache by every process that maps
+# the same file.
+#
+# File layout (little-endian):
+#
+#   header      magic, format version, metadata length, capacity, size
+#   metadata    JSON naming the hash function and probing strategy
+#   records     capacity fixed-size records, one per bucket:
+#               flags (empty, live or tombstone), cached hash,
+#               key offset and length, value offset and length
+#   heap        UTF-8 keys and pickled values the records point to
+#
+# Tombstones are kept so every probe sequence runs through the same buckets
+# it did in memory, which lets lookups use the map's own probing strategy.
+
+
+import json
+import mmap
+import os
+import pickle
+import struct
+
+import hash_map_oa
+from base_structures import (HashEntry, ItemsView, KeysView, ValuesView,
+                             describe_hash_function, hash_function_fnv1a,
+                             load_hash_function)
+
+
+MAGIC = b'HMOAMMAP'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQQ')
+_RECORD = struct.Struct('<BQQIQI')
+
+_EMPTY = 0
+_LIVE = 1
+_TOMBSTONE = 2
+
+
+def build_mapped(hash_map: hash_map_oa.HashMap, path: str) -> None:
+    """
+    Write the open addressing hash map to a file MappedHashMap can open.
+    Keys must be strings, values anything pickle can write, and the map's
+    hash function one that gives the same hashes in every process (so not
+    hash_function_builtin). The file is written next to the given path and
+    renamed over it once complete, so readers never see a partial table.
+    """
+    # Finish any incremental rehash so the whole layout is in one table
+    while not hash_map.rehash_step(hash_map.get_capacity()):
+        pass
+
+    metadata = json.dumps({
+        'function': describe_hash_function(hash_map._hash_function),
+        'probing': hash_map_oa.describe_probing(hash_map._probing),
+    }).encode('utf-8')
+
+    capacity = hash_map.get_capacity()
+    records = bytearray(capacity * _RECORD.size)
+    heap_offset = _HEADER.size + len(metadata) + len(records)
+
+    temporary_path = path + '.tmp'
+
+    # Remove the partial file if anything fails, such as a value pickle
+    # can not write, so a failed build leaves nothing behind
+    try:
+        with open(temporary_path, 'wb') as file:
+
+            # Leave room for the records, written once the heap offsets are known
+            file.write(_HEADER.pack(MAGIC, VERSION, len(metadata), capacity, hash_map.get_size()))
+            file.write(metadata)
+            file.seek(heap_offset)
+
+            offset = heap_offset
+            for index, entry in enumerate(hash_map.get_buckets()):
+
+                if entry == None:
+                    continue
+
+                if entry.is_tombstone == True:
+                    _RECORD.pack_into(records, index * _RECORD.size, _TOMBSTONE, 0, 0, 0, 0, 0)
+                    continue
+
+                key = entry.key.encode('utf-8')
+                value = pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL)
+                file.write(key)
+                file.write(value)
+                _RECORD.pack_into(records, index * _RECORD.size, _LIVE, entry.hash,
+                                  offset, len(key), offset + len(key), len(value))
+                offset += len(key) + len(value)
+
+            file.seek(_HEADER.size + len(metadata))
+            file.write(records)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+
+class MappedHashMap:
+    """
+    Read-only open addressing table opened from a file written by
+    build_mapped(). Opening only reads the header; lookups probe the
+    records in place with the probing strategy the table was built with.
+    Values are unpickled when read, so only open files you trust.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Map the file at the given path and read its header."""
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, metadata_length, capacity, size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} mapped hash table")
+
+        metadata = json.loads(self._mmap[_HEADER.size:_HEADER.size + metadata_length])
+        self._hash_function = load_hash_function(metadata['function'])
+        self._probing = hash_map_oa.load_probing(metadata['probing'])
+
+        self._capacity = capacity
+        self._size = size
+        self._records_offset = _HEADER.size + metadata_length
+
+        if len(self._mmap) < self._records_offset + capacity * _RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated")
+
+    def get_size(self) -> int:
+        """Return size of map"""
+        return self._size
+
+    def get_capacity(self) -> int:
+        """Return capacity of map"""
+        return self._capacity
+
+    def close(self) -> None:
+        """Unmap the file. The table can not be read afterwards."""
+        self._mmap.close()
+
+    def __enter__(self) -> 'MappedHashMap':
+        """Returns the table itself for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Unmaps the file on leaving the with statement."""
+        self.close()
+
+    # ------------------------------------------------------------------ #
+
+    def _find_record(self, key: str) -> tuple:
+        """
+        Returns the record of the live entry holding the key, or None if the
+        key is not in the table. Probes exactly like HashMap._find_index().
+        """
+
+        hash = self._hash_function(key)
+        encoded = key.encode('utf-8')
+
+        data = self._mmap
+        records_offset = self._records_offset
+        capacity = self._capacity
+        robin_hood = self._probing.robin_hood
+        step_for = self._probing.step
+        next_index = self._probing.next_index
+
+        new_index = hash % capacity
+        j = 0
+
+        while j < capacity:
+
+            record = _RECORD.unpack_from(data, records_offset + new_index * _RECORD.size)
+            flags, record_hash, key_offset, key_length = record[:4]
+
+            if flags == _EMPTY:
+                return None
+
+            elif flags == _LIVE and record_hash == hash and data[key_offset:key_offset + key_length] == encoded:
+                return record
+
+            # Robin Hood: the key would have displaced an entry closer to home
+            elif robin_hood and flags == _LIVE and (new_index - record_hash % capacity) % capacity < j:
+                return None
+
+            j += 1
+            if j == 1:
+                step = step_for(key, hash, capacity)
+            new_index = next_index(new_index, j, step, capacity)
+
+        return None
+
+    def _read_value(self, record: tuple) -> object:
+        """Unpickles the value a live record points to."""
+        value_offset, value_length = record[4], record[5]
+        return pickle.loads(self._mmap[value_offset:value_offset + value_length])
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+
+        record = self._find_record(key)
+
+        if record == None:
+            return None
+
+        return self._read_value(record)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the table, otherwise it returns False.
+        """
+
+        return self._find_record(key) != None
+
+    # ------------------- MAPPING PROTOCOL ------------------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, raising KeyError if
+        the key is not in the table.
+        """
+
+        record = self._find_record(key)
+
+        if record == None:
+            raise KeyError(key)
+
+        return self._read_value(record)
+
+    def __contains__(self, key: str) -> bool:
+        """Returns True if the given key is in the hash map, see contains_key()."""
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        """Returns the number of keys in the hash map."""
+        return self._size
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return iter(self.keys())
+
+    def keys(self) -> KeysView:
+        """Returns a view of the keys in bucket order."""
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """Returns a view of the values in bucket order."""
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Returns a view of the (key, value) pairs in bucket order."""
+        return ItemsView(self)
+
+    def _iter_entries(self):
+        """
+        Yields a HashEntry for every live record, in bucket order.
+        """
+
+        data = self._mmap
+        for index in range(self._capacity):
+
+            record = _RECORD.unpack_from(data, self._records_offset + index * _RECORD.size)
+            flags, hash, key_offset, key_length = record[:4]
+
+            if flags == _LIVE:
+                key = data[key_offset:key_offset + key_length].decode('utf-8')
+                yield HashEntry(key, self._read_value(record), hash)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    print("\nMappedHashMap - build and reopen")
+    print("--------------------------------")
+    m = hash_map_oa.HashMap(53, hash_function_fnv1a)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    m.remove('str7')
+
+    path = os.path.join(tempfile.mkdtemp(), 'table.hmap')
+    build_mapped(m, path)
+
+    with MappedHashMap(path) as mapped:
+        print(mapped.get_size(), mapped.get_capacity(), os.path.getsize(path))
+        print(mapped.get('str42'), mapped.contains_key('str7'), mapped.get('missing'))
+        print(sorted(mapped.items()) == sorted(m.items()))
+
+    os.remove(path)
@@ -1,27 +1,217 @@
 # Description: Implementation of a hash map using open addressing and associated functions.
 
 
-from base_structures import (DynamicArray, HashEntry,
-                             hash_function_1, hash_function_2)
+import time
+
+from base_structures import (BloomFilter, DynamicArray, HashEntry, ItemsView,
+                             KeysView, MixedHash, ResizePolicy, ValuesView,
+                             accelerator, describe_hash_function,
+                             hash_function_1, hash_function_2,
+                             load_hash_function)
+from hash_vectorized import hash_many
+
+
+# ------------------- PROBING STRATEGIES ---------------------------------- #
+
+class LinearProbing:
+    """
+    Probes consecutive buckets. Neighbouring buckets share cache lines, so
+    this is the cheapest sequence to walk, at the cost of clustering.
+
+    Every strategy has step(), called once per lookup that goes past its
+    home bucket, and next_index(), called for every further probe with the
+    value step() returned, so per-key work is never repeated along the way.
+    """
+
+    robin_hood = False
+
+    # Highest max_load a resize policy may use with this strategy
+    load_limit = 0.95
+
+    def step(self, key: str, hash: int, capacity: int) -> int:
+        """Returns the value next_index() is given for every probe of the key."""
+        return 1
+
+    def next_index(self, index: int, j: int, step: int, capacity: int) -> int:
+        """Returns the bucket to probe after index, the j-th probe of the sequence."""
+        return (index + 1) % capacity
+
+
+class QuadraticProbing:
+    """
+    Probes initial + j**2 for j = 1, 2, 3, ...
+    Each step is reached from the previous bucket by adding 2j - 1, so the
+    square is never recomputed.
+    Only half the buckets of a prime capacity table are reachable, so the
+    load must stay at or below 0.5 for inserts to always find a bucket.
+    Power of two tables use the triangular numbers j(j + 1) / 2 instead,
+    since squares would only reach a few of their buckets.
+    """
+
+    robin_hood = False
+    load_limit = 0.5
+
+    def step(self, key: str, hash: int, capacity: int) -> int:
+        """Returns the value next_index() is given for every probe of the key."""
+        return 1
+
+    def next_index(self, index: int, j: int, step: int, capacity: int) -> int:
+        """Returns the bucket to probe after index, the j-th probe of the sequence."""
+        if capacity & (capacity - 1) == 0:
+            return (index + j) % capacity
+        return (index + 2 * j - 1) % capacity
+
+
+class DoubleHashing:
+    """
+    Probes in steps of 1 + h2 % (capacity - 1), which visits every bucket of
+    a prime capacity table and breaks up clusters since keys sharing a home
+    bucket usually take different steps. Power of two tables step by h2
+    forced odd, which likewise visits every bucket.
+    h2 is the second hash function when one is given, otherwise the cached
+    hash of the key. The step is worked out once per lookup, so a second
+    function is called at most once per key, and only on a collision.
+    """
+
+    robin_hood = False
+    load_limit = 0.95
+
+    def __init__(self, function: callable = None) -> None:
+        """Initialize with an optional second hash function."""
+        self._function = function
+
+    def step(self, key: str, hash: int, capacity: int) -> int:
+        """Returns the distance between consecutive probes of the key."""
+        second_hash = hash if self._function == None else self._function(key)
+        if capacity & (capacity - 1) == 0:
+            return second_hash | 1
+        return 1 + second_hash % (capacity - 1)
+
+    def next_index(self, index: int, j: int, step: int, capacity: int) -> int:
+        """Returns the bucket to probe after index, the j-th probe of the sequence."""
+        return (index + step) % capacity
+
+
+class RobinHoodProbing(LinearProbing):
+    """
+    Linear probing where an inserted key takes the bucket of any entry that
+    sits closer to its own home bucket, evening out probe lengths.
+    Lookups stop as soon as they pass such an entry, and removals shift the
+    following entries back instead of leaving tombstones.
+    """
+
+    robin_hood = True
+
+
+# Probing strategies a table written to disk can be reopened with, by class name
+PROBING_STRATEGIES = {
+    'LinearProbing': LinearProbing,
+    'QuadraticProbing': QuadraticProbing,
+    'DoubleHashing': DoubleHashing,
+    'RobinHoodProbing': RobinHoodProbing,
+}
+
+
+def describe_probing(probing: object) -> dict:
+    """
+    Return a JSON-serializable description of one of the probing strategies
+    above, including the second hash function of DoubleHashing.
+    """
+    name = type(probing).__name__
+    if PROBING_STRATEGIES.get(name) is not type(probing):
+        raise ValueError(f"{name} can not be written to disk")
+
+    function = getattr(probing, '_function', None)
+    return {
+        'name': name,
+        'function': None if function == None else describe_hash_function(function),
+    }
+
+
+def load_probing(description: dict) -> object:
+    """Return the probing strategy described by describe_probing()."""
+    probing = PROBING_STRATEGIES[description['name']]
+    if description['function'] != None:
+        return probing(load_hash_function(description['function']))
+    return probing()
+
+
+# Marks an old-table bucket whose entry has been moved by an incremental rehash
+_MIGRATED = HashEntry(None, None)
+_MIGRATED.is_tombstone = True
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self,
+                 capacity: int,
+                 function,
+                 incremental: bool = False,
+                 rehash_step: int = 4,
+                 probing: object = None,
+                 policy: ResizePolicy = None,
+                 power_of_two: bool = False,
+                 bloom_bits_per_key: int = None) -> None:
         """
-        Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Initialize new HashMap that uses open addressing for collision
+        resolution, probing with the given strategy (quadratic by default).
+        The resize policy defaults to growing 2x at a load of 0.5.
+        With power_of_two set, capacities are powers of two instead of primes
+        and hashes are passed through mix_hash() before indexing.
+        With incremental set, resize_table() only swaps in the new table and
+        every put/get/contains_key/remove moves rehash_step old buckets over.
+        With bloom_bits_per_key set, a BloomFilter of that many bits per key
+        the table can hold answers most lookups of missing keys without
+        probing, and is rebuilt whenever the table is or once removed keys
+        leave too many stale bits in it. It is only consulted after the home
+        bucket neither holds the key nor is empty, so only hits further
+        along a probe sequence pay for the check.
         """
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in that mode
+        self._power_of_two = power_of_two
+        if power_of_two:
+            self._capacity = self._next_power_of_two(capacity)
+        else:
+            self._capacity = self._next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(None)
 
-        self._hash_function = function
+        # Power of two tables index with the low bits alone, so mix every
+        # bit of the hash into them first, then mask instead of dividing
+        self._hash_function = MixedHash(function) if power_of_two else function
+        self._probing = probing if probing != None else QuadraticProbing()
         self._size = 0
 
+        self._policy = policy if policy != None else ResizePolicy(max_load=0.5)
+        if self._policy.max_load == None or self._policy.max_load > self._probing.load_limit:
+            raise ValueError(f"max_load must be at most {self._probing.load_limit} "
+                             f"with {type(self._probing).__name__}")
+        self._min_capacity = self._capacity
+
+        # Removed entries left behind as tombstones, tracked separately from
+        # the live size since they still lengthen probe sequences
+        self._tombstones = 0
+
+        # Old table kept while an incremental rehash is moving entries over
+        self._incremental = incremental
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._rehash_index = 0
+
+        # The MapStats that hash_map_stats.enable_stats() attached, if any,
+        # which lookups add the entries they examine to, and each operation
+        # then records its lookups in under its own name
+        self._stats = None
+
+        # The filter in use, and the one an incremental rehash fills as it
+        # moves entries over, which takes over once the migration is done
+        self._bloom_bits_per_key = bloom_bits_per_key
+        self._bloom = None
+        self._next_bloom = None
+        self._rebuild_bloom()
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -65,6 +255,13 @@ class HashMap:
 
         return True
 
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two that is at least the given capacity
+        """
+        return 1 << max(capacity - 1, 0).bit_length()
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -86,55 +283,168 @@ class HashMap:
         Adds or updates an element in the hashmap.
         """
 
-        # Check load
-        if self.table_load() >= 0.5:
-            new_capacity = self.get_capacity() * 2
-            self.resize_table(new_capacity)
+        self._put(key, value, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('put')
+
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Adds or updates an element whose hash has already been computed.
+        """
+
+        buckets, index = self._find_slot(key, hash)
+
+        if buckets != None:
+            buckets[index].value = value
+        else:
+            self._insert(index, HashEntry(key, value, hash))
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, first adding the
+        key with the default value if it is not in the hash map.
+        """
+
+        value = self._upsert(key, None, default)
+        if self._stats is not None:
+            self._stats.record('setdefault')
+        return value
+
+    def update_with(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Replaces the value associated with the given key by function(value),
+        adding the key with function(default) if it is not in the hash map.
+        Returns the new value.
+        """
+
+        value = self._upsert(key, function, default)
+        if self._stats is not None:
+            self._stats.record('update_with')
+        return value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the count associated with the given key, counting from
+        0 if the key is not in the hash map. Returns the new count.
+        """
+
+        count = self._upsert(key, lambda count: count + delta, 0)
+        if self._stats is not None:
+            self._stats.record('increment')
+        return count
+
+    def _upsert(self, key: str, function: callable, default: object) -> object:
+        """
+        Applies function to the value of the key, or to default for a new
+        key, hashing the key and probing for it only once. With function
+        None an existing value is kept and a new key gets default.
+        Returns the value the key ends up with.
+        """
 
-        # Find initial index
         hash = self._hash_function(key)
-        initial_index = hash % self.get_capacity()
+        buckets, index = self._find_slot(key, hash)
 
-        # Add if empty
-        if self._buckets[initial_index] == None:
-            self._buckets[initial_index] = HashEntry(key, value)
-            self._size += 1
+        if buckets != None:
+            if function != None:
+                buckets[index].value = function(buckets[index].value)
+            return buckets[index].value
 
-        # Add if tombstone
-        elif self._buckets[initial_index].is_tombstone == True:
-            self._buckets[initial_index] = HashEntry(key, value)
-            self._size += 1
+        value = default if function == None else function(default)
+        self._insert(index, HashEntry(key, value, hash))
+        return value
 
-        # Update if key matches
-        elif self._buckets[initial_index].key == key:
-            self._buckets[initial_index].value = value
+    def _find_slot(self, key: str, hash: int) -> tuple:
+        """
+        Makes room for a possible insert, then returns the (table, index) of
+        the live entry holding the key, or (None, index) of the bucket a new
+        entry for the key belongs in. That index is None in Robin Hood
+        tables, where _place() decides on the bucket.
+        """
 
-        # Else continue cycling through until key is found or None
-        else:
+        if self._old_buckets != None:
+            self.rehash_step(self._rehash_step)
 
-            placed = False
-            j = 1
+        # Check load, counting tombstones too since they lengthen probe
+        # sequences just like live entries do
+        if (self._size + self._tombstones) / self._capacity >= self._policy.max_load:
 
-            while placed == False:
+            # Purge tombstones at the same capacity if they make up most of
+            # the load, otherwise grow the table
+            if self.table_load() < self._policy.max_load / 2:
+                self.resize_table(self.get_capacity())
+            else:
+                new_capacity = self._policy.grown(self.get_capacity())
+                self.resize_table(new_capacity)
+
+        # The key may not have been migrated yet
+        if self._old_buckets != None:
+            old_index = self._find_index(key, hash, self._old_buckets, self._old_capacity)
+            if old_index != None:
+                return self._old_buckets, old_index
+
+        # Robin Hood tables hold no tombstones, so a plain lookup will do
+        if self._probing.robin_hood:
+            index = self._find_index(key, hash, self._buckets, self._capacity)
+            if index != None:
+                return self._buckets, index
+            return None, None
 
-                new_index = (initial_index + j**2) % self.get_capacity()
+        # Find initial index
+        new_index = hash & (self._capacity - 1) if self._power_of_two else hash % self._capacity
 
-                if self._buckets[new_index] == None:
-                    self._buckets[new_index] = HashEntry(key, value)
-                    self._size += 1
-                    placed = True
+        # Cycle through until key is found or None, remembering the first
+        # tombstone seen so it can be reused once we know the key is absent
+        first_tombstone = None
+        j = 0
 
-                elif self._buckets[new_index].is_tombstone == True:
-                    self._buckets[new_index] = HashEntry(key, value)
-                    self._size += 1
-                    placed = True
+        while True:
 
-                elif self._buckets[new_index].key == key:
-                    self._buckets[new_index].value = value
-                    placed = True
+            if self._buckets[new_index] == None:
+                break
 
-                else:
-                    j += 1
+            elif self._buckets[new_index].is_tombstone == True:
+                if first_tombstone == None:
+                    first_tombstone = new_index
+
+            # Key found (cached hashes are compared before keys)
+            elif self._buckets[new_index].hash == hash and self._buckets[new_index].key == key:
+                if self._stats is not None:
+                    self._stats.probed += j + 1
+                return self._buckets, new_index
+
+            j += 1
+            if j == 1:
+                step = self._probing.step(key, hash, self._capacity)
+            new_index = self._probing.next_index(new_index, j, step, self._capacity)
+
+        if self._stats is not None:
+            self._stats.probed += j
+
+        # Prefer the first tombstone over the empty bucket
+        if first_tombstone != None:
+            return None, first_tombstone
+
+        return None, new_index
+
+    def _insert(self, index: int, entry: HashEntry) -> None:
+        """
+        Adds an entry whose key is known to be absent at the index returned
+        by _find_slot().
+        """
+
+        if index == None:
+            self._place(entry)
+        else:
+            if self._buckets[index] != None:
+                self._tombstones -= 1
+            self._buckets[index] = entry
+
+        if self._bloom is not None:
+            self._bloom.add(entry.hash)
+            if self._next_bloom is not None:
+                self._next_bloom.add(entry.hash)
+
+        self._size += 1
 
     def table_load(self) -> float:
         """
@@ -149,153 +459,532 @@ class HashMap:
 
     def empty_buckets(self) -> int:
         """
-        Returns the number of empty buckets in the hash table.
+        Returns the number of empty buckets in the hash table. Tombstones
+        are not empty, since probe sequences still have to walk past them.
         """
 
-        empty = self.get_capacity() - self.get_size()
+        empty = self.get_capacity() - self.get_size() - self._tombstones
 
         return empty
 
+    def get_tombstone_count(self) -> int:
+        """
+        Returns the number of tombstones left in the hash table by remove().
+        """
+
+        return self._tombstones
+
+    def compact(self) -> None:
+        """
+        Purges all tombstones by re-inserting the live entries into a fresh
+        table of the same capacity.
+        """
+
+        self._rehash(self._capacity)
+
     def resize_table(self, new_capacity: int) -> None:
         """
         Changes the capacity of the internal hash table.
+        In incremental mode the entries are moved over by later operations.
         """
 
         # Create new capacity
         if new_capacity < self.get_size():
             return
         else:
-            if not self._is_prime(new_capacity):
+            if self._power_of_two:
+                revised_capacity = self._next_power_of_two(new_capacity)
+            elif not self._is_prime(new_capacity):
                 revised_capacity = self._next_prime(new_capacity)
             else:
                 revised_capacity = new_capacity
 
-        # Create a new map
-        new_map = HashMap(revised_capacity, self._hash_function)
+        # Keep growing, as put() would, until the entries fit under the load threshold
+        while self._size > 0 and (self._size - 1) / revised_capacity >= self._policy.max_load:
+            if self._power_of_two:
+                revised_capacity = self._next_power_of_two(self._policy.grown(revised_capacity))
+            else:
+                revised_capacity = self._next_prime(self._policy.grown(revised_capacity))
+
+        started = time.perf_counter()
 
-        # Copy current elements and re-hash into new array
-        for bucket in range(self._capacity):
+        if self._incremental:
+            self._start_rehash(revised_capacity)
+        else:
+            self._rehash(revised_capacity)
 
-            current_hashentry = self._buckets[bucket]
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - started)
 
-            if current_hashentry != None:
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every live entry into a new table of the given prime capacity.
+        Tombstones are dropped, and entries are placed straight from their
+        cached hash without load checks or key comparisons since every key
+        is already unique.
+        """
 
-                new_map.put(current_hashentry.key, current_hashentry.value)
+        # Start from a single table if an incremental rehash is underway
+        if self._old_buckets != None:
+            self.rehash_step(self._old_capacity)
 
-        self._buckets = new_map.get_buckets()
-        self._capacity = new_map.get_capacity()
+        old_buckets = self._buckets
+        old_capacity = self._capacity
 
+        # Pre-size the new array in one go
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
 
-    def get(self, key: str) -> object:
+        for bucket in range(old_capacity):
+
+            current_hashentry = old_buckets[bucket]
+
+            if current_hashentry != None and current_hashentry.is_tombstone == False:
+
+                self._place(current_hashentry)
+
+        self._rebuild_bloom()
+
+    def _rebuild_bloom(self) -> None:
         """
-        Returns the value associated with the given key.
+        Replaces the Bloom filter, if enabled, with one sized for the current
+        capacity that holds the live entries of both tables, which drops the
+        bits left behind by removed keys.
         """
 
-        # Find initial index
-        hash = self._hash_function(key)
-        initial_index = hash % self.get_capacity()
+        if self._bloom_bits_per_key == None:
+            return
 
-        # Return if None
-        if self._buckets[initial_index] == None:
-            return None
+        self._bloom = self._new_bloom()
+        self._next_bloom = None
+        for table in (self._buckets, self._old_buckets):
+            if table == None:
+                continue
+            for entry in table.get_list():
+                if entry != None and entry.is_tombstone == False:
+                    self._bloom.add(entry.hash)
 
-        # Return value if found
-        elif self._buckets[initial_index].key == key and self._buckets[initial_index].is_tombstone == False:
-            return self._buckets[initial_index].value
+    def _drop_stale_bloom(self) -> None:
+        """
+        Rebuilds the Bloom filter once the bits of removed keys make up too
+        much of it. Robin Hood removals leave no tombstones, so without this
+        a churning table would never rebuild it.
+        """
 
-        # Else continue searching
-        else:
+        if self._bloom is not None and self._bloom.is_stale(self._size):
+            self._rebuild_bloom()
+
+    def _new_bloom(self) -> BloomFilter:
+        """
+        Returns an empty Bloom filter sized for the keys the current capacity
+        holds at the policy's maximum load.
+        """
 
-            found = False
-            j = 1
+        return BloomFilter(int(self._capacity * self._policy.max_load) + 1, self._bloom_bits_per_key)
 
-            while found == False:
+    def get_bloom_filter(self) -> BloomFilter:
+        """
+        Returns the Bloom filter guarding lookups, or None if it is disabled.
+        """
 
-                new_index = (initial_index + j**2) % self.get_capacity()
+        return self._bloom
 
-                if self._buckets[new_index] == None:
-                    return None
+    def _place(self, entry: HashEntry) -> None:
+        """
+        Places an entry whose key is known to be absent into the first empty
+        or tombstoned bucket of its probe sequence.
+        """
 
-                elif self._buckets[new_index].key == key and self._buckets[new_index].is_tombstone == False:
-                    return self._buckets[new_index].value
+        if self._probing.robin_hood:
+            self._place_robin_hood(entry)
+            return
 
-                else:
-                    j += 1
+        new_index = entry.hash & (self._capacity - 1) if self._power_of_two else entry.hash % self._capacity
+        j = 0
 
-    def contains_key(self, key: str) -> bool:
+        while self._buckets[new_index] != None and self._buckets[new_index].is_tombstone == False:
+            j += 1
+            if j == 1:
+                step = self._probing.step(entry.key, entry.hash, self._capacity)
+            new_index = self._probing.next_index(new_index, j, step, self._capacity)
+
+        if self._buckets[new_index] != None:
+            self._tombstones -= 1
+
+        self._buckets[new_index] = entry
+
+    # ------------------- ROBIN HOOD ------------------------------------- #
+
+    def _distance(self, entry: HashEntry, index: int, capacity: int) -> int:
         """
-        Returns True if the given key is in the hash map, otherwise it returns False.
+        Returns how many buckets past its home bucket an entry sits.
         """
 
-        # Find initial index
-        hash = self._hash_function(key)
-        initial_index = hash % self.get_capacity()
+        home = entry.hash & (capacity - 1) if self._power_of_two else entry.hash % capacity
+        return (index - home) % capacity
 
-        # Return if None
-        if self._buckets[initial_index] == None:
-            return False
+    def _place_robin_hood(self, entry: HashEntry) -> None:
+        """
+        Walks the entry's linear sequence, swapping it with any entry that is
+        closer to its home bucket, until an empty bucket takes the one in hand.
+        """
+
+        index = entry.hash & (self._capacity - 1) if self._power_of_two else entry.hash % self._capacity
+        distance = 0
+
+        while self._buckets[index] != None:
+
+            resident_distance = self._distance(self._buckets[index], index, self._capacity)
 
-        # Return if found
-        elif self._buckets[initial_index].key == key and self._buckets[initial_index].is_tombstone == False:
+            if resident_distance < distance:
+                self._buckets[index], entry = entry, self._buckets[index]
+                distance = resident_distance
+
+            index = (index + 1) % self._capacity
+            distance += 1
+
+        self._buckets[index] = entry
+
+    def _remove_robin_hood(self, index: int) -> None:
+        """
+        Empties the bucket at index, then shifts the following entries back
+        one bucket each until an empty bucket or an entry at home is reached.
+        """
+
+        self._buckets[index] = None
+        next_index = (index + 1) % self._capacity
+
+        while self._buckets[next_index] != None and self._distance(self._buckets[next_index], next_index, self._capacity) > 0:
+            self._buckets[index] = self._buckets[next_index]
+            self._buckets[next_index] = None
+            index = next_index
+            next_index = (next_index + 1) % self._capacity
+
+    # ------------------- INCREMENTAL REHASHING -------------------------- #
+
+    def _start_rehash(self, new_capacity: int) -> None:
+        """
+        Swaps in an empty table of the given prime capacity and keeps the
+        current one aside until rehash_step() has moved all its entries over.
+        """
+
+        # Only one migration can be underway at a time
+        if self._old_buckets != None:
+            self.rehash_step(self._old_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._rehash_index = 0
+
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+        # Rebuilding the filter now would walk the whole table, so keep the
+        # current one and fill its replacement as the entries move
+        if self._bloom_bits_per_key != None:
+            self._next_bloom = self._new_bloom()
+
+    def is_rehashing(self) -> bool:
+        """
+        Returns True while an incremental rehash is moving entries over.
+        """
+
+        return self._old_buckets != None
+
+    def rehash_step(self, buckets: int) -> bool:
+        """
+        Moves the entries of up to the given number of old buckets into the
+        new table. Returns True once the old table is fully migrated.
+        """
+
+        if self._old_buckets == None:
+            return True
+
+        end = min(self._rehash_index + buckets, self._old_capacity)
+
+        for bucket in range(self._rehash_index, end):
+
+            current_hashentry = self._old_buckets[bucket]
+
+            if current_hashentry != None and current_hashentry.is_tombstone == False:
+
+                self._place(current_hashentry)
+                if self._next_bloom is not None:
+                    self._next_bloom.add(current_hashentry.hash)
+
+                # Leave a tombstone so old probe sequences running through
+                # this bucket still reach the entries behind it
+                self._old_buckets[bucket] = _MIGRATED
+
+        self._rehash_index = end
+
+        # Drop the old table once everything has been moved
+        if end == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            if self._next_bloom is not None:
+                self._bloom, self._next_bloom = self._next_bloom, None
             return True
 
-        # Else continue searching
+        return False
+
+    # ------------------------------------------------------------------ #
+
+    def _find_index(self, key: str, hash: int, buckets: list, capacity: int) -> int:
+        """
+        Returns the index of the live entry holding the key in the given
+        table (a DynamicArray or its underlying list), or None if the key is
+        not there.
+        """
+
+        if type(buckets) is DynamicArray:
+            buckets = buckets.get_list()
+
+        # The built-in strategies step by an amount that grows by a constant
+        # each probe, so walk them inline rather than calling next_index()
+        kind = type(self._probing)
+        if kind is QuadraticProbing:
+            step_increment = 1 if capacity & (capacity - 1) == 0 else 2
+        elif kind is LinearProbing:
+            step_increment = 0
         else:
+            step_increment = None
+
+        mask = capacity - 1 if self._power_of_two else 0
+        index = hash & mask if mask else hash % capacity
+
+        if self._stats is not None:
+            return self._find_index_counted(key, hash, buckets, capacity, index)
+
+        # Keys the Bloom filter has never seen are in neither table, but the
+        # home bucket settles hits and most misses more cheaply than it does
+        if self._bloom is not None:
+            entry = buckets[index]
+            if entry is None:
+                return None
+            if entry.hash == hash and entry.key == key and entry.is_tombstone is False:
+                return index
+            if not self._bloom.might_contain(hash):
+                return None
+
+        if step_increment != None and accelerator != None:
+            return accelerator.find_index(buckets, key, hash, index, capacity, step_increment)
+
+        # Most lookups end at the home bucket
+        entry = buckets[index]
+        if entry is None:
+            return None
+        if entry.hash == hash and entry.key == key and entry.is_tombstone is False:
+            return index
 
-            found = False
-            j = 1
+        if self._probing.robin_hood:
+            return self._find_index_robin_hood(key, hash, buckets, capacity, index)
+        if step_increment == None:
+            return self._find_index_probing(key, hash, buckets, capacity, index)
 
-            while found == False:
+        step = 1
 
-                new_index = (initial_index + j**2) % self.get_capacity()
+        # Every sequence has visited all the buckets it can reach after
+        # capacity steps, so stop there even if all of them are occupied
+        for _ in range(capacity - 1):
 
-                if self._buckets[new_index] == None:
-                    return False
+            index = (index + step) & mask if mask else (index + step) % capacity
+            step += step_increment
 
-                elif self._buckets[new_index].key == key and self._buckets[new_index].is_tombstone == False:
-                    return True
+            entry = buckets[index]
+            if entry is None:
+                return None
+            if entry.hash == hash and entry.key == key and entry.is_tombstone is False:
+                return index
 
-                else:
-                    j += 1
+        return None
 
-    def remove(self, key: str) -> None:
+    def _find_index_probing(self, key: str, hash: int, buckets: list, capacity: int, index: int) -> int:
         """
-        Removes the given key and its associated value from the hash map.
+        Continues a _find_index() lookup past the home bucket at index,
+        asking the probing strategy for every next bucket.
+        """
+
+        next_index = self._probing.next_index
+        step = self._probing.step(key, hash, capacity)
+
+        for j in range(1, capacity):
+
+            index = next_index(index, j, step, capacity)
+
+            entry = buckets[index]
+            if entry is None:
+                if self._stats is not None:
+                    self._stats.probed += j - 1
+                return None
+            if entry.hash == hash and entry.key == key and entry.is_tombstone is False:
+                if self._stats is not None:
+                    self._stats.probed += j
+                return index
+
+        if self._stats is not None:
+            self._stats.probed += capacity - 1
+        return None
+
+    def _find_index_robin_hood(self, key: str, hash: int, buckets: list, capacity: int, index: int) -> int:
+        """
+        Continues a _find_index() lookup past the home bucket at index in a
+        Robin Hood table, stopping at the first entry closer to its home
+        bucket than the key would be to its own. Only the old table of an
+        incremental rehash holds tombstones.
+        """
+
+        mask = capacity - 1 if self._power_of_two else 0
+
+        for j in range(1, capacity):
+
+            index = (index + 1) % capacity
+
+            entry = buckets[index]
+            if entry is None:
+                if self._stats is not None:
+                    self._stats.probed += j - 1
+                return None
+            if entry.is_tombstone is False:
+                if entry.hash == hash and entry.key == key:
+                    if self._stats is not None:
+                        self._stats.probed += j
+                    return index
+                home = entry.hash & mask if mask else entry.hash % capacity
+                if (index - home) % capacity < j:
+                    if self._stats is not None:
+                        self._stats.probed += j
+                    return None
+
+        if self._stats is not None:
+            self._stats.probed += capacity - 1
+        return None
+
+    def _find_index_counted(self, key: str, hash: int, buckets: list, capacity: int, index: int) -> int:
+        """
+        Does the work of _find_index() for a map whose stats are enabled,
+        in the same order but in Python rather than the accelerator, adding
+        the entries it examines (tombstones included) to the stats along
+        with what the Bloom filter decided.
+        """
+
+        stats = self._stats
+
+        entry = buckets[index]
+        if entry is None:
+            return None
+        stats.probed += 1
+        if entry.hash == hash and entry.key == key and entry.is_tombstone is False:
+            return index
+
+        guarded = self._bloom is not None
+        if guarded and not self._bloom.might_contain(hash):
+            stats.bloom_rejected += 1
+            return None
+
+        if self._probing.robin_hood:
+            index = self._find_index_robin_hood(key, hash, buckets, capacity, index)
+        else:
+            index = self._find_index_probing(key, hash, buckets, capacity, index)
+
+        if guarded and index is None:
+            stats.bloom_false_positives += 1
+        return index
+
+    def _locate(self, key: str, hash: int) -> tuple:
+        """
+        Returns the (table, index) holding the key, looking through both
+        tables during an incremental rehash, or (None, None) if absent.
+        """
+
+        if self._old_buckets is None:
+            index = self._find_index(key, hash, self._buckets.get_list(), self._capacity)
+            if index is None:
+                return None, None
+            return self._buckets, index
+
+        self.rehash_step(self._rehash_step)
+
+        index = self._find_index(key, hash, self._buckets, self._capacity)
+        if index != None:
+            return self._buckets, index
+
+        if self._old_buckets != None:
+            index = self._find_index(key, hash, self._old_buckets, self._old_capacity)
+            if index != None:
+                return self._old_buckets, index
+
+        return None, None
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
         """
 
-        # Find initial index
         hash = self._hash_function(key)
-        initial_index = hash % self.get_capacity()
 
-        # Return if not found
-        if self._buckets[initial_index] == None:
-            return
+        # Outside a rehash, probe the table's list directly
+        if self._old_buckets is None:
+            buckets = self._buckets.get_list()
+            index = self._find_index(key, hash, buckets, self._capacity)
+        else:
+            buckets, index = self._locate(key, hash)
 
-        # Remove if found
-        elif self._buckets[initial_index].key == key and self._buckets[initial_index].is_tombstone == False:
-            self._buckets[initial_index].is_tombstone = True
-            self._size -= 1
+        if self._stats is not None:
+            self._stats.record('get')
+
+        if index is None:
+            return None
+
+        return buckets[index].value
 
-        # Else continue searching
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise it returns False.
+        """
+
+        hash = self._hash_function(key)
+
+        if self._old_buckets is None:
+            index = self._find_index(key, hash, self._buckets.get_list(), self._capacity)
         else:
+            buckets, index = self._locate(key, hash)
 
-            found = False
-            j = 1
+        if self._stats is not None:
+            self._stats.record('contains_key')
 
-            while found == False:
+        return index is not None
 
-                new_index = (initial_index + j**2) % self.get_capacity()
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
 
-                if self._buckets[new_index] == None:
-                    return
+        buckets, index = self._locate(key, self._hash_function(key))
 
-                elif self._buckets[new_index].key == key and self._buckets[new_index].is_tombstone == False:
-                    self._buckets[new_index].is_tombstone = True
-                    self._size -= 1
-                    found = True
+        if self._stats is not None:
+            self._stats.record('remove')
 
-                else:
-                    j += 1
+        if buckets == None:
+            return
+
+        self._size -= 1
+
+        # Tombstones in the old table are discarded along with it
+        if buckets is self._buckets and self._probing.robin_hood:
+            self._remove_robin_hood(index)
+        else:
+            buckets[index].is_tombstone = True
+            if buckets is self._buckets:
+                self._tombstones += 1
+
+        # Shrink once removals leave the table sparse enough
+        if self._size / self._capacity < self._policy.min_load and self._capacity > self._min_capacity:
+            self.resize_table(max(self._min_capacity, self._policy.shrunk(self._capacity)))
+
+        self._drop_stale_bloom()
 
     def clear(self) -> None:
         """
@@ -307,7 +996,11 @@ class HashMap:
         for bucket in range(self._capacity):
             underlying_da[bucket] = None
 
+        self._old_buckets = None
+        self._old_capacity = 0
         self._size = 0
+        self._tombstones = 0
+        self._rebuild_bloom()
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -316,18 +1009,337 @@ class HashMap:
 
         output_array = DynamicArray()
 
-        for bucket in range(self._capacity):
+        tables = [(self._buckets, self._capacity)]
+        if self._old_buckets != None:
+            tables.append((self._old_buckets, self._old_capacity))
+
+        for buckets, capacity in tables:
+
+            for bucket in range(capacity):
 
-            element = self._buckets[bucket]
+                element = buckets[bucket]
 
-            if element != None:
+                if element != None:
 
-                if element.is_tombstone == False:
+                    if element.is_tombstone == False:
 
-                    output_array.append((element.key, element.value))
+                        output_array.append((element.key, element.value))
 
         return output_array
 
+    # ------------------- MAPPING PROTOCOL ------------------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, raising KeyError if
+        the key is not in the hash map.
+        """
+
+        hash = self._hash_function(key)
+
+        if self._old_buckets is None:
+            buckets = self._buckets.get_list()
+            index = self._find_index(key, hash, buckets, self._capacity)
+        else:
+            buckets, index = self._locate(key, hash)
+
+        if self._stats is not None:
+            self._stats.record('__getitem__')
+
+        if index is None:
+            raise KeyError(key)
+
+        return buckets[index].value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """
+        Adds or updates an element in the hashmap, see put().
+        """
+
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Removes the given key from the hash map, raising KeyError if it is
+        not in it.
+        """
+
+        size = self._size
+        self.remove(key)
+
+        if self._size == size:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, see contains_key().
+        """
+
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys in the hash map.
+        """
+
+        return self._size
+
+    def __iter__(self):
+        """
+        Returns an iterator over the keys of the hash map.
+        """
+
+        return iter(self.keys())
+
+    def keys(self) -> KeysView:
+        """
+        Returns a lazy view of the keys of the hash map.
+        """
+
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a lazy view of the values of the hash map.
+        """
+
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a lazy view of the (key, value) pairs of the hash map.
+        """
+
+        return ItemsView(self)
+
+    def _iter_entries(self):
+        """
+        Yields every live entry of the hash map in place, finishing any
+        incremental rehash first so there is a single table to walk. Like a
+        dict, raises RuntimeError if the map gains or loses keys, or is
+        resized, while an iteration is underway.
+        """
+
+        self.rehash_step(self._old_capacity)
+        buckets = self._buckets
+        size = self._size
+
+        for entry in buckets.get_list():
+
+            if entry != None and entry.is_tombstone == False:
+
+                yield entry
+
+                if self._size != size or self._buckets is not buckets:
+                    raise RuntimeError("HashMap changed size during iteration")
+
+    # ------------------- BATCH OPERATIONS ------------------------------- #
+
+    def put_many(self, pairs: object, vectorized: bool = False) -> None:
+        """
+        Adds or updates every key/value pair of the given iterable, as
+        calling put() on each in turn would. All keys are hashed before any
+        is inserted, with NumPy when vectorized is set (see
+        hash_vectorized.hash_many).
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+        if vectorized:
+            hashes = hash_many(self._hash_function, keys)
+        else:
+            hashes = list(map(self._hash_function, keys))
+
+        self._put_hashed(pairs, hashes)
+
+    def _put_hashed(self, pairs: list, hashes: list) -> None:
+        """
+        Adds or updates key/value pairs whose hashes have already been
+        computed. The table grows at most once, up front, to the capacity the
+        whole batch needs if every key is new, so no load checks are made
+        per key. Any incremental rehash is finished first so every key goes
+        straight to the current table.
+        """
+
+        self._grow_for(self._size + len(pairs))
+        self.rehash_step(self._old_capacity)
+
+        # Robin Hood insertion may displace entries, so leave it to _place()
+        if self._probing.robin_hood:
+            for (key, value), hash in zip(pairs, hashes):
+                index = self._find_index(key, hash, self._buckets.get_list(), self._capacity)
+                if index != None:
+                    self._buckets[index].value = value
+                else:
+                    self._place(HashEntry(key, value, hash))
+                    self._size += 1
+                    if self._bloom is not None:
+                        self._bloom.add(hash)
+            if self._stats is not None:
+                self._stats.discard()
+            return
+
+        buckets = self._buckets.get_list()
+        capacity = self._capacity
+        mask = capacity - 1 if self._power_of_two else 0
+        step_for = self._probing.step
+        next_index = self._probing.next_index
+
+        for (key, value), hash in zip(pairs, hashes):
+
+            # Same probe as _put(): stop at the key or at an empty bucket,
+            # remembering the first tombstone on the way
+            new_index = hash & mask if mask else hash % capacity
+            first_tombstone = None
+            j = 0
+
+            while True:
+
+                entry = buckets[new_index]
+
+                if entry == None:
+                    break
+
+                elif entry.is_tombstone == True:
+                    if first_tombstone == None:
+                        first_tombstone = new_index
+
+                elif entry.hash == hash and entry.key == key:
+                    entry.value = value
+                    break
+
+                j += 1
+                if j == 1:
+                    step = step_for(key, hash, capacity)
+                new_index = next_index(new_index, j, step, capacity)
+
+            # The loop only stops on a live entry once it has been updated
+            if entry != None:
+                continue
+
+            if first_tombstone != None:
+                new_index = first_tombstone
+                self._tombstones -= 1
+
+            buckets[new_index] = HashEntry(key, value, hash)
+            self._size += 1
+            if self._bloom is not None:
+                self._bloom.add(hash)
+
+    def get_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each given key, in
+        order, with None for keys that are not in the hash map.
+        """
+
+        keys = list(keys)
+        hashes = list(map(self._hash_function, keys))
+        return DynamicArray([entry.value if entry != None else None
+                             for entry in self._entries_for(keys, hashes)])
+
+    def contains_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding, in order, whether each given key is
+        in the hash map.
+        """
+
+        keys = list(keys)
+        hashes = list(map(self._hash_function, keys))
+        return DynamicArray([entry != None for entry in self._entries_for(keys, hashes)])
+
+    def _entries_for(self, keys: list, hashes: list) -> list:
+        """
+        Returns the live entry holding each of the given keys, or None for
+        keys that are not in the hash map.
+        """
+
+        self.rehash_step(self._old_capacity)
+
+        buckets = self._buckets.get_list()
+        capacity = self._capacity
+        find_index = self._find_index
+        entries = []
+
+        for key, hash in zip(keys, hashes):
+            index = find_index(key, hash, buckets, capacity)
+            entries.append(buckets[index] if index != None else None)
+
+        if self._stats is not None:
+            self._stats.discard()
+
+        return entries
+
+    def remove_many(self, keys: object) -> None:
+        """
+        Removes every given key from the hash map, ignoring keys that are
+        not in it. The table shrinks at most once, after the whole batch.
+        """
+
+        keys = list(keys)
+        hashes = list(map(self._hash_function, keys))
+
+        self.rehash_step(self._old_capacity)
+
+        buckets = self._buckets.get_list()
+        capacity = self._capacity
+        robin_hood = self._probing.robin_hood
+
+        for key, hash in zip(keys, hashes):
+
+            index = self._find_index(key, hash, buckets, capacity)
+            if index == None:
+                continue
+
+            self._size -= 1
+            if robin_hood:
+                self._remove_robin_hood(index)
+            else:
+                buckets[index].is_tombstone = True
+                self._tombstones += 1
+
+        if self._stats is not None:
+            self._stats.discard()
+
+        self._shrink_for(self._size)
+        self._drop_stale_bloom()
+
+    def _grow_for(self, size: int) -> None:
+        """
+        Resizes the table once, if needed, so that it can take entries up to
+        the given size without put() having to grow it or purge tombstones.
+        """
+
+        # put() checks the load, tombstones included, before each insert
+        if (size - 1 + self._tombstones) / self._capacity < self._policy.max_load:
+            return
+
+        new_capacity = self._capacity
+        while (size - 1) / new_capacity >= self._policy.max_load:
+            new_capacity = self._round_capacity(self._policy.grown(new_capacity))
+
+        self.resize_table(new_capacity)
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Returns the capacity resize_table() would actually use for the given one.
+        """
+
+        if self._power_of_two:
+            return self._next_power_of_two(capacity)
+        return self._next_prime(capacity)
+
+    def _shrink_for(self, size: int) -> None:
+        """
+        Shrinks the table in a single resize to the capacity remove() would
+        reach after shrinking one step at a time down to the given size.
+        """
+
+        new_capacity = self._capacity
+        while size / new_capacity < self._policy.min_load and new_capacity > self._min_capacity:
+            new_capacity = max(self._min_capacity, self._round_capacity(self._policy.shrunk(new_capacity)))
+
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
 
     def get_bucket(self, index):
         """Gets the bucket at an index."""
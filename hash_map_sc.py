@@ -1,29 +1,63 @@
 # Description: Implementation of a hash map using separate chaining and associated functions.
 
 
-from base_structures import (DynamicArray, LinkedList,
+import time
+
+from base_structures import (DynamicArray, ItemsView, KeysView, LinkedList,
+                             MixedHash, ResizePolicy, ValuesView,
                              hash_function_1, hash_function_2)
+from hash_vectorized import hash_many
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental: bool = False,
+                 rehash_step: int = 4,
+                 policy: ResizePolicy = None,
+                 power_of_two: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        separate chaining for collision resolution.
+        The resize policy defaults to never resizing automatically.
+        With power_of_two set, capacities are powers of two instead of primes
+        and hashes are passed through mix_hash() before indexing.
+        With incremental set, resize_table() only swaps in the new table and
+        every put/get/contains_key/remove moves rehash_step old chains over.
         """
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in that mode
+        self._power_of_two = power_of_two
+        if power_of_two:
+            self._capacity = self._next_power_of_two(capacity)
+        else:
+            self._capacity = self._next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        self._hash_function = function
+        # Power of two tables index with the low bits alone, so mix every
+        # bit of the hash into them first, then mask instead of dividing
+        self._hash_function = MixedHash(function) if power_of_two else function
         self._size = 0
 
+        self._policy = policy if policy != None else ResizePolicy()
+        self._min_capacity = self._capacity
+
+        # Old table kept while an incremental rehash is moving chains over
+        self._incremental = incremental
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._rehash_index = 0
+        self._filled_index = 0
+
+        # The MapStats that hash_map_stats.enable_stats() attached, if any,
+        # which the chains add the nodes each lookup examines to, and each
+        # operation then records its lookups in under its own name
+        self._stats = None
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -67,6 +101,13 @@ class HashMap:
 
         return True
 
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two that is at least the given capacity
+        """
+        return 1 << max(capacity - 1, 0).bit_length()
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -88,33 +129,96 @@ class HashMap:
         Updates the key/value pair in the hash map.
         """
 
-        # Locate target index
+        # Locate target bucket
         hash = self._hash_function(key)
-        index = hash % self._capacity
+        current_bucket = self._bucket_for(hash)
 
-        # Insert if target index is empty
-        if self._buckets[index].length() == 0:
-            self._buckets[index].insert(key, value)
+        # Insert if target bucket is empty
+        if current_bucket.length() == 0:
+            current_bucket.insert(key, value, hash)
             self._size += 1
 
         # If not empty
         else:
 
-            # Assume target key has not been seen and set pointer
-            seen = False
-            current_bucket = self._buckets[index]
+            # Update the key if seen, comparing cached hashes before the
+            # (costlier) keys
+            node = current_bucket.contains(key, hash, self._stats)
 
-            # Iterate through current bucket and update if seen
-            for node in current_bucket:
-                if node.key == key:
-                    node.value = value
-                    seen = True
-                    break
-
-            if seen == False:
-                current_bucket.insert(key, value)
+            if node != None:
+                node.value = value
+            else:
+                current_bucket.insert(key, value, hash)
                 self._size += 1
 
+        # Grow once a new key pushes the load past the policy's threshold
+        if self._policy.max_load != None and self._size / self._capacity > self._policy.max_load:
+            self.resize_table(self._policy.grown(self._capacity))
+
+        if self._stats is not None:
+            self._stats.record('put')
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, first adding the
+        key with the default value if it is not in the hash map.
+        """
+
+        value = self._upsert(key, None, default)
+        if self._stats is not None:
+            self._stats.record('setdefault')
+        return value
+
+    def update_with(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Replaces the value associated with the given key by function(value),
+        adding the key with function(default) if it is not in the hash map.
+        Returns the new value.
+        """
+
+        value = self._upsert(key, function, default)
+        if self._stats is not None:
+            self._stats.record('update_with')
+        return value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the count associated with the given key, counting from
+        0 if the key is not in the hash map. Returns the new count.
+        """
+
+        count = self._upsert(key, lambda count: count + delta, 0)
+        if self._stats is not None:
+            self._stats.record('increment')
+        return count
+
+    def _upsert(self, key: str, function: callable, default: object) -> object:
+        """
+        Applies function to the value of the key, or to default for a new
+        key, hashing the key and walking its chain only once. With function
+        None an existing value is kept and a new key gets default.
+        Returns the value the key ends up with.
+        """
+
+        hash = self._hash_function(key)
+        current_bucket = self._bucket_for(hash)
+
+        node = current_bucket.contains(key, hash, self._stats)
+        if node != None:
+            if function != None:
+                node.value = function(node.value)
+            return node.value
+
+        value = default if function == None else function(default)
+        current_bucket.insert(key, value, hash)
+        self._size += 1
+
+        # Grow once a new key pushes the load past the policy's threshold
+        if self._policy.max_load != None and self._size / self._capacity > self._policy.max_load:
+            self.resize_table(self._policy.grown(self._capacity))
+
+        return value
+
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the hash table.
@@ -123,7 +227,7 @@ class HashMap:
         empty_count = 0
 
         for bucket in range(self._capacity):
-            if self._buckets[bucket].length() == 0:
+            if self._buckets[bucket] == None or self._buckets[bucket].length() == 0:
                 empty_count += 1
 
         return empty_count
@@ -147,20 +251,45 @@ class HashMap:
         for bucket in range(self._capacity):
             self._buckets[bucket] = LinkedList()
 
+        self._old_buckets = None
+        self._old_capacity = 0
         self._size = 0
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Changes the capacity of the internal hash table.
+        In incremental mode the entries are moved over by later operations.
         """
 
         # Create new capacity
         if new_capacity < 1:
             return
         else:
-            if not self._is_prime(new_capacity):
+            if self._power_of_two:
+                new_capacity = self._next_power_of_two(new_capacity)
+            elif not self._is_prime(new_capacity):
                 new_capacity = self._next_prime(new_capacity)
 
+        started = time.perf_counter()
+
+        if self._incremental:
+            self._start_rehash(new_capacity)
+        else:
+            self._rehash(new_capacity)
+
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - started)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every entry into a new table of the given capacity at once,
+        placing them by their cached hashes.
+        """
+
+        # Start from a single table if an incremental rehash is underway
+        if self._old_buckets != None:
+            self.rehash_step(self._old_capacity)
+
         # Create a new array
         new_array = DynamicArray()
 
@@ -168,7 +297,7 @@ class HashMap:
         for bucket in range(new_capacity):
             new_array.append(LinkedList())
 
-        # Copy current elements and re-hash into new array
+        # Copy current elements into new array using their cached hashes
         for bucket in range(self._capacity):
 
             current_list = self._buckets[bucket]
@@ -177,47 +306,149 @@ class HashMap:
 
                 for node in current_list:
 
-                    new_hash = self._hash_function(node.key)
-                    new_index = new_hash % new_capacity
+                    new_index = node.hash & (new_capacity - 1) if self._power_of_two else node.hash % new_capacity
 
-                    new_array[new_index].insert(node.key, node.value)
+                    new_array[new_index].insert(node.key, node.value, node.hash)
 
         self._buckets = new_array
         self._capacity = new_capacity
 
+    # ------------------- INCREMENTAL REHASHING -------------------------- #
+
+    def _start_rehash(self, new_capacity: int) -> None:
+        """
+        Swaps in a new table of the given prime capacity and keeps the
+        current one aside until rehash_step() has moved all its chains over.
+        The new table's lists are also created a slice at a time, so starting
+        a rehash costs no more than a single array allocation.
+        """
+
+        # Only one migration can be underway at a time
+        if self._old_buckets != None:
+            self.rehash_step(self._old_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._rehash_index = 0
+
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._filled_index = 0
+
+    def is_rehashing(self) -> bool:
+        """
+        Returns True while an incremental rehash is moving entries over.
+        """
+
+        return self._old_buckets != None
+
+    def rehash_step(self, buckets: int) -> bool:
+        """
+        Moves the chains of up to the given number of old buckets into the
+        new table. Returns True once the old table is fully migrated.
+        """
+
+        if self._old_buckets == None:
+            return True
+
+        end = min(self._rehash_index + buckets, self._old_capacity)
+
+        for bucket in range(self._rehash_index, end):
+
+            for node in self._old_buckets[bucket]:
+
+                new_index = node.hash & (self._capacity - 1) if self._power_of_two else node.hash % self._capacity
+
+                if self._buckets[new_index] == None:
+                    self._buckets[new_index] = LinkedList()
+
+                self._buckets[new_index].insert(node.key, node.value, node.hash)
+
+            # Release the migrated chain
+            self._old_buckets[bucket] = None
+
+        self._rehash_index = end
+
+        # Create the new table's lists in step with the migration, so every
+        # bucket holds a list by the time the old table is dropped
+        filled_end = self._capacity * end // self._old_capacity
+        for bucket in range(self._filled_index, filled_end):
+            if self._buckets[bucket] == None:
+                self._buckets[bucket] = LinkedList()
+        self._filled_index = filled_end
+
+        # Drop the old table once everything has been moved
+        if end == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            return True
+
+        return False
+
+    def _bucket_for(self, hash: int) -> LinkedList:
+        """
+        Returns the chain that holds (or would hold) a key with the given
+        hash. During an incremental rehash that is its old chain until the
+        migration reaches it, and every call moves the migration forward.
+        """
+
+        if self._old_buckets != None:
+            self.rehash_step(self._rehash_step)
+
+        if self._old_buckets != None:
+
+            old_index = hash & (self._old_capacity - 1) if self._power_of_two else hash % self._old_capacity
+            if old_index >= self._rehash_index:
+                return self._old_buckets[old_index]
+
+        index = hash & (self._capacity - 1) if self._power_of_two else hash % self._capacity
+        if self._buckets[index] == None:
+            self._buckets[index] = LinkedList()
+
+        return self._buckets[index]
+
+    # ------------------------------------------------------------------ #
+
     def get(self, key: str) -> object:
         """
         Returns the value associated with the given key.
         """
 
         hash = self._hash_function(key)
-        index = hash % self._capacity
 
-        if self._buckets[index].length() == 0:
-            return None
+        # Outside a rehash, index the table's list directly and let the
+        # chain compare its nodes without an iterator object
+        if self._old_buckets is None:
+            index = hash & (self._capacity - 1) if self._power_of_two else hash % self._capacity
+            node = self._buckets.get_list()[index].contains(key, hash, self._stats)
         else:
-            current_bucket = self._buckets[index]
-            for node in current_bucket:
-                if node.key == key:
-                    return node.value
+            node = self._bucket_for(hash).contains(key, hash, self._stats)
+
+        if self._stats is not None:
+            self._stats.record('get')
+
+        if node is None:
             return None
 
+        return node.value
+
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hash map, otherwise returns False.
         """
 
         hash = self._hash_function(key)
-        index = hash % self._capacity
 
-        if self._buckets[index].length() == 0:
-            return False
+        if self._old_buckets is None:
+            index = hash & (self._capacity - 1) if self._power_of_two else hash % self._capacity
+            node = self._buckets.get_list()[index].contains(key, hash, self._stats)
         else:
-            current_bucket = self._buckets[index]
-            for node in current_bucket:
-                if node.key == key:
-                    return True
-            return False
+            node = self._bucket_for(hash).contains(key, hash, self._stats)
+
+        if self._stats is not None:
+            self._stats.record('contains_key')
+
+        return node is not None
 
     def remove(self, key: str) -> None:
         """
@@ -225,16 +456,22 @@ class HashMap:
         """
 
         hash = self._hash_function(key)
-        index = hash % self._capacity
 
-        if self._buckets[index].length() == 0:
-            return
+        if self._old_buckets is None:
+            index = hash & (self._capacity - 1) if self._power_of_two else hash % self._capacity
+            current_bucket = self._buckets.get_list()[index]
         else:
-            current_bucket = self._buckets[index]
-            check = current_bucket.remove(key)
-            if check == True:
-                self._size -= 1
-            return
+            current_bucket = self._bucket_for(hash)
+
+        if current_bucket.remove(key, hash, self._stats):
+            self._size -= 1
+
+            # Shrink once removals leave the table sparse enough
+            if self._size / self._capacity < self._policy.min_load and self._capacity > self._min_capacity:
+                self.resize_table(max(self._min_capacity, self._policy.shrunk(self._capacity)))
+
+        if self._stats is not None:
+            self._stats.record('remove')
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -243,68 +480,320 @@ class HashMap:
 
         new_array = DynamicArray()
 
-        for bucket in range(self._capacity):
+        tables = [(self._buckets, 0, self._capacity)]
+        if self._old_buckets != None:
+            tables.append((self._old_buckets, self._rehash_index, self._old_capacity))
 
-            current_list = self._buckets[bucket]
+        for buckets, start, end in tables:
 
-            if current_list.length() != 0:
+            for bucket in range(start, end):
 
-                for node in current_list:
+                current_list = buckets[bucket]
+
+                if current_list != None and current_list.length() != 0:
+
+                    for node in current_list:
 
-                    pair = (node.key, node.value)
+                        pair = (node.key, node.value)
 
-                    new_array.append(pair)
+                        new_array.append(pair)
 
         return new_array
 
+    # ------------------- MAPPING PROTOCOL ------------------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, raising KeyError if
+        the key is not in the hash map.
+        """
+
+        hash = self._hash_function(key)
+
+        if self._old_buckets is None:
+            index = hash & (self._capacity - 1) if self._power_of_two else hash % self._capacity
+            node = self._buckets.get_list()[index].contains(key, hash, self._stats)
+        else:
+            node = self._bucket_for(hash).contains(key, hash, self._stats)
+
+        if self._stats is not None:
+            self._stats.record('__getitem__')
+
+        if node is None:
+            raise KeyError(key)
+
+        return node.value
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, see put().
+        """
+
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Removes the given key from the hash map, raising KeyError if it is
+        not in it.
+        """
+
+        size = self._size
+        self.remove(key)
+
+        if self._size == size:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, see contains_key().
+        """
+
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys in the hash map.
+        """
+
+        return self._size
+
+    def __iter__(self):
+        """
+        Returns an iterator over the keys of the hash map.
+        """
+
+        return iter(self.keys())
+
+    def keys(self) -> KeysView:
+        """
+        Returns a lazy view of the keys of the hash map.
+        """
+
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a lazy view of the values of the hash map.
+        """
+
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a lazy view of the (key, value) pairs of the hash map.
+        """
+
+        return ItemsView(self)
+
+    def _iter_entries(self):
+        """
+        Yields every node of the hash map in place, finishing any incremental
+        rehash first so there is a single table to walk. Like a dict, raises
+        RuntimeError if the map gains or loses keys, or is resized, while an
+        iteration is underway.
+        """
+
+        self.rehash_step(self._old_capacity)
+        buckets = self._buckets
+        size = self._size
+
+        for current_list in buckets.get_list():
+
+            for node in current_list:
+
+                yield node
+
+                if self._size != size or self._buckets is not buckets:
+                    raise RuntimeError("HashMap changed size during iteration")
+
+    # ------------------- BATCH OPERATIONS ------------------------------- #
+
+    def put_many(self, pairs: object, vectorized: bool = False) -> None:
+        """
+        Updates every key/value pair of the given iterable, as calling put()
+        on each in turn would. All keys are hashed before any is inserted,
+        with NumPy when vectorized is set (see hash_vectorized.hash_many).
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+        if vectorized:
+            hashes = hash_many(self._hash_function, keys)
+        else:
+            hashes = list(map(self._hash_function, keys))
+
+        self._put_hashed(pairs, hashes)
+
+    def _put_hashed(self, pairs: list, hashes: list) -> None:
+        """
+        Updates key/value pairs whose hashes have already been computed.
+        The table grows at most once, up front, to the capacity the whole
+        batch needs if every key is new, and any incremental rehash is
+        finished first so every key goes straight to the current table.
+        """
+
+        self._grow_for(self._size + len(pairs))
+        self.rehash_step(self._old_capacity)
+
+        buckets = self._buckets.get_list()
+        capacity = self._capacity
+        mask = capacity - 1 if self._power_of_two else 0
+        added = 0
+
+        for (key, value), hash in zip(pairs, hashes):
+
+            current_bucket = buckets[hash & mask if mask else hash % capacity]
+
+            for node in current_bucket:
+                if node.hash == hash and node.key == key:
+                    node.value = value
+                    break
+            else:
+                current_bucket.insert(key, value, hash)
+                added += 1
+
+        self._size += added
+
+    def get_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each given key, in
+        order, with None for keys that are not in the hash map.
+        """
+
+        keys = list(keys)
+        hashes = list(map(self._hash_function, keys))
+        return DynamicArray([node.value if node != None else None
+                             for node in self._nodes_for(keys, hashes)])
+
+    def contains_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding, in order, whether each given key is
+        in the hash map.
+        """
+
+        keys = list(keys)
+        hashes = list(map(self._hash_function, keys))
+        return DynamicArray([node != None for node in self._nodes_for(keys, hashes)])
+
+    def _nodes_for(self, keys: object, hashes: list) -> list:
+        """
+        Returns the node holding each of the given keys, or None for keys
+        that are not in the hash map.
+        """
+
+        self.rehash_step(self._old_capacity)
+
+        buckets = self._buckets.get_list()
+        capacity = self._capacity
+        mask = capacity - 1 if self._power_of_two else 0
+        nodes = []
+
+        for key, hash in zip(keys, hashes):
+
+            for node in buckets[hash & mask if mask else hash % capacity]:
+                if node.hash == hash and node.key == key:
+                    nodes.append(node)
+                    break
+            else:
+                nodes.append(None)
+
+        return nodes
+
+    def remove_many(self, keys: object) -> None:
+        """
+        Removes every given key from the hash map, ignoring keys that are
+        not in it. The table shrinks at most once, after the whole batch.
+        """
+
+        keys = list(keys)
+        hashes = list(map(self._hash_function, keys))
+
+        self.rehash_step(self._old_capacity)
+
+        buckets = self._buckets.get_list()
+        capacity = self._capacity
+        mask = capacity - 1 if self._power_of_two else 0
+        removed = 0
+
+        for key, hash in zip(keys, hashes):
+            if buckets[hash & mask if mask else hash % capacity].remove(key, hash) == True:
+                removed += 1
+
+        self._size -= removed
+        self._shrink_for(self._size)
+
+    def _grow_for(self, size: int) -> None:
+        """
+        Grows the table in a single resize to the capacity put() would
+        reach after growing one step at a time to hold the given size.
+        """
+
+        if self._policy.max_load == None:
+            return
+
+        new_capacity = self._capacity
+        while size / new_capacity > self._policy.max_load:
+            new_capacity = self._round_capacity(self._policy.grown(new_capacity))
+
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Returns the capacity resize_table() would actually use for the given one.
+        """
+
+        if self._power_of_two:
+            return self._next_power_of_two(capacity)
+        return self._next_prime(capacity)
+
+    def _shrink_for(self, size: int) -> None:
+        """
+        Shrinks the table in a single resize to the capacity remove() would
+        reach after shrinking one step at a time down to the given size.
+        """
+
+        new_capacity = self._capacity
+        while size / new_capacity < self._policy.min_load and new_capacity > self._min_capacity:
+            new_capacity = max(self._min_capacity, self._round_capacity(self._policy.shrunk(new_capacity)))
+
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
     def get_bucket(self, index):
-        """Returns the bucket"""
+        """Returns the bucket (None if an incremental rehash has not created it yet)"""
         return self._buckets[index]
 
+    def get_buckets(self):
+        """Returns the underlying DA."""
+        return self._buckets
+
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
     Receives a dynamic array and returns a tuple containing a dynamic array with the mode, and its frequency.
     """
 
-    # Create new hashmap and counter to track highest frequency
-    map = HashMap()
+    # Create new hashmap, growing once chains average more than 8 nodes,
+    # and counter to track highest frequency
+    map = HashMap(policy=ResizePolicy(max_load=8))
     highest_count = 0
 
-    # Cycle through input array, checking if key is already in the array - if so, update count; if not, add with a count of 1
-    for element in range(da.length()):
-
-        count = map.get(da[element])
+    # Cycle through input array, counting each element with a single lookup
+    for element in da:
 
-        if count != None:
-            count += 1
-            map.put(da[element], count)
-            if count > highest_count:
-                highest_count = count
-
-        else:
-            map.put(da[element], 1)
-            if highest_count < 1:
-                highest_count = 1
-
-            # Check load if adding a new element
-            load = map.table_load()
-            if load > 8:
-                new_capacity = map.get_capacity()*2
-                map.resize_table(new_capacity)
+        count = map.increment(element)
+        if count > highest_count:
+            highest_count = count
 
     # Create new array to hold modes
     mode_array = DynamicArray()
 
     # Add strings to new array if their value equals the highest frequency
-    for element in range(map.get_capacity()):
-
-        current_bucket = map.get_bucket(element)
-
-        for node in current_bucket:
+    for key, count in map.items():
 
-            if node.value == highest_count:
-                mode_array.append(node.key)
+        if count == highest_count:
+            mode_array.append(key)
 
     return (mode_array, highest_count)
 
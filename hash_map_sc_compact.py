@@ -0,0 +1,460 @@
+# Description: Compact, array-backed implementation of a hash map using separate chaining.
+#
+# Instead of a LinkedList object per bucket and an SLNode per entry, chains are
+# threaded through flat parallel arrays:
+#
+#   _heads   one integer per bucket: index of the first entry in its chain, or -1
+#   _keys    key of every entry slot
+#   _values  value of every entry slot
+#   _hashes  cached 64-bit hash of every entry slot
+#   _next    index of the next entry in the same chain, or -1
+#
+# Removed entry slots are chained into a free list through _next and reused by
+# later inserts, so the arrays never hold more slots than the peak size.
+#
+# Supported from hash_map_sc.HashMap's API: the capacity, function and policy
+# constructor arguments, put, get, contains_key, remove, clear, resize_table,
+# empty_buckets, table_load, get_keys_and_values, get_bucket and the mapping
+# protocol with its keys/values/items views. Resizing only re-threads the
+# integer arrays, so there is no incremental option (nor is_rehashing or
+# rehash_step), and there are no power_of_two option, batch operations or
+# setdefault/update_with/increment.
+
+
+from array import array
+
+from base_structures import (DynamicArray, HashEntry, ItemsView, KeysView,
+                             LinkedList, ResizePolicy, ValuesView,
+                             hash_function_1, hash_function_2)
+
+
+# Hashes are stored in an unsigned 64-bit array, so they are masked on the way in
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 policy: ResizePolicy = None) -> None:
+        """
+        Initialize new compact HashMap that uses
+        separate chaining for collision resolution.
+        The resize policy defaults to never resizing automatically.
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._heads = array('q', [-1]) * self._capacity
+
+        self._keys = []
+        self._values = []
+        self._hashes = array('Q')
+        self._next = array('q')
+        self._free = -1
+
+        self._hash_function = function
+        self._size = 0
+
+        self._policy = policy if policy != None else ResizePolicy()
+        self._min_capacity = self._capacity
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as the
+        separate chaining HashMap
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self.get_bucket(i)) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number and the find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Returns the entry slot holding the key, or -1 if it is not in the map.
+        """
+
+        slot = self._heads[hash % self._capacity]
+
+        while slot != -1:
+            if self._hashes[slot] == hash and self._keys[slot] == key:
+                return slot
+            slot = self._next[slot]
+
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+
+        hash = self._hash_function(key) & _MASK_64
+
+        # Update if the key is already in its chain
+        slot = self._find(key, hash)
+        if slot != -1:
+            self._values[slot] = value
+            return
+
+        index = hash % self._capacity
+
+        # Reuse a removed slot if there is one, otherwise append a new slot
+        if self._free != -1:
+            slot = self._free
+            self._free = self._next[slot]
+            self._keys[slot] = key
+            self._values[slot] = value
+            self._hashes[slot] = hash
+            self._next[slot] = self._heads[index]
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            self._hashes.append(hash)
+            self._next.append(self._heads[index])
+
+        # Insert at front of the chain
+        self._heads[index] = slot
+        self._size += 1
+
+        # Grow once a new key pushes the load past the policy's threshold
+        if self._policy.max_load != None and self._size / self._capacity > self._policy.max_load:
+            self.resize_table(self._policy.grown(self._capacity))
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+
+        return self._heads.count(-1)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+
+        return self._size / self._capacity
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+
+        self._heads = array('q', [-1]) * self._capacity
+        self._keys = []
+        self._values = []
+        self._hashes = array('Q')
+        self._next = array('q')
+        self._free = -1
+        self._size = 0
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        Entries never move: only the chains are re-threaded through the
+        integer arrays, using the cached hashes.
+        """
+
+        # Create new capacity
+        if new_capacity < 1:
+            return
+        else:
+            if not self._is_prime(new_capacity):
+                new_capacity = self._next_prime(new_capacity)
+
+        old_heads = self._heads
+        heads = array('q', [-1]) * new_capacity
+        next = self._next
+        hashes = self._hashes
+
+        for head in old_heads:
+
+            slot = head
+            while slot != -1:
+                following = next[slot]
+                index = hashes[slot] % new_capacity
+                next[slot] = heads[index]
+                heads[index] = slot
+                slot = following
+
+        self._heads = heads
+        self._capacity = new_capacity
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+
+        slot = self._find(key, self._hash_function(key) & _MASK_64)
+
+        if slot == -1:
+            return None
+
+        return self._values[slot]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise returns False.
+        """
+
+        return self._find(key, self._hash_function(key) & _MASK_64) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+
+        hash = self._hash_function(key) & _MASK_64
+        index = hash % self._capacity
+
+        previous, slot = -1, self._heads[index]
+
+        while slot != -1:
+
+            if self._hashes[slot] == hash and self._keys[slot] == key:
+
+                # Unlink from the chain
+                if previous != -1:
+                    self._next[previous] = self._next[slot]
+                else:
+                    self._heads[index] = self._next[slot]
+
+                # Release the key and value, and push the slot on the free list
+                self._keys[slot] = None
+                self._values[slot] = None
+                self._next[slot] = self._free
+                self._free = slot
+
+                self._size -= 1
+
+                # Shrink once removals leave the table sparse enough
+                if self._size / self._capacity < self._policy.min_load and self._capacity > self._min_capacity:
+                    self.resize_table(max(self._min_capacity, self._policy.shrunk(self._capacity)))
+                return
+
+            previous, slot = slot, self._next[slot]
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key / value pair stored in the hash map.
+        """
+
+        new_array = DynamicArray()
+
+        for head in self._heads:
+
+            slot = head
+            while slot != -1:
+                new_array.append((self._keys[slot], self._values[slot]))
+                slot = self._next[slot]
+
+        return new_array
+
+    # ------------------- MAPPING PROTOCOL ------------------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, raising KeyError if
+        the key is not in the hash map.
+        """
+
+        slot = self._find(key, self._hash_function(key) & _MASK_64)
+
+        if slot == -1:
+            raise KeyError(key)
+
+        return self._values[slot]
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, see put().
+        """
+
+        self.put(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Removes the given key from the hash map, raising KeyError if it is
+        not in it.
+        """
+
+        size = self._size
+        self.remove(key)
+
+        if self._size == size:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, see contains_key().
+        """
+
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys in the hash map.
+        """
+
+        return self._size
+
+    def __iter__(self):
+        """
+        Returns an iterator over the keys of the hash map.
+        """
+
+        return iter(self.keys())
+
+    def keys(self) -> KeysView:
+        """
+        Returns a lazy view of the keys of the hash map.
+        """
+
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a lazy view of the values of the hash map.
+        """
+
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a lazy view of the (key, value) pairs of the hash map.
+        """
+
+        return ItemsView(self)
+
+    def _iter_entries(self):
+        """
+        Yields a HashEntry for every entry slot in use, chain by chain, as
+        the views expect. Like a dict, raises RuntimeError if the map gains
+        or loses keys, or is resized, while an iteration is underway.
+        """
+
+        heads = self._heads
+        size = self._size
+
+        for head in heads:
+
+            slot = head
+            while slot != -1:
+
+                yield HashEntry(self._keys[slot], self._values[slot], self._hashes[slot])
+
+                if self._size != size or self._heads is not heads:
+                    raise RuntimeError("HashMap changed size during iteration")
+                slot = self._next[slot]
+
+    def get_bucket(self, index):
+        """
+        Returns a LinkedList copy of the chain at the given index, in the
+        same order as the separate chaining HashMap would hold it.
+        """
+
+        chain = []
+        slot = self._heads[index]
+        while slot != -1:
+            chain.append(slot)
+            slot = self._next[slot]
+
+        bucket = LinkedList()
+        for slot in reversed(chain):
+            bucket.insert(self._keys[slot], self._values[slot], self._hashes[slot])
+
+        return bucket
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - resize example 2")
+    print("----------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+
+    for capacity in range(111, 1000, 117):
+        m.resize_table(capacity)
+
+        m.put('some key', 'some value')
+        result = m.contains_key('some key')
+        m.remove('some key')
+
+        for key in keys:
+            # all inserted keys must be present
+            result &= m.contains_key(str(key))
+            # NOT inserted keys must be absent
+            result &= not m.contains_key(str(key + 1))
+        print(capacity, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(1)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(2)
+    print(m.get_keys_and_values())
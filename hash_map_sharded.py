@@ -0,0 +1,379 @@
+# Description: Hash map split into independent shards, with bulk operations run across processes.
+#
+# Every key belongs to exactly one of shard_count separate chaining or open
+# addressing HashMaps, picked by shard_index(). The shards never share a key,
+# so a shard can be built in a worker process and swapped in whole:
+#
+#   put_many(pairs, workers)   partitions the pairs by shard in the parent,
+#                              sends each shard to a worker as a snapshot
+#                              (hash_map_snapshot.dumps_snapshot) with its
+#                              pairs, and replaces it with the snapshot of
+#                              the built shard that comes back
+#   find_mode(da, workers)     counts contiguous chunks of the array in the
+#                              workers and adds up their counts in the parent
+#
+# The parent still partitions the pairs, pickles them and loads every built
+# shard back from its snapshot, and find_mode() still merges one count per
+# distinct element and chunk, so that work bounds the speedup however many
+# cores there are. Everything else runs on the shards in the parent, serially.
+# Parallel builds need a hash function that gives the same hashes in every
+# process (not hash_function_builtin), string keys and values pickle can
+# write.
+
+
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import (DynamicArray, ItemsView, KeysView, ResizePolicy,
+                             ValuesView, hash_function_1)
+from hash_map_snapshot import dumps_snapshot, loads_snapshot
+
+
+def shard_index(key: str, shard_count: int) -> int:
+    """
+    Return the shard the key belongs to. CRC-32 runs in C and gives the same
+    result in every process, and is unrelated to the shards' own hash
+    function, so the keys of one shard still spread over all its buckets.
+    """
+    return zlib.crc32(key.encode('utf-8')) % shard_count
+
+
+def _partition(keys: list, shard_count: int) -> list:
+    """Return the positions of the given keys in each shard, in order."""
+    parts = [[] for _ in range(shard_count)]
+    for position, key in enumerate(keys):
+        parts[zlib.crc32(key.encode('utf-8')) % shard_count].append(position)
+    return parts
+
+
+def _build_shard(snapshot: bytes, pairs: list) -> bytes:
+    """
+    Worker process: load the shard from its snapshot, update the pairs in it
+    and return the snapshot of the result.
+    """
+    shard = loads_snapshot(snapshot)
+    shard.put_many(pairs, vectorized=True)
+    return dumps_snapshot(shard)
+
+
+def _count_part(elements: list) -> list:
+    """Worker process: return each distinct element with its frequency."""
+    counts = hash_map_sc.HashMap(policy=ResizePolicy(max_load=8))
+    for element in elements:
+        counts.increment(element)
+    return list(counts.items())
+
+
+class ShardedHashMap:
+    def __init__(self,
+                 shard_count: int = 4,
+                 map_type: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 **options) -> None:
+        """
+        Initialize new HashMap split into shard_count shards of the given
+        map type (hash_map_sc.HashMap or hash_map_oa.HashMap), sharing the
+        capacity between them. Any other keyword arguments are passed on to
+        every shard. Separate chaining shards grow at load 1.0 unless given
+        another policy, as their own default never grows.
+        """
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+
+        if map_type is hash_map_sc.HashMap and 'policy' not in options:
+            options['policy'] = ResizePolicy(max_load=1.0)
+
+        shard_capacity = max(1, -(-capacity // shard_count))
+        self._shards = [map_type(shard_capacity, function, **options) for _ in range(shard_count)]
+        self._shard_count = shard_count
+
+    def __str__(self) -> str:
+        """
+        Override string method to list every shard's buckets in turn
+        """
+        out = ''
+        for i, shard in enumerate(self._shards):
+            out += 'shard ' + str(i) + ':\n' + str(shard)
+        return out
+
+    def get_shard(self, index: int) -> object:
+        """
+        Return the HashMap of the given shard
+        """
+        return self._shards[index]
+
+    def get_shard_count(self) -> int:
+        """
+        Return number of shards
+        """
+        return self._shard_count
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(shard.get_size() for shard in self._shards)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total of every shard's capacity
+        """
+        return sum(shard.get_capacity() for shard in self._shards)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets across every shard.
+        """
+        return sum(shard.empty_buckets() for shard in self._shards)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def _shard_for(self, key: str) -> object:
+        """Returns the shard holding the key."""
+        return self._shards[zlib.crc32(key.encode('utf-8')) % self._shard_count]
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+        self._shard_for(key).put(key, value)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key, first adding the
+        key with the default value if it is not in the hash map.
+        """
+        return self._shard_for(key).setdefault(key, default)
+
+    def update_with(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Replaces the value associated with the given key by function(value),
+        adding the key with function(default) if it is not in the hash map.
+        Returns the new value.
+        """
+        return self._shard_for(key).update_with(key, function, default)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the count associated with the given key, counting from
+        0 if the key is not in the hash map. Returns the new count.
+        """
+        return self._shard_for(key).increment(key, delta)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+        return self._shard_for(key).get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map.
+        """
+        return self._shard_for(key).contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._shard_for(key).remove(key)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        for shard in self._shards:
+            shard.clear()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, sharing it between
+        the shards.
+        """
+        if new_capacity < 1:
+            return
+
+        shard_capacity = max(1, -(-new_capacity // self._shard_count))
+        for shard in self._shards:
+            shard.resize_table(shard_capacity)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair stored in the hash map.
+        """
+        return DynamicArray([(entry.key, entry.value) for entry in self._iter_entries()])
+
+    # ------------------- BATCH OPERATIONS ------------------------------- #
+
+    def put_many(self, pairs: object, workers: int = None) -> None:
+        """
+        Updates every key/value pair of the given iterable, as calling put()
+        on each in turn would. With workers above 1, every shard that gets
+        pairs is built in one of that many worker processes and replaced by
+        the shard that comes back, as a snapshot.
+        """
+        pairs = list(pairs)
+        parts = _partition([pair[0] for pair in pairs], self._shard_count)
+
+        if workers == None or workers <= 1:
+            for shard, positions in zip(self._shards, parts):
+                shard.put_many([pairs[position] for position in positions])
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {index: executor.submit(_build_shard, dumps_snapshot(self._shards[index]),
+                                              [pairs[position] for position in positions])
+                       for index, positions in enumerate(parts) if positions}
+
+            for index, future in futures.items():
+                self._shards[index] = loads_snapshot(future.result())
+
+    def get_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each given key, in
+        order, with None for keys that are not in the hash map.
+        """
+        keys = list(keys)
+        values = [None] * len(keys)
+
+        for shard, positions in zip(self._shards, _partition(keys, self._shard_count)):
+            found = shard.get_many([keys[position] for position in positions])
+            for position, value in zip(positions, found):
+                values[position] = value
+
+        return DynamicArray(values)
+
+    def contains_many(self, keys: object) -> DynamicArray:
+        """
+        Returns a dynamic array holding, in order, whether each given key is
+        in the hash map.
+        """
+        keys = list(keys)
+        present = [False] * len(keys)
+
+        for shard, positions in zip(self._shards, _partition(keys, self._shard_count)):
+            found = shard.contains_many([keys[position] for position in positions])
+            for position, is_present in zip(positions, found):
+                present[position] = is_present
+
+        return DynamicArray(present)
+
+    def remove_many(self, keys: object) -> None:
+        """
+        Removes every given key from the hash map, ignoring keys that are
+        not in it.
+        """
+        keys = list(keys)
+        for shard, positions in zip(self._shards, _partition(keys, self._shard_count)):
+            shard.remove_many([keys[position] for position in positions])
+
+    # ------------------- MAPPING PROTOCOL ------------------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, raising KeyError if
+        the key is not in the hash map.
+        """
+        return self._shard_for(key)[key]
+
+    def __setitem__(self, key: str, value: object) -> None:
+        """
+        Adds or updates the key, like put().
+        """
+        self._shard_for(key)[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Removes the key, raising KeyError if it is not in the hash map.
+        """
+        del self._shard_for(key)[key]
+
+    def __contains__(self, key: str) -> bool:
+        """Returns True if the given key is in the hash map, see contains_key()."""
+        return self.contains_key(key)
+
+    def __len__(self) -> int:
+        """Returns the number of keys in the hash map."""
+        return self.get_size()
+
+    def __iter__(self):
+        """Returns an iterator over the keys of the hash map."""
+        return iter(self.keys())
+
+    def keys(self) -> KeysView:
+        """Returns a view of the keys, shard by shard."""
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """Returns a view of the values, shard by shard."""
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """Returns a view of the (key, value) pairs, shard by shard."""
+        return ItemsView(self)
+
+    def _iter_entries(self):
+        """
+        Yields every entry of every shard in turn, in place.
+        """
+        for shard in self._shards:
+            yield from shard._iter_entries()
+
+
+def find_mode(da: DynamicArray, workers: int = None) -> (DynamicArray, int):
+    """
+    Receives a dynamic array and returns a tuple containing a dynamic array
+    with the mode, and its frequency, like hash_map_sc.find_mode(). With
+    workers above 1, the array is split into that many contiguous chunks,
+    each chunk is counted in a worker process, and the parent adds up the
+    counts of every element across the chunks.
+    """
+    if workers == None or workers <= 1:
+        return hash_map_sc.find_mode(da)
+
+    elements = da.get_list()
+    chunk_length = -(-len(elements) // workers)
+    chunks = [elements[start:start + chunk_length] for start in range(0, len(elements), chunk_length or 1)]
+
+    counts = hash_map_sc.HashMap(policy=ResizePolicy(max_load=8))
+    highest_count = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(_count_part, chunks):
+            for element, count in part:
+                count = counts.increment(element, count)
+                if count > highest_count:
+                    highest_count = count
+
+    mode_array = DynamicArray()
+    for key, count in counts.items():
+        if count == highest_count:
+            mode_array.append(key)
+
+    return (mode_array, highest_count)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nShardedHashMap - parallel put_many")
+    print("----------------------------------")
+    m = ShardedHashMap(4, hash_map_oa.HashMap, 53, hash_function_1)
+    m.put_many((('str' + str(i), i * 100) for i in range(1000)), workers=4)
+    print(m.get_size(), m.get_capacity(), m.get('str42'), m.contains_key('str1000'))
+
+    print("\nShardedHashMap - parallel find_mode")
+    print("-----------------------------------")
+    da = DynamicArray(['word' + str(i % 7) for i in range(100)] + ['word3'])
+    modes, frequency = find_mode(da, workers=4)
+    print(modes.get_list(), frequency, find_mode(da)[0].get_list())
@@ -0,0 +1,321 @@
+# Description: Binary snapshots of the separate chaining and open addressing hash maps.
+#
+# save_snapshot() writes a HashMap to a file in contiguous sections, and
+# load_snapshot() rebuilds it with every entry put straight back into the
+# bucket (and, for chains, the position) it was saved from, so loading
+# never calls the hash function, probes or resizes. dumps_snapshot() and
+# loads_snapshot() do the same with the snapshot held in memory as bytes.
+#
+# File layout:
+#
+#   header      magic, format version, metadata length (little-endian)
+#   metadata    JSON with the map type, capacity, size, hash function,
+#               probing strategy, Bloom filter bits per key, resize policy
+#               and section lengths (the filter itself is rebuilt on load)
+#   indexes     bucket index of every entry (array of I, or Q above 2^32)
+#   hashes      cached hash of every entry (array of Q)
+#   key lengths length of every key in characters (array of I)
+#   keys        every key back to back, UTF-8 encoded
+#   values      every value, pickled as a single list
+#   tombstones  bucket index of every tombstone (open addressing only)
+#
+# The arrays are written in the byte order of the machine that saved them,
+# which the metadata records so another machine can swap them on load.
+
+
+import gc
+import json
+import os
+import pickle
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import (DynamicArray, HashEntry, LinkedList, MixedHash,
+                             ResizePolicy, describe_hash_function,
+                             hash_function_fnv1a, load_hash_function)
+
+
+MAGIC = b'HMSNAPSH'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sII')
+
+_SECTIONS = ('indexes', 'hashes', 'key_lengths', 'keys', 'values', 'tombstones')
+
+_MAP_TYPES = {
+    'separate_chaining': hash_map_sc.HashMap,
+    'open_addressing': hash_map_oa.HashMap,
+}
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pause the cyclic garbage collector while millions of objects are
+    created at once; its passes over them would otherwise dominate.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _index_typecode(capacity: int) -> str:
+    """Return the smallest array typecode that holds every bucket index."""
+    return 'I' if capacity <= 0xFFFFFFFF else 'Q'
+
+
+def _snapshot_parts(hash_map: object) -> list:
+    """
+    Return the header, metadata and sections of the map's snapshot, in the
+    order they are written.
+    """
+    # Finish any incremental rehash so the whole layout is in one table
+    while not hash_map.rehash_step(hash_map.get_capacity()):
+        pass
+
+    capacity = hash_map.get_capacity()
+    index_typecode = _index_typecode(capacity)
+    indexes = []
+    entries = []
+    tombstones = []
+
+    with _gc_paused():
+        if isinstance(hash_map, hash_map_sc.HashMap):
+            map_type = 'separate_chaining'
+            for index, chain in enumerate(hash_map.get_buckets()):
+                if chain.length() == 0:
+                    continue
+
+                # LinkedList.insert() adds at the head, so save every chain
+                # tail first for loading to rebuild it in the same order
+                nodes = list(chain)
+                nodes.reverse()
+                entries.extend(nodes)
+                indexes.extend([index] * len(nodes))
+        else:
+            map_type = 'open_addressing'
+            for index, entry in enumerate(hash_map.get_buckets()):
+                if entry == None:
+                    continue
+                if entry.is_tombstone == True:
+                    tombstones.append(index)
+                    continue
+                indexes.append(index)
+                entries.append(entry)
+
+        hashes = [entry.hash for entry in entries]
+        keys = [entry.key for entry in entries]
+        values = [entry.value for entry in entries]
+
+    sections = {
+        'indexes': array(index_typecode, indexes).tobytes(),
+        'hashes': array('Q', hashes).tobytes(),
+        'key_lengths': array('I', map(len, keys)).tobytes(),
+        'keys': ''.join(keys).encode('utf-8'),
+        'values': pickle.dumps(values, pickle.HIGHEST_PROTOCOL),
+        'tombstones': array(index_typecode, tombstones).tobytes(),
+    }
+
+    # Power of two maps wrap their function in MixedHash themselves
+    function = hash_map._hash_function
+    if isinstance(function, MixedHash):
+        function = function.function
+    policy = hash_map._policy
+
+    metadata = {
+        'type': map_type,
+        'capacity': capacity,
+        'min_capacity': hash_map._min_capacity,
+        'size': hash_map.get_size(),
+        'function': describe_hash_function(function),
+        'power_of_two': hash_map._power_of_two,
+        'incremental': hash_map._incremental,
+        'rehash_step': hash_map._rehash_step,
+        'policy': [policy.max_load, policy.min_load, policy.growth_factor],
+        'index_typecode': index_typecode,
+        'byteorder': sys.byteorder,
+        'sections': [len(sections[name]) for name in _SECTIONS],
+    }
+    if map_type == 'open_addressing':
+        metadata['probing'] = hash_map_oa.describe_probing(hash_map._probing)
+        metadata['bloom_bits_per_key'] = hash_map._bloom_bits_per_key
+    metadata = json.dumps(metadata).encode('utf-8')
+
+    return [_HEADER.pack(MAGIC, VERSION, len(metadata)), metadata] + [sections[name] for name in _SECTIONS]
+
+
+def save_snapshot(hash_map: object, path: str) -> None:
+    """
+    Write a separate chaining or open addressing HashMap to a snapshot file.
+    Keys must be strings, values anything pickle can write, and the map's
+    hash function one that gives the same hashes in every process (so not
+    hash_function_builtin), since the saved hashes are used as they are.
+    The file is written next to the given path and renamed over it once
+    complete, so a crash never leaves a partial snapshot behind.
+    """
+    parts = _snapshot_parts(hash_map)
+
+    temporary_path = path + '.tmp'
+
+    # Remove the partial file if writing or renaming it fails
+    try:
+        with open(temporary_path, 'wb') as file:
+            for part in parts:
+                file.write(part)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+
+def dumps_snapshot(hash_map: object) -> bytes:
+    """
+    Return the snapshot save_snapshot() would write for the map, as bytes.
+    """
+    return b''.join(_snapshot_parts(hash_map))
+
+
+def _read_array(data: bytes, typecode: str, byteorder: str) -> array:
+    """Return the array in the given bytes, swapped to this machine's byte order."""
+    values = array(typecode)
+    values.frombytes(data)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+
+def load_snapshot(path: str) -> object:
+    """
+    Return the HashMap saved to the given snapshot file, with the same
+    capacity, bucket layout, hash function and settings it was saved with.
+    Values are unpickled, so only load snapshots you trust.
+    """
+    with open(path, 'rb') as file:
+        magic, version, metadata_length = _HEADER.unpack(file.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} hash map snapshot")
+
+        metadata = json.loads(file.read(metadata_length))
+        sections = {name: file.read(length) for name, length in zip(_SECTIONS, metadata['sections'])}
+
+    return _load_sections(metadata, sections)
+
+
+def loads_snapshot(data: bytes) -> object:
+    """
+    Return the HashMap in a snapshot returned by dumps_snapshot(), like
+    load_snapshot(). Values are unpickled, so only load snapshots you trust.
+    """
+    magic, version, metadata_length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} hash map snapshot")
+
+    start = _HEADER.size + metadata_length
+    metadata = json.loads(data[_HEADER.size:start])
+    sections = {}
+    for name, length in zip(_SECTIONS, metadata['sections']):
+        sections[name] = data[start:start + length]
+        start += length
+
+    return _load_sections(metadata, sections)
+
+
+def _load_sections(metadata: dict, sections: dict) -> object:
+    """Return the HashMap described by a snapshot's metadata and sections."""
+    with _gc_paused():
+        byteorder = metadata['byteorder']
+        indexes = _read_array(sections['indexes'], metadata['index_typecode'], byteorder)
+        hashes = _read_array(sections['hashes'], 'Q', byteorder)
+        key_lengths = _read_array(sections['key_lengths'], 'I', byteorder)
+        values = pickle.loads(sections['values'])
+
+        # Decode all the keys at once, then cut them apart by their lengths
+        text = sections['keys'].decode('utf-8')
+        ends = accumulate(key_lengths)
+        starts = accumulate(key_lengths, initial=0)
+        keys = [text[start:end] for start, end in zip(starts, ends)]
+
+        # The map is created at its original capacity so it keeps the same
+        # floor to shrink to, then handed the saved table
+        max_load, min_load, growth_factor = metadata['policy']
+        options = {
+            'incremental': metadata['incremental'],
+            'rehash_step': metadata['rehash_step'],
+            'policy': ResizePolicy(max_load, min_load, growth_factor),
+            'power_of_two': metadata['power_of_two'],
+        }
+        if metadata['type'] == 'open_addressing':
+            options['probing'] = hash_map_oa.load_probing(metadata['probing'])
+            # Snapshots written before the Bloom filter existed have no entry
+            options['bloom_bits_per_key'] = metadata.get('bloom_bits_per_key')
+
+        hash_map = _MAP_TYPES[metadata['type']](metadata['min_capacity'],
+                                               load_hash_function(metadata['function']),
+                                               **options)
+
+        capacity = metadata['capacity']
+        if metadata['type'] == 'separate_chaining':
+            buckets = [LinkedList() for _ in range(capacity)]
+            for index, key, value, hash in zip(indexes, keys, values, hashes):
+                buckets[index].insert(key, value, hash)
+        else:
+            buckets = [None] * capacity
+            for index, key, value, hash in zip(indexes, keys, values, hashes):
+                buckets[index] = HashEntry(key, value, hash)
+
+            tombstones = _read_array(sections['tombstones'], metadata['index_typecode'], byteorder)
+            for index in tombstones:
+                tombstone = HashEntry(None, None)
+                tombstone.is_tombstone = True
+                buckets[index] = tombstone
+            hash_map._tombstones = len(tombstones)
+
+    hash_map._buckets = DynamicArray(buckets)
+    hash_map._capacity = capacity
+    hash_map._size = metadata['size']
+    if metadata['type'] == 'open_addressing':
+        hash_map._rebuild_bloom()
+    return hash_map
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), 'map.snapshot')
+
+    print("\nSnapshot - separate chaining")
+    print("----------------------------")
+    m = hash_map_sc.HashMap(53, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0))
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    save_snapshot(m, path)
+    loaded = load_snapshot(path)
+    print(loaded.get_size(), loaded.get_capacity(), loaded.get('str42'), list(loaded.items()) == list(m.items()))
+
+    print("\nSnapshot - open addressing")
+    print("--------------------------")
+    m = hash_map_oa.HashMap(53, hash_function_fnv1a)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    m.remove('str7')
+    save_snapshot(m, path)
+    loaded = load_snapshot(path)
+    print(loaded.get_size(), loaded.get_capacity(), loaded.get('str42'), list(loaded.items()) == list(m.items()))
+
+    os.remove(path)
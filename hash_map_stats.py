@@ -0,0 +1,239 @@
+# Description: Opt-in instrumentation for the separate chaining and open addressing hash maps.
+#
+# enable_stats(m) attaches a MapStats to a map as m._stats, and
+# disable_stats(m) detaches it again. Nothing on the map is wrapped or
+# replaced, so its hash function, snapshots, memory-mapped copies and
+# batch hashing work the same with stats enabled. A map without stats pays
+# for a `self._stats is not None` check per lookup and per operation.
+#
+# While enabled, the map's own lookups count what they examine as they go:
+# chain nodes for separate chaining, occupied buckets (tombstones included)
+# for open addressing, so a miss on an empty bucket counts 0 in both. They
+# walk in Python rather than in the C accelerator to do so. Each operation
+# then records what its lookups examined, across both tables during an
+# incremental rehash and after any resize it makes first, under its name:
+#
+#   get, contains_key, put, remove, setdefault, update_with, increment
+#                   the methods of the same name; `in`, m[key] = value and
+#                   del m[key] count as the contains_key, put and remove
+#                   they call
+#   __getitem__     m[key]
+#
+# resize_table() counts and times itself. Batch operations are not recorded.
+#
+# MapStats.as_dict() returns plain ints, floats and dicts for a metrics
+# exporter, including figures that are only computed when asked for:
+#
+#   hash_seconds_per_call
+#                   the map's hash function timed over up to 1000 of its keys;
+#                   hash_calls is the number of operations recorded, as
+#                   each hashes its key once
+#   chain_lengths   separate chaining: number of buckets with each chain length
+#   entry_probes    open addressing: number of live entries found after each
+#                   number of probes, what a hit on that entry costs
+#   bloom           open addressing with a Bloom filter: its size and fill,
+#                   the lookups past the home bucket it turned away, and the
+#                   misses it let through, whose share of both is the
+#                   observed false positive rate
+
+
+import time
+
+import hash_map_sc
+
+
+_OPERATIONS = ('get', 'contains_key', 'put', 'remove', 'setdefault', 'update_with', 'increment',
+               '__getitem__')
+
+# Number of the map's keys as_dict() times its hash function over
+_HASH_SAMPLE = 1000
+
+
+def _histogram_add(histogram: dict, value: int) -> None:
+    """Count one more occurrence of value in the histogram."""
+    histogram[value] = histogram.get(value, 0) + 1
+
+
+class MapStats:
+    """
+    Counters recorded for one map between enable_stats() and disable_stats().
+    """
+
+    def __init__(self, hash_map: object) -> None:
+        """Initialize empty counters for the given map."""
+        self._map = hash_map
+        self._chained = isinstance(hash_map, hash_map_sc.HashMap)
+        self.probes = {operation: {} for operation in _OPERATIONS}
+        self.resizes = 0
+        self.resize_seconds = 0.0
+        self.bloom_rejected = 0
+        self.bloom_false_positives = 0
+
+        # What the lookups of the current operation have examined so far
+        self.probed = 0
+
+    def reset(self) -> None:
+        """Zero every counter."""
+        self.probes = {operation: {} for operation in self.probes}
+        self.resizes = 0
+        self.resize_seconds = 0.0
+        self.bloom_rejected = 0
+        self.bloom_false_positives = 0
+        self.probed = 0
+
+    def record(self, operation: str) -> None:
+        """
+        Record what the map's lookups examined since the last operation
+        under the given one. The maps call this at the end of each operation.
+        """
+        _histogram_add(self.probes[operation], self.probed)
+        self.probed = 0
+
+    def discard(self) -> None:
+        """Forget what the lookups of an operation that is not recorded examined."""
+        self.probed = 0
+
+    def record_resize(self, seconds: float) -> None:
+        """Count a resize_table() call that took the given time."""
+        self.resizes += 1
+        self.resize_seconds += seconds
+
+    def _hash_seconds_per_call(self) -> float:
+        """Return the mean time the map's hash function takes on its own keys."""
+        keys = [key for key, value in self._map.get_keys_and_values().get_list()[:_HASH_SAMPLE]]
+        if not keys:
+            return 0.0
+
+        function = self._map._hash_function
+        start = time.perf_counter()
+        for key in keys:
+            function(key)
+        return (time.perf_counter() - start) / len(keys)
+
+    def _distributions(self) -> dict:
+        """Return the chain length or entry probe count histogram of the table."""
+        histogram = {}
+        m = self._map
+        if self._chained:
+            for chain in m._buckets.get_list():
+                _histogram_add(histogram, 0 if chain == None else chain.length())
+            return {'chain_lengths': histogram}
+
+        # Look every entry up through the map itself, counting into this
+        # MapStats even once disable_stats() has detached it
+        buckets = m._buckets.get_list()
+        attached, m._stats = m._stats, self
+        probed = self.probed
+        try:
+            for entry in buckets:
+                if entry != None and entry.is_tombstone == False:
+                    self.probed = 0
+                    m._find_index(entry.key, entry.hash, buckets, m._capacity)
+                    _histogram_add(histogram, self.probed)
+        finally:
+            m._stats = attached
+            self.probed = probed
+        return {'entry_probes': histogram}
+
+    def as_dict(self) -> dict:
+        """
+        Return every counter and the map's current shape as a dict of plain
+        values. Walks the whole table for the distributions.
+        """
+        m = self._map
+        stats = {
+            'type': 'separate_chaining' if self._chained else 'open_addressing',
+            'size': m.get_size(),
+            'capacity': m.get_capacity(),
+            'load': m.table_load(),
+            'empty_buckets': m.empty_buckets(),
+            'tombstones': 0 if self._chained else m.get_tombstone_count(),
+            'probes': {operation: dict(sorted(histogram.items()))
+                       for operation, histogram in self.probes.items()},
+            'resizes': self.resizes,
+            'resize_seconds': self.resize_seconds,
+            'hash_calls': sum(sum(histogram.values()) for histogram in self.probes.values()),
+            'hash_seconds_per_call': self._hash_seconds_per_call(),
+        }
+        for name, histogram in self._distributions().items():
+            stats[name] = dict(sorted(histogram.items()))
+
+        bloom = None if self._chained else m.get_bloom_filter()
+        if bloom != None:
+            misses = self.bloom_rejected + self.bloom_false_positives
+            stats['bloom'] = dict(bloom.describe(),
+                                  rejected=self.bloom_rejected,
+                                  false_positives=self.bloom_false_positives,
+                                  observed_false_positive_rate=(self.bloom_false_positives / misses
+                                                                if misses else 0.0))
+        return stats
+
+
+def enable_stats(hash_map: object) -> MapStats:
+    """
+    Start recording stats for a separate chaining or open addressing
+    HashMap, and return the MapStats they are recorded in. Calling it again
+    returns the MapStats already attached.
+    """
+    stats = hash_map._stats
+    if stats != None:
+        return stats
+
+    stats = MapStats(hash_map)
+    hash_map._stats = stats
+    return stats
+
+
+def disable_stats(hash_map: object) -> MapStats:
+    """
+    Stop recording stats for the map, returning the MapStats recorded so
+    far (None if stats were not enabled).
+    """
+    stats = hash_map._stats
+    hash_map._stats = None
+    return stats
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import json
+
+    import hash_map_oa
+    from base_structures import (ResizePolicy, hash_function_1,
+                                 hash_function_fnv1a)
+
+    print("\nStats - separate chaining")
+    print("-------------------------")
+    m = hash_map_sc.HashMap(53, hash_function_1, policy=ResizePolicy(max_load=1.0))
+    stats = enable_stats(m)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    for i in range(200):
+        m.get('str' + str(i))
+    print(json.dumps(stats.as_dict()))
+
+    print("\nStats - open addressing")
+    print("-----------------------")
+    m = hash_map_oa.HashMap(53, hash_function_1)
+    stats = enable_stats(m)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    for i in range(0, 150, 3):
+        m.remove('str' + str(i))
+    print(json.dumps(stats.as_dict()))
+    disable_stats(m)
+    print(m._stats, m.get('str1'))
+
+    print("\nStats - open addressing with a Bloom filter")
+    print("-------------------------------------------")
+    # hash_function_1 gives anagrams the same hash, which no filter of
+    # hashes can tell apart, so use a hash that spreads them
+    m = hash_map_oa.HashMap(53, hash_function_fnv1a, bloom_bits_per_key=10)
+    stats = enable_stats(m)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    for i in range(150, 450):
+        m.get('str' + str(i))
+    print(json.dumps(stats.as_dict()['bloom']))
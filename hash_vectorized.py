@@ -0,0 +1,186 @@
+# Description: Vectorized hashing of key batches with NumPy, for bulk loads.
+#
+# hash_many(function, keys) returns exactly what [function(key) for key in keys]
+# would, but computes hash_function_1, hash_function_2 and hash_function_fnv1a
+# (and MixedHash wrappers around them) for a whole batch of keys at once:
+#
+#   hash_function_1 / 2   keys are laid out as a zero padded matrix of code
+#                         points, one row per key, and summed along the rows
+#   hash_function_fnv1a   keys are laid out as a zero padded matrix of UTF-8
+#                         bytes, and every key is folded one column at a time
+#
+# Padding contributes nothing to the sums, and FNV-1a only folds the columns
+# within each key's own length, so the results match the scalar functions bit
+# for bit. Any other function, or a missing NumPy, falls back to calling the
+# function on each key.
+#
+# With the C accelerator built, base_structures exports its hash functions
+# instead, and those hash a key faster than NumPy can lay a batch out, so
+# hash_many() calls them directly (and mixes the whole batch of hashes at
+# once for MixedHash) rather than vectorizing them.
+#
+# Every row of a chunk is padded to the chunk's longest key, so chunks are
+# cut to at most CHUNK_CELLS cells, and keys longer than SCALAR_WIDTH are
+# hashed one at a time rather than widening every row of their chunk.
+
+
+from base_structures import (_GOLDEN_64, FNV_64_OFFSET_BASIS, FNV_64_PRIME,
+                             MixedHash, accelerator, hash_function_1,
+                             hash_function_2, hash_function_fnv1a, mix_hash)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Keys are hashed at most this many at a time
+CHUNK_SIZE = 1 << 16
+
+# Most cells (rows x longest key) a chunk's padded matrix may hold, 16 MiB
+# of code points
+CHUNK_CELLS = 1 << 22
+
+# Keys longer than this go through the scalar function. Well under the
+# longest key whose hash_function_2 sum is sure to fit in 64 bits:
+# 0x10FFFF * w * (w + 1) / 2 < 2 ** 64 for w up to 4 * 10 ** 6
+SCALAR_WIDTH = 1024
+
+
+def _code_points(keys: list) -> "np.ndarray":
+    """
+    Return a (keys x longest key) matrix of the keys' code points, padded
+    with zeros on the right.
+    """
+    width = max(1, max(map(len, keys)))
+    return np.array(keys, dtype=f'U{width}').view(np.uint32).reshape(len(keys), width)
+
+
+def _hash_function_1_many(keys: list) -> "np.ndarray":
+    """Vectorized hash_function_1: the sum of each key's code points."""
+    return _code_points(keys).sum(axis=1, dtype=np.uint64)
+
+
+def _hash_function_2_many(keys: list) -> "np.ndarray":
+    """
+    Vectorized hash_function_2: the sum of each key's code points weighted
+    by their 1-based position.
+    """
+    codes = _code_points(keys)
+    width = codes.shape[1]
+    weights = np.arange(1, width + 1, dtype=np.uint64)
+    return (codes * weights).sum(axis=1, dtype=np.uint64)
+
+
+def _hash_function_fnv1a_many(keys: list) -> "np.ndarray":
+    """
+    Vectorized hash_function_fnv1a: every key's hash is folded with the byte
+    in the same column at once, leaving keys that have ended untouched.
+    uint64 arithmetic wraps around, which is the masking the scalar code does.
+    """
+    encoded = [key.encode('utf-8') for key in keys]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    width = max(1, int(lengths.max()))
+    data = np.array(encoded, dtype=f'S{width}').view(np.uint8).reshape(len(encoded), width)
+
+    hashes = np.full(len(encoded), FNV_64_OFFSET_BASIS, dtype=np.uint64)
+    prime = np.uint64(FNV_64_PRIME)
+    for column in range(width):
+        folded = (hashes ^ data[:, column]) * prime
+        hashes = np.where(lengths > column, folded, hashes)
+    return hashes
+
+
+def _mix_hash_many(hashes: "np.ndarray") -> "np.ndarray":
+    """Vectorized mix_hash(), for maps in power of two mode."""
+    hashes = hashes * np.uint64(_GOLDEN_64)
+    return hashes ^ (hashes >> np.uint64(32))
+
+
+if accelerator != None:
+    _VECTORIZED = {}
+    _ACCELERATED = frozenset((hash_function_1, hash_function_2, hash_function_fnv1a))
+else:
+    _VECTORIZED = {
+        hash_function_1: _hash_function_1_many,
+        hash_function_2: _hash_function_2_many,
+        hash_function_fnv1a: _hash_function_fnv1a_many,
+    }
+    _ACCELERATED = frozenset()
+
+
+def is_vectorized(function: callable) -> bool:
+    """Return True if hash_many() computes the given function with NumPy."""
+    if isinstance(function, MixedHash):
+        function = function.function
+    return np != None and function in _VECTORIZED
+
+
+def is_accelerated(function: callable) -> bool:
+    """Return True if hash_many() calls the C accelerator's function directly."""
+    if isinstance(function, MixedHash):
+        function = function.function
+    return function in _ACCELERATED
+
+
+def hash_many(function: callable, keys: object) -> list:
+    """
+    Return the list of function(key) for every key, computed with NumPy a
+    chunk of keys at a time when the function is one it can vectorize.
+    """
+    keys = keys if isinstance(keys, list) else list(keys)
+
+    # Skip the per-key call through MixedHash.__call__ for C functions
+    mixed = isinstance(function, MixedHash)
+    if is_accelerated(function):
+        if not mixed:
+            return list(map(function, keys))
+        if np == None:
+            return list(map(mix_hash, map(function.function, keys)))
+        hashes = np.fromiter(map(function.function, keys), dtype=np.uint64, count=len(keys))
+        return _mix_hash_many(hashes).tolist()
+
+    if len(keys) == 0 or not is_vectorized(function):
+        return list(map(function, keys))
+
+    vectorized = _VECTORIZED[function.function if mixed else function]
+
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+
+    # Hash the outliers one at a time, and the rest as a batch of their own
+    long_positions = np.flatnonzero(lengths > SCALAR_WIDTH).tolist()
+    if long_positions:
+        hashes = [None] * len(keys)
+        for position in long_positions:
+            hashes[position] = function(keys[position])
+        short_positions = np.flatnonzero(lengths <= SCALAR_WIDTH).tolist()
+        short_hashes = _hash_chunks(vectorized, mixed, [keys[position] for position in short_positions],
+                                    lengths[short_positions])
+        for position, hash in zip(short_positions, short_hashes):
+            hashes[position] = hash
+        return hashes
+
+    return _hash_chunks(vectorized, mixed, keys, lengths)
+
+
+def _hash_chunks(vectorized: callable, mixed: bool, keys: list, lengths: "np.ndarray") -> list:
+    """
+    Return the hashes of keys no longer than SCALAR_WIDTH, hashing up to
+    CHUNK_SIZE of them at a time but never more than fit in CHUNK_CELLS
+    once padded to the longest key of the chunk.
+    """
+    hashes = []
+    start = 0
+    while start < len(keys):
+        rows = CHUNK_SIZE
+        width = int(lengths[start:start + rows].max(initial=1))
+        if rows * width > CHUNK_CELLS:
+            rows = max(1, CHUNK_CELLS // width)
+
+        chunk_hashes = vectorized(keys[start:start + rows])
+        if mixed:
+            chunk_hashes = _mix_hash_many(chunk_hashes)
+        hashes.extend(chunk_hashes.tolist())
+        start += rows
+
+    return hashes
@@ -0,0 +1,160 @@
+# Description: Runs the same randomized workload on the C accelerator and on the pure Python code.
+#
+# Run as a script, this module plays a seeded sequence of operations against
+# every map configuration, checks each result against a dict, and prints the
+# results, the final bucket order of every map and a sample of hashes as
+# JSON. The test runs it once per backend, each in its own process since the
+# backend is picked at import, and requires both transcripts to be identical.
+#
+# The rest of the test suite is also run once per backend, in a pytest
+# process of its own with HASH_MAP_PURE_PYTHON set to 0 or 1.
+
+
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configurations() -> list:
+    """Return (name, callable creating an empty map) for every configuration."""
+    import hash_map_oa
+    import hash_map_sc
+    from base_structures import (ResizePolicy, hash_function_1,
+                                 hash_function_2, hash_function_fnv1a)
+
+    probings = {
+        'quadratic': hash_map_oa.QuadraticProbing,
+        'linear': hash_map_oa.LinearProbing,
+        'double': hash_map_oa.DoubleHashing,
+        'double (hash_function_2)': lambda: hash_map_oa.DoubleHashing(hash_function_2),
+        'robin hood': hash_map_oa.RobinHoodProbing,
+    }
+
+    maps = []
+    for incremental in (False, True):
+        for power_of_two in (False, True):
+            mode = f"incremental={incremental} power_of_two={power_of_two}"
+            maps.append((f"SC {mode}", lambda incremental=incremental, power_of_two=power_of_two:
+                         hash_map_sc.HashMap(7, hash_function_fnv1a, incremental=incremental,
+                                             power_of_two=power_of_two,
+                                             policy=ResizePolicy(max_load=1.0, min_load=0.1))))
+            for name, probing in probings.items():
+                max_load = 0.5 if name == 'quadratic' else 0.7
+                maps.append((f"OA {name} {mode}",
+                             lambda incremental=incremental, power_of_two=power_of_two,
+                             probing=probing, max_load=max_load:
+                             hash_map_oa.HashMap(7, hash_function_1, incremental=incremental,
+                                                 power_of_two=power_of_two, probing=probing(),
+                                                 policy=ResizePolicy(max_load=max_load, min_load=0.1))))
+    return maps
+
+
+def workload(operations: int = 4000, seed: int = 1) -> dict:
+    """
+    Play the operations against every configuration, asserting every
+    result against a dict, and return what each map returned and held.
+    """
+    from base_structures import (accelerator, hash_function_1,
+                                 hash_function_2, hash_function_fnv1a)
+
+    transcript = {}
+    for name, new_map in configurations():
+        rng = random.Random(seed)
+        m = new_map()
+        expected = {}
+        results = []
+
+        for i in range(operations):
+            key = 'k' + str(rng.randrange(300))
+            operation = rng.random()
+
+            if operation < 0.35:
+                m.put(key, i)
+                expected[key] = i
+            elif operation < 0.55:
+                m.remove(key)
+                expected.pop(key, None)
+            elif operation < 0.6:
+                expected[key] = expected.get(key, 0) + 1
+                results.append(m.increment(key))
+                assert results[-1] == expected[key], (name, key)
+            elif operation < 0.63:
+                batch = ['k' + str(rng.randrange(300)) for _ in range(10)]
+                m.put_many((batch_key, i) for batch_key in batch)
+                expected.update((batch_key, i) for batch_key in batch)
+            elif operation < 0.66:
+                batch = ['k' + str(rng.randrange(300)) for _ in range(10)]
+                m.remove_many(batch)
+                for batch_key in batch:
+                    expected.pop(batch_key, None)
+            elif operation < 0.67:
+                m.resize_table(rng.randrange(1, 2 * m.get_capacity()))
+            else:
+                value = m.get(key)
+                assert value == expected.get(key), (name, key)
+                assert m.contains_key(key) == (key in expected), (name, key)
+                results.append(value)
+
+        assert m.get_size() == len(expected), name
+        assert dict(m.items()) == expected, name
+        transcript[name] = {
+            'results': results,
+            'buckets': [list(pair) for pair in m.get_keys_and_values().get_list()],
+        }
+
+    keys = ['', 'a', 'key', 'é漢😀' * 3, 'x' * 1000]
+    transcript['hashes'] = {function.__name__: [function(key) for key in keys]
+                            for function in (hash_function_1, hash_function_2, hash_function_fnv1a)}
+    transcript['accelerated'] = accelerator != None
+    return transcript
+
+
+def backend_environment(pure_python: bool) -> dict:
+    """Return the environment of a process that picks the given backend."""
+    env = dict(os.environ)
+    env['HASH_MAP_PURE_PYTHON'] = '1' if pure_python else '0'
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def run_backend(pure_python: bool) -> dict:
+    """Return the workload transcript of a fresh process on one backend."""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__)], env=backend_environment(pure_python),
+                            cwd=ROOT, capture_output=True, text=True)
+    assert output.returncode == 0, output.stderr
+    return json.loads(output.stdout)
+
+
+def test_accelerator_and_pure_python_agree():
+    pytest.importorskip('_hash_map_accel', reason="C accelerator not built, run python build_accel.py")
+
+    accelerated = run_backend(pure_python=False)
+    pure = run_backend(pure_python=True)
+
+    assert accelerated.pop('accelerated') and not pure.pop('accelerated')
+    assert accelerated.keys() == pure.keys()
+    for name in pure:
+        assert accelerated[name] == pure[name], name
+
+
+@pytest.mark.parametrize('pure_python', [False, True], ids=['accelerated', 'pure Python'])
+def test_suite_passes_on_each_backend(pure_python):
+    if not pure_python:
+        pytest.importorskip('_hash_map_accel', reason="C accelerator not built, run python build_accel.py")
+
+    output = subprocess.run([sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider',
+                             os.path.dirname(os.path.abspath(__file__)), '--ignore', os.path.abspath(__file__)],
+                            env=backend_environment(pure_python), cwd=ROOT, capture_output=True, text=True)
+
+    assert output.returncode == 0, output.stdout[-5000:]
+
+
+if __name__ == "__main__":
+
+    print(json.dumps(workload()))
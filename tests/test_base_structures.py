@@ -0,0 +1,71 @@
+# Description: Tests for the building blocks shared by the hash maps.
+
+
+import pickle
+
+import pytest
+
+from base_structures import (DynamicArray, DynamicArrayException, HashEntry, LinkedList,
+                             LinkedListIterator, SLNode)
+
+
+@pytest.mark.parametrize('instance', [
+    SLNode('key', 1),
+    HashEntry('key', 1),
+    LinkedList(),
+    LinkedListIterator(None),
+    DynamicArray(),
+], ids=lambda instance: type(instance).__name__)
+def test_instances_have_no_dict(instance):
+    assert not hasattr(instance, '__dict__')
+    with pytest.raises(AttributeError):
+        instance.unexpected = 1
+
+
+def test_node_and_entry_attributes():
+    node = SLNode('key', 1, None, 42)
+    entry = HashEntry('key', 1, 42)
+
+    node.value, entry.value = 2, 2
+    entry.is_tombstone = True
+
+    assert (node.key, node.value, node.next, node.hash) == ('key', 2, None, 42)
+    assert (entry.key, entry.value, entry.hash, entry.is_tombstone) == ('key', 2, 42, True)
+    assert str(node) == '(key: 2)' and str(entry) == 'K: key V: 2 TS: True'
+
+
+def test_linked_list():
+    chain = LinkedList()
+    for i in range(5):
+        chain.insert('key' + str(i), i, i)
+
+    assert chain.length() == 5
+    assert [node.key for node in chain] == ['key4', 'key3', 'key2', 'key1', 'key0']
+    assert chain.contains('key2', 2).value == 2
+    # A different cached hash skips the node without comparing keys
+    assert chain.contains('key2', 3) == None and chain.contains('key2').value == 2
+
+    assert chain.remove('key4') and chain.remove('key0', 0) and not chain.remove('key1', 5)
+    assert chain.length() == 3 and str(chain) == 'SLL [(key3: 3) -> (key2: 2) -> (key1: 1)]'
+
+
+def test_dynamic_array():
+    da = DynamicArray([1, 2])
+    da.append(3)
+    da[0] = 10
+    da.swap(1, 2)
+
+    assert da.get_list() == [10, 3, 2] and list(da) == [10, 3, 2] and da.length() == 3
+    assert da.pop() == 2 and da.length() == 2
+    with pytest.raises(DynamicArrayException):
+        da[2]
+    with pytest.raises(DynamicArrayException):
+        da.set_at_index(-1, 0)
+
+
+@pytest.mark.parametrize('instance', [SLNode('key', 1, SLNode('next', 2), 42), HashEntry('key', 1, 42)],
+                         ids=lambda instance: type(instance).__name__)
+def test_slotted_instances_still_pickle(instance):
+    copy = pickle.loads(pickle.dumps(instance))
+
+    assert str(copy) == str(instance) and copy.hash == 42
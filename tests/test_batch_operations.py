@@ -0,0 +1,114 @@
+# Description: Tests for the batch operations of both hash maps.
+
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import DynamicArray, ResizePolicy, hash_function_1, hash_function_fnv1a
+
+
+MAPS = {
+    'SC': lambda function=hash_function_fnv1a, **options: hash_map_sc.HashMap(
+        11, function, policy=ResizePolicy(max_load=1.0, min_load=0.1), **options),
+    'OA': lambda function=hash_function_fnv1a, **options: hash_map_oa.HashMap(
+        11, function, policy=ResizePolicy(max_load=0.5, min_load=0.1), **options),
+    'OA linear': lambda function=hash_function_fnv1a, **options: hash_map_oa.HashMap(
+        11, function, probing=hash_map_oa.LinearProbing(), policy=ResizePolicy(max_load=0.7, min_load=0.1),
+        **options),
+}
+
+OPTIONS = {
+    'plain': {},
+    'power of two': {'power_of_two': True},
+    'incremental': {'incremental': True, 'rehash_step': 1},
+}
+
+
+@pytest.fixture(params=[(name, options) for name in MAPS for options in OPTIONS],
+                ids=[f"{name}, {options}" for name in MAPS for options in OPTIONS])
+def new_map(request):
+    name, options = request.param
+    return lambda: MAPS[name](**OPTIONS[options])
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_batches_match_single_key_operations(new_map, vectorized):
+    batched, single = new_map(), new_map()
+    rng = random.Random(3)
+
+    for round in range(30):
+        pairs = [('k' + str(rng.randrange(800)), round) for i in range(rng.randrange(200))]
+        doomed = ['k' + str(rng.randrange(800)) for i in range(rng.randrange(200))]
+
+        batched.put_many(iter(pairs), vectorized=vectorized)
+        batched.remove_many(iter(doomed))
+        for key, value in pairs:
+            single.put(key, value)
+        for key in doomed:
+            single.remove(key)
+
+        assert batched.get_size() == single.get_size()
+        assert dict(batched.items()) == dict(single.items())
+
+    keys = ['k' + str(i) for i in range(900)]
+    assert batched.get_many(keys).get_list() == [single.get(key) for key in keys]
+    assert batched.contains_many(keys).get_list() == [single.contains_key(key) for key in keys]
+
+
+def test_later_pairs_in_a_batch_win(new_map):
+    m = new_map()
+
+    m.put_many([('a', 1), ('b', 2), ('a', 3), ('a', 4)])
+
+    assert m.get_size() == 2
+    assert m.get('a') == 4 and m.get('b') == 2
+
+
+def test_a_batch_can_remove_the_same_key_twice(new_map):
+    m = new_map()
+    m.put_many(('key' + str(i), i) for i in range(10))
+
+    m.remove_many(['key3', 'key3', 'missing', 'key4'])
+
+    assert m.get_size() == 8
+    assert m.contains_many(['key3', 'key4', 'key5']).get_list() == [False, False, True]
+
+
+def test_lookups_return_dynamic_arrays_in_order(new_map):
+    m = new_map()
+    m.put_many([('x', 10), ('y', None), ('z', 30)])
+
+    values = m.get_many(['z', 'missing', 'x', 'y'])
+    found = m.contains_many(['z', 'missing', 'x', 'y'])
+
+    assert isinstance(values, DynamicArray) and isinstance(found, DynamicArray)
+    assert values.get_list() == [30, None, 10, None]
+    # A stored None is found, unlike a missing key
+    assert found.get_list() == [True, False, True, True]
+
+
+def test_empty_batches(new_map):
+    m = new_map()
+    m.put('key', 1)
+
+    m.put_many([])
+    m.remove_many([])
+
+    assert m.get_many([]).length() == 0 and m.contains_many([]).length() == 0
+    assert dict(m.items()) == {'key': 1}
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_colliding_keys(name):
+    # hash_function_1 gives anagrams the same hash
+    m = MAPS[name](function=hash_function_1)
+    words = ['abc', 'acb', 'bac', 'bca', 'cab', 'cba']
+
+    m.put_many((word, i) for i, word in enumerate(words))
+    m.remove_many(words[::2])
+
+    assert dict(m.items()) == {word: i for i, word in enumerate(words) if i % 2}
+    assert m.get_many(words).get_list() == [None, 1, None, 3, None, 5]
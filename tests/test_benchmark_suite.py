@@ -0,0 +1,99 @@
+# Description: Tests for the benchmark suite's bookkeeping, on tiny inputs.
+
+
+import json
+import os
+
+import pytest
+
+import benchmark_suite
+import hash_map_sc
+from base_structures import DynamicArray
+
+
+OPERATIONS = ['insert', 'lookup_hit', 'lookup_miss', 'delete_churn', 'resize', 'iteration',
+              'increment_stream']
+
+
+def record(operation: str, ns_per_op: float, structure: str = 'open_addressing') -> dict:
+    return {'structure': structure, 'hash_function': 'fnv1a', 'distribution': 'uuid', 'size': 100,
+            'operation': operation, 'seconds': ns_per_op * 100 / 1e9, 'ns_per_op': ns_per_op}
+
+
+def test_compare_flags_slowdowns_past_the_threshold():
+    baseline = [record('insert', 100), record('lookup_hit', 100), record('resize', 100)]
+    results = [record('insert', 109), record('lookup_hit', 111), record('resize', 50),
+               record('iteration', 1000), record('insert', 500, structure='dict')]
+
+    regressions = benchmark_suite.compare(results, baseline, 0.1)
+
+    # Only lookup_hit: the rest are within the threshold, faster, or new
+    assert regressions == [dict(record('lookup_hit', 111), baseline_ns_per_op=100)]
+
+
+@pytest.mark.parametrize('values', [
+    ['apple', 'apple', 'grape', 'melon', 'peach'],
+    ['Arch', 'Manjaro', 'Manjaro', 'Mint', 'Mint', 'Mint', 'Ubuntu', 'Ubuntu', 'Ubuntu'],
+    [],
+])
+def test_counter_find_mode_agrees_with_find_mode(values):
+    modes, frequency = benchmark_suite.counter_find_mode(values)
+    expected_modes, expected_frequency = hash_map_sc.find_mode(DynamicArray(values))
+
+    assert sorted(modes) == sorted(expected_modes.get_list()) and frequency == expected_frequency
+
+
+def test_the_dict_stand_in_behaves_like_the_maps():
+    for new_map in [benchmark_suite.DictMap, *benchmark_suite.map_factories(hash).values()]:
+        m = new_map()
+        for key in ('a', 'b', 'c', 'a'):
+            m.increment(key)
+        m.put('d', 0)
+        m.remove('b')
+        m.remove('missing')
+        m.resize_table(2 * m.get_capacity())
+
+        assert m.get('a') == 2 and m.get('b') == None
+        assert sorted(m.items()) == [('a', 2), ('c', 1), ('d', 0)]
+
+
+def test_run_suite_times_every_combination():
+    results = benchmark_suite.run_suite([60], ['fnv1a'], ['sequential', 'anagram'], repeat=1, seed=0)
+
+    timed = {(record['structure'], record['hash_function'], record['distribution'], record['operation'])
+             for record in results}
+    for distribution in ('sequential', 'anagram'):
+        for operation in OPERATIONS:
+            for structure, function in (('dict', 'builtin'), ('separate_chaining', 'fnv1a'),
+                                        ('open_addressing', 'fnv1a')):
+                assert (structure, function, distribution, operation) in timed
+        for structure, function in benchmark_suite.MODE_FINDERS:
+            assert (structure, function, distribution, 'find_mode') in timed
+
+    assert len(timed) == len(results)
+    assert all(record['size'] == 60 and record['ns_per_op'] > 0 for record in results)
+
+
+def test_main_writes_results_and_reports_regressions(tmp_path, capsys):
+    output, baseline = os.path.join(tmp_path, 'results.json'), os.path.join(tmp_path, 'baseline.json')
+    arguments = ['--sizes', '40', '--functions', 'fnv1a', '--distributions', 'uuid', '--repeat', '1']
+
+    assert benchmark_suite.main(arguments + ['--output', output]) == 0
+    with open(output) as file:
+        report = json.load(file)
+    assert report['settings']['sizes'] == [40] and report['environment']['python']
+
+    # A baseline every operation is far slower than passes, one that is far
+    # faster fails
+    for record in report['results']:
+        record['ns_per_op'] *= 1000
+    with open(baseline, 'w') as file:
+        json.dump(report, file)
+    assert benchmark_suite.main(arguments + ['--output', output, '--compare', baseline]) == 0
+
+    for record in report['results']:
+        record['ns_per_op'] /= 1e9
+    with open(baseline, 'w') as file:
+        json.dump(report, file)
+    assert benchmark_suite.main(arguments + ['--output', output, '--compare', baseline]) == 1
+    assert 'REGRESSION' in capsys.readouterr().err
@@ -0,0 +1,66 @@
+# Description: Tests for the Bloom filter guarding open addressing lookups.
+
+
+import random
+
+import pytest
+
+import hash_map_oa
+from base_structures import BloomFilter, hash_function_fnv1a
+
+
+PROBING = [
+    hash_map_oa.QuadraticProbing,
+    hash_map_oa.LinearProbing,
+    hash_map_oa.DoubleHashing,
+    hash_map_oa.RobinHoodProbing,
+]
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+@pytest.mark.parametrize('probing', PROBING)
+def test_churn_keeps_the_filter_fresh(probing, incremental):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a, probing=probing(),
+                            incremental=incremental, bloom_bits_per_key=10)
+    live = set()
+    rng = random.Random(7)
+
+    # A small working set of keys that are constantly replaced
+    for i in range(30000):
+        key = 'key' + str(rng.randrange(100000))
+        if len(live) < 200:
+            m.put(key, i)
+            live.add(key)
+        else:
+            victim = live.pop()
+            m.remove(victim)
+        bloom = m.get_bloom_filter()
+        assert not bloom.is_stale(m.get_size())
+
+    bloom = m.get_bloom_filter()
+    assert bloom.false_positive_rate() < 0.05
+    assert all(bloom.might_contain(m._hash_function(key)) for key in live)
+    assert all(m.contains_key(key) for key in live)
+
+
+@pytest.mark.parametrize('probing', PROBING)
+def test_remove_many_rebuilds_a_stale_filter(probing):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a, probing=probing(), bloom_bits_per_key=10)
+    keys = ['key' + str(i) for i in range(1000)]
+
+    for round in range(20):
+        m.put_many((key, round) for key in keys)
+        m.remove_many(keys[100:])
+        assert not m.get_bloom_filter().is_stale(m.get_size())
+
+    assert dict(m.items()) == {key: 19 for key in keys[:100]}
+
+
+def test_is_stale_counts_hashes_beyond_the_live_keys():
+    bloom = BloomFilter(10)
+    for hash in range(5):
+        bloom.add(hash)
+
+    assert not bloom.is_stale(5)
+    assert not bloom.is_stale(1)
+    assert bloom.is_stale(0)
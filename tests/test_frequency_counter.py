@@ -0,0 +1,159 @@
+# Description: Tests for the streaming frequency counters.
+
+
+import random
+from collections import Counter
+
+import pytest
+
+import hash_map_sc
+from base_structures import DynamicArray, hash_function_fnv1a
+from frequency_counter import ApproximateFrequencyCounter, FrequencyCounter, TopK
+
+
+def zipf_stream(length: int, seed: int) -> list:
+    """A skewed stream of keys: 'key<n>' turns up roughly in proportion to 1/n."""
+    rng = random.Random(seed)
+    return ['key' + str(int(1 / (1 - rng.random()) ** 1.2)) for i in range(length)]
+
+
+def test_top_k_keeps_the_highest_counts():
+    top = TopK(5)
+    expected = {}
+    rng = random.Random(1)
+
+    # Counts only grow, as they do in both counters
+    for i in range(3000):
+        key = rng.randrange(50)
+        expected[key] = expected.get(key, 0) + rng.randrange(1, 4)
+        top.offer(key, expected[key])
+
+    best = sorted(expected.values(), reverse=True)[:5]
+    assert [count for key, count in top.items()] == best
+    assert all(expected[key] == count for key, count in top.items())
+    assert len(top) == 5 and top.is_full() and top.min_count() == best[-1]
+
+
+def test_top_k_reports_the_key_it_evicts():
+    top = TopK(2)
+
+    assert top.offer('a', 3) == None and top.offer('b', 1) == None
+    assert top.offer('c', 1) == None
+    assert top.offer('c', 2) == 'b'
+    assert top.get('b') == None and top.get('c') == 2
+    assert top.items() == [('a', 3), ('c', 2)]
+
+
+def test_top_k_needs_room_for_a_key():
+    with pytest.raises(ValueError):
+        TopK(0)
+
+
+def test_exact_counts_match_a_counter():
+    keys = zipf_stream(20000, seed=2)
+    expected = Counter(keys)
+    counter = FrequencyCounter(k=5)
+
+    counter.update(keys)
+
+    assert len(counter) == len(expected) and counter.get_total() == len(keys)
+    assert all(counter.count(key) == count for key, count in expected.items())
+    assert counter.count('missing') == 0
+    assert [count for key, count in counter.top().get_list()] == [count for key, count
+                                                                 in expected.most_common(5)]
+    assert counter.top(2).length() == 2
+
+
+@pytest.mark.parametrize('values', [
+    ['apple', 'apple', 'grape', 'melon', 'peach'],
+    ['Arch', 'Manjaro', 'Manjaro', 'Mint', 'Mint', 'Mint', 'Ubuntu', 'Ubuntu', 'Ubuntu'],
+    ['one', 'two', 'three', 'four', 'five'],
+    ['2', '4', '2', '6', '8', '4', '1', '3', '4', '5', '7', '3', '3', '2'],
+])
+def test_modes_match_find_mode(values):
+    counter = FrequencyCounter()
+    counter.update(values)
+
+    mode, frequency = counter.mode()
+    expected_mode, expected_frequency = hash_map_sc.find_mode(DynamicArray(values))
+
+    assert sorted(mode.get_list()) == sorted(expected_mode.get_list())
+    assert frequency == expected_frequency
+
+
+def test_consume_reads_an_iterator_chunk_by_chunk():
+    keys = ['word' + str(i % 7 if i % 3 else 0) for i in range(100)]
+    counter = FrequencyCounter(k=3)
+    modes = []
+
+    # The answers are there after every chunk, without a final scan
+    for total in counter.consume(iter(keys), chunk_size=40):
+        modes.append((total, counter.mode()[1]))
+
+    assert modes == [(total, Counter(keys[:total]).most_common(1)[0][1]) for total in (40, 80, 100)]
+    assert counter.mode()[0].get_list() == ['word0']
+
+
+def test_mode_returns_a_copy():
+    counter = FrequencyCounter()
+    counter.update(['a', 'b'])
+
+    mode, frequency = counter.mode()
+    mode.append('c')
+
+    assert counter.mode()[0].get_list() == ['a', 'b']
+
+
+def test_an_empty_counter():
+    counter = FrequencyCounter()
+
+    assert counter.mode()[0].length() == 0 and counter.mode()[1] == 0
+    assert counter.top().length() == 0 and len(counter) == 0
+
+
+@pytest.mark.parametrize('counter_type', [FrequencyCounter, ApproximateFrequencyCounter])
+def test_counts_must_be_positive(counter_type):
+    counter = counter_type()
+
+    with pytest.raises(ValueError):
+        counter.add('key', 0)
+
+
+def test_estimates_stay_within_the_error_bound():
+    keys = zipf_stream(50000, seed=3)
+    expected = Counter(keys)
+    counter = ApproximateFrequencyCounter(k=5, epsilon=0.001, delta=0.01, function=hash_function_fnv1a)
+
+    counter.update(keys)
+
+    # Never under the true count, and over it by more than epsilon * total
+    # for no more than about delta of the keys
+    overcounts = [counter.estimate(key) - count for key, count in expected.items()]
+    assert min(overcounts) >= 0
+    assert sum(overcount > 0.001 * len(keys) for overcount in overcounts) <= 0.01 * len(expected)
+
+
+def test_space_saving_finds_every_heavy_hitter():
+    keys = zipf_stream(50000, seed=4)
+    expected = Counter(keys)
+    counter = ApproximateFrequencyCounter(k=5, function=hash_function_fnv1a, monitored=50)
+
+    counter.update(keys)
+
+    # Every key above total / monitored is monitored, with its true count
+    # within the recorded error of the Space-Saving count
+    monitored = dict(counter._top.items())
+    for key, count in expected.items():
+        if count > len(keys) / 50:
+            assert 0 <= monitored[key] - count <= counter.error(key)
+
+    assert [key for key, count in counter.top().get_list()] == [key for key, count
+                                                               in expected.most_common(5)]
+    assert counter.mode()[0].get_list() == [expected.most_common(1)[0][0]]
+    assert counter.error('never seen') == None
+
+
+@pytest.mark.parametrize('options', [{'epsilon': 0}, {'epsilon': 1}, {'delta': 0}, {'k': 10, 'monitored': 5}])
+def test_sketch_settings_are_validated(options):
+    with pytest.raises(ValueError):
+        ApproximateFrequencyCounter(**options)
@@ -0,0 +1,71 @@
+# Description: Tests for the hashes cached in SLNode and HashEntry.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ResizePolicy, hash_function_fnv1a
+
+
+class CountingHash:
+    """FNV-1a that counts how often it is called."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, key: str) -> int:
+        self.calls += 1
+        return hash_function_fnv1a(key)
+
+
+def constant_hash(key: str) -> int:
+    """Give every key the same hash, so only the key comparison tells them apart."""
+    return 7
+
+
+MAPS = [
+    lambda function: hash_map_sc.HashMap(11, function),
+    lambda function: hash_map_sc.HashMap(11, function, power_of_two=True),
+    lambda function: hash_map_oa.HashMap(11, function),
+    lambda function: hash_map_oa.HashMap(11, function, probing=hash_map_oa.RobinHoodProbing(),
+                                         policy=ResizePolicy(max_load=0.9)),
+]
+
+
+@pytest.mark.parametrize('new_map', MAPS)
+def test_entries_cache_the_hash_their_key_was_placed_with(new_map):
+    m = new_map(hash_function_fnv1a)
+    for i in range(50):
+        m.put('key' + str(i), i)
+
+    entries = list(m._iter_entries())
+
+    assert len(entries) == 50
+    assert all(entry.hash == m._hash_function(entry.key) for entry in entries)
+
+
+@pytest.mark.parametrize('new_map', MAPS)
+def test_resizing_never_hashes_a_key_again(new_map):
+    function = CountingHash()
+    m = new_map(function)
+    for i in range(200):
+        m.put('key' + str(i), i)
+    calls = function.calls
+
+    for capacity in (500, 50, 1000):
+        m.resize_table(capacity)
+
+    assert function.calls == calls
+    assert all(m.get('key' + str(i)) == i for i in range(200))
+
+
+@pytest.mark.parametrize('map_type', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_keys_with_equal_hashes_are_still_compared(map_type):
+    m = map_type(11, constant_hash, policy=ResizePolicy(max_load=0.5))
+    for i in range(5):
+        m.put('key' + str(i), i)
+
+    m.remove('key2')
+
+    assert [m.get('key' + str(i)) for i in range(6)] == [0, 1, None, 3, 4, None]
@@ -0,0 +1,95 @@
+# Description: Tests for the string hash functions in base_structures.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import (MixedHash, SipHash, describe_hash_function,
+                             hash_function_1, hash_function_2,
+                             hash_function_builtin, hash_function_fnv1a,
+                             hash_function_siphash, load_hash_function)
+
+
+WELL_MIXING = [hash_function_fnv1a, hash_function_siphash, hash_function_builtin]
+
+
+def test_fnv1a_matches_the_reference_values():
+    assert hash_function_fnv1a('') == 0xCBF29CE484222325
+    assert hash_function_fnv1a('a') == 0xAF63DC4C8601EC8C
+
+
+def test_siphash_matches_the_reference_values():
+    # From the SipHash paper: key 00..0f, messages 00..0e and empty
+    siphash = SipHash(bytes(range(16)))
+
+    assert siphash.hash_bytes(bytes(range(15))) == 0xA129CA6149BE45E5
+    assert siphash.hash_bytes(b'') == 0x726FDB47DD0E0E31
+    assert siphash('\x00\x01\x02') == siphash.hash_bytes(b'\x00\x01\x02')
+
+
+def test_siphash_takes_a_16_byte_secret():
+    with pytest.raises(ValueError):
+        SipHash(b'too short')
+
+    assert SipHash(b'0123456789abcdef').secret == b'0123456789abcdef'
+    assert SipHash(b'0123456789abcdef')('key') != SipHash(b'fedcba9876543210')('key')
+
+
+@pytest.mark.parametrize('function', WELL_MIXING + [hash_function_1, hash_function_2])
+def test_hashes_are_64_bit_and_handle_any_text(function):
+    for key in ('', 'a', 'key1', 'ключ', '鍵🔑', 'x' * 1000):
+        assert 0 <= function(key) < 2 ** 64
+        assert function(key) == function(key)
+
+
+@pytest.mark.parametrize('function', WELL_MIXING)
+def test_anagrams_and_neighbouring_keys_get_different_hashes(function):
+    assert hash_function_1('listen') == hash_function_1('silent')
+
+    assert function('listen') != function('silent')
+    assert len({function('key' + str(i)) for i in range(1000)}) == 1000
+
+
+@pytest.mark.parametrize('function', WELL_MIXING)
+def test_sequential_keys_spread_over_a_table(function):
+    capacity = 1009
+    keys = ['key' + str(i) for i in range(capacity)]
+
+    def longest_chain(function):
+        counts = {}
+        for key in keys:
+            index = function(key) % capacity
+            counts[index] = counts.get(index, 0) + 1
+        return max(counts.values())
+
+    # As many keys as buckets: a uniform hash rarely puts more than about
+    # eight in one, while the sum of code points piles them up
+    assert longest_chain(function) <= 10
+    assert longest_chain(hash_function_1) > 50
+
+
+@pytest.mark.parametrize('function', WELL_MIXING)
+@pytest.mark.parametrize('map_type', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_every_function_is_a_drop_in_for_both_maps(map_type, function):
+    m = map_type(11, function)
+    for i in range(100):
+        m.put('key' + str(i), i)
+
+    assert all(m.get('key' + str(i)) == i for i in range(100))
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2, hash_function_fnv1a,
+                                      hash_function_siphash, SipHash(b'private secret!!'),
+                                      MixedHash(hash_function_fnv1a)])
+def test_persistent_functions_can_be_described_and_reloaded(function):
+    loaded = load_hash_function(describe_hash_function(function))
+
+    assert all(loaded(key) == function(key) for key in ('', 'a', 'key1', 'listen'))
+
+
+def test_per_process_and_unknown_functions_can_not_be_described():
+    with pytest.raises(ValueError):
+        describe_hash_function(hash_function_builtin)
+    with pytest.raises(ValueError):
+        load_hash_function('no_such_function')
@@ -0,0 +1,151 @@
+# Description: Tests for the asyncio facade over both hash maps.
+
+
+import asyncio
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ResizePolicy, hash_function_fnv1a
+from hash_map_async import AsyncHashMap
+
+
+MAPS = {
+    'SC': lambda step: AsyncHashMap(hash_map_sc.HashMap, 11, hash_function_fnv1a, step=step,
+                                    policy=ResizePolicy(max_load=1.0, min_load=0.1)),
+    'OA': lambda step: AsyncHashMap(hash_map_oa.HashMap, 11, hash_function_fnv1a, step=step,
+                                    policy=ResizePolicy(max_load=0.5, min_load=0.1)),
+}
+
+
+@pytest.fixture(params=MAPS.values(), ids=MAPS.keys())
+def new_map(request):
+    return request.param
+
+
+class Ticker:
+    """A task that counts how often the event loop gets to run it."""
+
+    def __init__(self) -> None:
+        self.ticks = 0
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self.ticks += 1
+            await asyncio.sleep(0)
+
+    async def stop(self) -> int:
+        self._task.cancel()
+        return self.ticks
+
+
+def test_put_get_and_remove_many(new_map):
+    async def run():
+        m = new_map(64)
+        await m.put_many(('key' + str(i), i) for i in range(3000))
+        await m.remove_many('key' + str(i) for i in range(0, 3000, 3))
+        values = await m.get_many('key' + str(i) for i in range(3000))
+        return m, values
+
+    m, values = asyncio.run(run())
+
+    assert m.get_size() == 2000 and not m.is_rehashing()
+    assert values.get_list() == [None if i % 3 == 0 else i for i in range(3000)]
+    assert m.get('key1') == 1 and 'key1' in m and 'key0' not in m and len(m) == 2000
+
+
+def test_put_many_takes_an_async_iterable(new_map):
+    async def pairs():
+        for i in range(500):
+            yield 'key' + str(i), i
+
+    async def run():
+        m = new_map(64)
+        await m.put_many(pairs())
+        return dict([pair async for pair in m.items()])
+
+    assert asyncio.run(run()) == {'key' + str(i): i for i in range(500)}
+
+
+def test_scans(new_map):
+    async def run():
+        m = new_map(16)
+        await m.put_many(('key' + str(i), i) for i in range(400))
+        await m.remove_many('key' + str(i) for i in range(0, 400, 2))
+        return (m, [key async for key in m.keys()], [value async for value in m.values()],
+                [pair async for pair in m.items()], await m.get_keys_and_values())
+
+    m, keys, values, items, pairs = asyncio.run(run())
+
+    expected = {'key' + str(i): i for i in range(1, 400, 2)}
+    assert dict(items) == expected and pairs.get_list() == items
+    assert list(zip(keys, values)) == items
+    assert items == list(m.get_map().items())
+
+
+def test_bulk_operations_yield_to_the_event_loop(new_map):
+    async def run():
+        m = new_map(100)
+        ticker = Ticker()
+        await m.put_many(('key' + str(i), i) for i in range(10000))
+        after_put, old_capacity = ticker.ticks, m.get_capacity()
+        await m.resize_table(50000)
+        after_resize = ticker.ticks
+        async for pair in m.items():
+            pass
+        return m, old_capacity, after_put, after_resize - after_put, await ticker.stop() - after_resize
+
+    m, old_capacity, put, resize, scan = asyncio.run(run())
+
+    # At least once for every step pairs loaded, old buckets moved or new
+    # buckets scanned
+    assert put >= 10000 // 100
+    assert resize >= old_capacity // 100
+    assert scan >= m.get_capacity() // 100
+    assert m.get_size() == 10000 and m.get_capacity() >= 50000
+
+
+def test_other_tasks_can_use_the_map_during_a_resize(new_map):
+    async def writer(m):
+        for i in range(200):
+            m.put('new' + str(i), i)
+            await asyncio.sleep(0)
+
+    async def run():
+        m = new_map(16)
+        await m.put_many(('key' + str(i), i) for i in range(2000))
+        await asyncio.gather(m.resize_table(20000), writer(m))
+        await m.finish_rehash()
+        return m
+
+    m = asyncio.run(run())
+
+    assert m.get_size() == 2200 and m.get_capacity() >= 20000
+    assert all(m.get('key' + str(i)) == i for i in range(2000))
+    assert all(m.get('new' + str(i)) == i for i in range(200))
+
+
+def test_changing_the_map_during_a_scan_raises(new_map):
+    async def run():
+        m = new_map(16)
+        await m.put_many(('key' + str(i), i) for i in range(500))
+
+        async def scan():
+            async for pair in m.items():
+                pass
+
+        async def change():
+            await asyncio.sleep(0)
+            m.put('new', 0)
+
+        await asyncio.gather(scan(), change())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+
+def test_step_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncHashMap(step=0)
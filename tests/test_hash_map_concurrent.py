@@ -0,0 +1,189 @@
+# Description: Tests for the thread-safe ConcurrentHashMap.
+
+
+import random
+import sys
+import threading
+
+import pytest
+
+from base_structures import ResizePolicy, hash_function_fnv1a
+from hash_map_concurrent import ConcurrentHashMap
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """Switch threads every few microseconds, so races actually happen."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(*targets) -> None:
+    """Start a thread for each target and wait for them all."""
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_matches_a_dict_under_random_operations():
+    m = ConcurrentHashMap(1, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0, min_load=0.1),
+                          stripe_count=4)
+    expected = {}
+    rng = random.Random(5)
+
+    for i in range(5000):
+        key = 'k' + str(rng.randrange(400))
+        if rng.random() < 0.6:
+            m.put(key, i)
+            expected[key] = i
+        else:
+            m.remove(key)
+            expected.pop(key, None)
+
+    assert m.get_size() == len(expected)
+    assert dict(m.items()) == expected
+    assert sorted(m.get_keys_and_values().get_list()) == sorted(expected.items())
+
+
+def test_concurrent_increments_are_not_lost():
+    m = ConcurrentHashMap(1, hash_function_fnv1a, stripe_count=4)
+    words = ['word' + str(i % 300) for i in range(3000)]
+
+    def count_words():
+        for word in words:
+            m.increment(word)
+
+    run_threads(*[count_words] * 4)
+
+    assert m.get_size() == 300
+    assert all(m.get('word' + str(i)) == 40 for i in range(300))
+
+
+def test_puts_racing_resizes_keep_every_entry():
+    m = ConcurrentHashMap(11, hash_function_fnv1a, stripe_count=8)
+    done = threading.Event()
+
+    def writer(first):
+        for i in range(first, 4000, 4):
+            m.put('key' + str(i), i)
+
+    def resizer():
+        capacity = 7
+        while not done.is_set():
+            m.resize_table(capacity)
+            capacity = capacity * 3 % 5000 + 7
+
+    def writers():
+        run_threads(*[lambda first=first: writer(first) for first in range(4)])
+        done.set()
+
+    run_threads(writers, resizer)
+
+    assert m.get_size() == 4000
+    assert dict(m.items()) == {'key' + str(i): i for i in range(4000)}
+
+
+def test_concurrent_removes():
+    m = ConcurrentHashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0, min_load=0.2))
+    for i in range(4000):
+        m.put('key' + str(i), i)
+
+    def remover(first):
+        for i in range(first, 4000, 4):
+            m.remove('key' + str(i))
+
+    run_threads(*[lambda first=first: remover(first) for first in range(3)])
+
+    assert m.get_size() == 1000 and len(list(m)) == 1000
+    assert all(m.get('key' + str(i)) == (i if i % 4 == 3 else None) for i in range(4000))
+
+
+def test_readers_never_miss_a_key_while_the_table_grows():
+    m = ConcurrentHashMap(1, hash_function_fnv1a, stripe_count=4)
+    for i in range(100):
+        m.put('stable' + str(i), i)
+    misses = []
+
+    def reader():
+        for round in range(30):
+            for i in range(100):
+                if m.get('stable' + str(i)) != i or 'stable' + str(i) not in m:
+                    misses.append(i)
+
+    def writer():
+        for i in range(5000):
+            m.put('new' + str(i), i)
+
+    run_threads(reader, reader, writer)
+
+    assert misses == []
+    assert m.get_size() == 5100
+
+
+def test_setdefault_is_atomic():
+    m = ConcurrentHashMap(11, hash_function_fnv1a)
+    results = []
+
+    def claim():
+        for i in range(500):
+            results.append((i, m.setdefault('key' + str(i), object())))
+
+    run_threads(*[claim] * 4)
+
+    # Every thread got back the one value that was stored for each key
+    assert all(value is m.get('key' + str(i)) for i, value in results)
+
+
+def test_iterating_while_others_write_does_not_raise():
+    m = ConcurrentHashMap(11, hash_function_fnv1a)
+    for i in range(1000):
+        m.put('stable' + str(i), i)
+    seen = []
+
+    def iterate():
+        for round in range(5):
+            seen.append(sorted(key for key in m.keys() if key.startswith('stable')))
+
+    def writer():
+        for i in range(3000):
+            m.put('new' + str(i), i)
+            m.remove('new' + str(i - 10))
+
+    run_threads(iterate, writer)
+
+    assert all(keys == sorted('stable' + str(i) for i in range(1000)) for keys in seen)
+
+
+@pytest.mark.parametrize('stripe_count', [1, 3, 64])
+def test_any_number_of_stripes(stripe_count):
+    m = ConcurrentHashMap(5, hash_function_fnv1a, stripe_count=stripe_count)
+
+    for i in range(200):
+        m['key' + str(i)] = i
+    del m['key0']
+
+    assert len(m) == 199 and sum(m._counts) == 199
+    with pytest.raises(KeyError):
+        m['key0']
+    with pytest.raises(KeyError):
+        del m['key0']
+
+
+def test_stripe_count_must_be_positive():
+    with pytest.raises(ValueError):
+        ConcurrentHashMap(stripe_count=0)
+
+
+def test_clear_and_update_with():
+    m = ConcurrentHashMap(11, hash_function_fnv1a)
+    for i in range(50):
+        m.put('key' + str(i), i)
+
+    m.clear()
+
+    assert m.get_size() == 0 and m.get('key1') == None
+    assert m.update_with('key1', lambda value: value + [1], []) == [1]
@@ -0,0 +1,88 @@
+# Description: Tests for the memory-mapped read-only open addressing table.
+
+
+import os
+
+import pytest
+
+import hash_map_oa
+from base_structures import ResizePolicy, hash_function_builtin, hash_function_fnv1a
+from hash_map_mmap import MappedHashMap, build_mapped
+
+
+PROBING = [
+    (hash_map_oa.QuadraticProbing, {}),
+    (hash_map_oa.LinearProbing, {}),
+    (hash_map_oa.DoubleHashing, {}),
+    (hash_map_oa.RobinHoodProbing, {'policy': ResizePolicy(max_load=0.9)}),
+    (hash_map_oa.QuadraticProbing, {'power_of_two': True}),
+    (hash_map_oa.LinearProbing, {'incremental': True}),
+]
+
+
+@pytest.mark.parametrize('probing, options', PROBING)
+def test_round_trip_with_removed_keys(tmp_path, probing, options):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a, probing=probing(), **options)
+    for i in range(500):
+        m.put('key' + str(i), {'value': i})
+    for i in range(0, 500, 3):
+        m.remove('key' + str(i))
+    path = os.path.join(tmp_path, 'map.bin')
+
+    build_mapped(m, path)
+
+    with MappedHashMap(path) as mapped:
+        assert len(mapped) == m.get_size() and mapped.get_capacity() == m.get_capacity()
+        assert all(mapped.get('key' + str(i)) == (None if i % 3 == 0 or i >= 500 else {'value': i})
+                   for i in range(600))
+        assert dict(mapped.items()) == dict(m.items())
+
+
+def test_mapping_protocol(tmp_path):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    m.put('a', 1)
+    path = os.path.join(tmp_path, 'map.bin')
+    build_mapped(m, path)
+
+    with MappedHashMap(path) as mapped:
+        assert mapped['a'] == 1 and 'a' in mapped and 'b' not in mapped
+        assert list(mapped) == ['a'] and list(mapped.values()) == [1]
+        with pytest.raises(KeyError):
+            mapped['b']
+
+
+def test_files_that_are_not_tables_are_rejected(tmp_path):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    m.put('a', 1)
+    path = os.path.join(tmp_path, 'map.bin')
+    build_mapped(m, path)
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(path, 'wb') as file:
+        file.write(data[:-(m.get_capacity() * 10)])
+    with pytest.raises(ValueError):
+        MappedHashMap(path)
+
+    with open(path, 'wb') as file:
+        file.write(b'X' * len(data))
+    with pytest.raises(ValueError):
+        MappedHashMap(path)
+
+
+def test_a_failed_build_leaves_the_previous_file_and_no_partial_one(tmp_path):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    m.put('a', 1)
+    path = os.path.join(tmp_path, 'map.bin')
+    build_mapped(m, path)
+
+    # Lambdas can not be pickled, and hash_function_builtin can not be described
+    m.put('b', lambda: None)
+    with pytest.raises(Exception):
+        build_mapped(m, path)
+    with pytest.raises(ValueError):
+        build_mapped(hash_map_oa.HashMap(11, hash_function_builtin), path)
+
+    assert os.listdir(tmp_path) == ['map.bin']
+    with MappedHashMap(path) as mapped:
+        assert dict(mapped.items()) == {'a': 1}
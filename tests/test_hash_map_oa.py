@@ -0,0 +1,192 @@
+# Description: Tests for the open addressing hash map's core operations.
+
+
+import random
+
+import pytest
+
+import hash_map_oa
+from base_structures import (DynamicArray, ResizePolicy, hash_function_1,
+                             hash_function_2, hash_function_fnv1a)
+
+
+PROBING = {
+    'quadratic': (hash_map_oa.QuadraticProbing, 0.5),
+    'linear': (hash_map_oa.LinearProbing, 0.7),
+    'double': (hash_map_oa.DoubleHashing, 0.7),
+    'robin hood': (hash_map_oa.RobinHoodProbing, 0.9),
+}
+
+MODES = {
+    'prime': {},
+    'power of two': {'power_of_two': True},
+    'incremental': {'incremental': True, 'rehash_step': 1},
+}
+
+
+@pytest.fixture(params=[(probing, mode) for probing in PROBING for mode in MODES],
+                ids=[f"{probing}, {mode}" for probing in PROBING for mode in MODES])
+def new_map(request):
+    probing, mode = request.param
+    probing_type, max_load = PROBING[probing]
+
+    def new_map(capacity=11, function=hash_function_fnv1a, min_load=0.0):
+        return hash_map_oa.HashMap(capacity, function, probing=probing_type(),
+                                   policy=ResizePolicy(max_load=max_load, min_load=min_load),
+                                   **MODES[mode])
+    return new_map
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2, hash_function_fnv1a])
+def test_put_get_and_overwrite(new_map, function):
+    m = new_map(function=function)
+
+    for i in range(200):
+        m.put('key' + str(i), i)
+    for i in range(0, 200, 2):
+        m.put('key' + str(i), -i)
+
+    assert m.get_size() == 200
+    assert all(m.get('key' + str(i)) == (-i if i % 2 == 0 else i) for i in range(200))
+    assert m.get('missing') == None
+    assert m.contains_key('key7') and not m.contains_key('missing')
+
+
+def test_grows_past_the_maximum_load(new_map):
+    m = new_map()
+
+    for i in range(500):
+        m.put('key' + str(i), i)
+        assert (m.get_size() - 1) / m.get_capacity() < m._policy.max_load
+
+
+def test_remove(new_map):
+    m = new_map()
+    for i in range(100):
+        m.put('key' + str(i), i)
+
+    for i in range(0, 100, 3):
+        m.remove('key' + str(i))
+    m.remove('missing')
+
+    assert m.get_size() == 66
+    assert all(m.contains_key('key' + str(i)) == (i % 3 != 0) for i in range(100))
+
+
+def test_removed_keys_stay_removed_through_resizes(new_map):
+    m = new_map()
+    for i in range(50):
+        m.put('key' + str(i), i)
+    for i in range(25):
+        m.remove('key' + str(i))
+
+    m.resize_table(200)
+    m.rehash_step(m.get_capacity() + 1000)
+
+    assert m.get_size() == 25
+    assert all(m.get('key' + str(i)) == (None if i < 25 else i) for i in range(50))
+
+
+@pytest.mark.parametrize('capacity', [1, 30, 500])
+def test_resize_table_keeps_every_entry(new_map, capacity):
+    m = new_map()
+    for i in range(60):
+        m.put('key' + str(i), i)
+
+    m.resize_table(capacity)
+    m.rehash_step(m.get_capacity() + 1000)
+
+    assert m.get_size() == 60
+    assert all(m.get('key' + str(i)) == i for i in range(60))
+    assert (m.get_size() - 1) / m.get_capacity() < m._policy.max_load
+
+
+def test_get_keys_and_values_returns_every_live_pair_once(new_map):
+    m = new_map()
+    expected = {'key' + str(i): i for i in range(150)}
+    for key, value in expected.items():
+        m.put(key, value)
+    for i in range(0, 150, 5):
+        m.remove('key' + str(i))
+        del expected['key' + str(i)]
+
+    pairs = m.get_keys_and_values()
+
+    assert isinstance(pairs, DynamicArray)
+    assert sorted(pairs.get_list()) == sorted(expected.items())
+
+
+def test_table_load_and_clear(new_map):
+    m = new_map(capacity=100)
+    for i in range(10):
+        m.put('key' + str(i), i)
+
+    assert m.table_load() == 10 / m.get_capacity()
+
+    m.clear()
+    assert m.get_size() == 0 and m.get('key1') == None
+    assert m.empty_buckets() == m.get_capacity()
+
+
+def test_matches_a_dict_under_random_operations(new_map):
+    m = new_map(capacity=7, min_load=0.1)
+    expected = {}
+    rng = random.Random(5)
+
+    for i in range(5000):
+        key = 'k' + str(rng.randrange(400))
+        if rng.random() < 0.55:
+            m.put(key, i)
+            expected[key] = i
+        else:
+            m.remove(key)
+            expected.pop(key, None)
+        if i % 50 == 0:
+            assert m.get(key) == expected.get(key)
+
+    assert m.get_size() == len(expected)
+    assert dict(m.get_keys_and_values().get_list()) == expected
+
+
+def test_max_load_above_the_probing_limit_is_rejected():
+    with pytest.raises(ValueError):
+        hash_map_oa.HashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=0.9))
+
+
+def test_resize_does_not_bring_removed_keys_back():
+    # The get_keys_and_values demo: resize_table() used to put() every
+    # non-empty bucket, tombstones included, so '1' came back to life
+    m = hash_map_oa.HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m.resize_table(2)
+    m.put('20', '200')
+    m.remove('1')
+
+    m.resize_table(12)
+
+    assert m.get_size() == 5 and m.get_tombstone_count() == 0
+    assert sorted(m.get_keys_and_values().get_list()) == [('2', '20'), ('20', '200'), ('3', '30'),
+                                                          ('4', '40'), ('5', '50')]
+
+
+def test_resize_moves_entries_without_put(new_map):
+    m = new_map()
+    for i in range(100):
+        m.put('key' + str(i), i)
+    for i in range(0, 100, 2):
+        m.remove('key' + str(i))
+    entries = {entry.key: entry for entry in m._iter_entries()}
+
+    def fail(key, value):
+        raise AssertionError("resize_table() called put()")
+
+    m.put = fail
+    m.resize_table(400)
+    m.rehash_step(m.get_capacity() + 1000)
+    del m.put
+
+    # The same entry objects are placed straight into the new table
+    assert m.get_capacity() >= 400 and m.get_tombstone_count() == 0
+    assert all(entries[entry.key] is entry for entry in m._iter_entries())
+    assert m.get_size() == 50
@@ -0,0 +1,140 @@
+# Description: Tests for the separate chaining hash map's core operations.
+
+
+import random
+
+import pytest
+
+import hash_map_sc
+from base_structures import (DynamicArray, ResizePolicy, hash_function_1,
+                             hash_function_2, hash_function_fnv1a)
+
+
+CONFIGURATIONS = {
+    'default': {},
+    'growing': {'policy': ResizePolicy(max_load=1.0, min_load=0.1)},
+    'power of two': {'power_of_two': True, 'policy': ResizePolicy(max_load=1.0)},
+    'incremental': {'incremental': True, 'rehash_step': 1, 'policy': ResizePolicy(max_load=1.0)},
+}
+
+
+@pytest.fixture(params=CONFIGURATIONS.values(), ids=CONFIGURATIONS.keys())
+def options(request):
+    return request.param
+
+
+@pytest.mark.parametrize('function', [hash_function_1, hash_function_2, hash_function_fnv1a])
+def test_put_get_and_overwrite(options, function):
+    m = hash_map_sc.HashMap(11, function, **options)
+
+    for i in range(200):
+        m.put('key' + str(i), i)
+    for i in range(0, 200, 2):
+        m.put('key' + str(i), -i)
+
+    assert m.get_size() == 200
+    assert all(m.get('key' + str(i)) == (-i if i % 2 == 0 else i) for i in range(200))
+    assert m.get('missing') == None
+    assert m.contains_key('key7') and not m.contains_key('missing')
+
+
+def test_remove(options):
+    m = hash_map_sc.HashMap(11, hash_function_fnv1a, **options)
+    for i in range(100):
+        m.put('key' + str(i), i)
+
+    for i in range(0, 100, 3):
+        m.remove('key' + str(i))
+    m.remove('missing')
+
+    assert m.get_size() == 66
+    assert all(m.contains_key('key' + str(i)) == (i % 3 != 0) for i in range(100))
+
+
+@pytest.mark.parametrize('capacity', [1, 7, 30, 500])
+def test_resize_table_keeps_every_entry(options, capacity):
+    m = hash_map_sc.HashMap(11, hash_function_fnv1a, **options)
+    for i in range(60):
+        m.put('key' + str(i), i)
+
+    m.resize_table(capacity)
+    m.rehash_step(m.get_capacity() + 1000)
+
+    assert m.get_size() == 60
+    assert all(m.get('key' + str(i)) == i for i in range(60))
+    capacity = m.get_capacity()
+    if options.get('power_of_two'):
+        assert capacity & (capacity - 1) == 0
+    else:
+        assert all(capacity % divisor for divisor in range(2, int(capacity ** 0.5) + 1))
+
+
+def test_resize_table_ignores_capacities_below_one():
+    m = hash_map_sc.HashMap(11, hash_function_fnv1a)
+    m.put('key', 1)
+
+    m.resize_table(0)
+
+    assert m.get_capacity() == 11 and m.get('key') == 1
+
+
+def test_get_keys_and_values_returns_every_pair_once(options):
+    m = hash_map_sc.HashMap(11, hash_function_fnv1a, **options)
+    expected = {'key' + str(i): i for i in range(150)}
+    for key, value in expected.items():
+        m.put(key, value)
+
+    pairs = m.get_keys_and_values()
+
+    assert isinstance(pairs, DynamicArray)
+    assert sorted(pairs.get_list()) == sorted(expected.items())
+
+
+def test_empty_buckets_table_load_and_clear():
+    m = hash_map_sc.HashMap(11, hash_function_1)
+    assert m.empty_buckets() == 11 and m.table_load() == 0
+
+    # hash_function_1 puts anagrams in the same chain
+    for key in ('abc', 'bca', 'cab', 'z'):
+        m.put(key, key)
+
+    assert m.empty_buckets() == 9
+    assert m.table_load() == 4 / 11
+
+    m.clear()
+    assert m.get_size() == 0 and m.get_capacity() == 11 and m.get('abc') == None
+
+
+def test_matches_a_dict_under_random_operations(options):
+    m = hash_map_sc.HashMap(7, hash_function_fnv1a, **options)
+    expected = {}
+    rng = random.Random(5)
+
+    for i in range(5000):
+        key = 'k' + str(rng.randrange(400))
+        if rng.random() < 0.6:
+            m.put(key, i)
+            expected[key] = i
+        else:
+            m.remove(key)
+            expected.pop(key, None)
+
+    assert m.get_size() == len(expected)
+    assert dict(m.get_keys_and_values().get_list()) == expected
+
+
+@pytest.mark.parametrize('values, modes, frequency', [
+    (['apple', 'apple', 'grape', 'melon', 'peach'], ['apple'], 2),
+    (['Arch', 'Manjaro', 'Manjaro', 'Mint', 'Mint', 'Mint', 'Ubuntu', 'Ubuntu', 'Ubuntu'], ['Mint', 'Ubuntu'], 3),
+    (['one', 'two', 'three', 'four', 'five'], ['five', 'four', 'one', 'three', 'two'], 1),
+    (['2', '4', '2', '6', '8', '4', '1', '3', '4', '5', '7', '3', '3', '2'], ['2', '3', '4'], 3),
+])
+def test_find_mode(values, modes, frequency):
+    da = DynamicArray()
+    for value in values:
+        da.append(value)
+
+    mode, count = hash_map_sc.find_mode(da)
+
+    assert sorted(mode.get_list()) == modes
+    assert count == frequency
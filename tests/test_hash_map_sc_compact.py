@@ -0,0 +1,87 @@
+# Description: Tests for the compact separate chaining hash map.
+
+
+import random
+
+import pytest
+
+import hash_map_sc
+import hash_map_sc_compact
+from base_structures import ResizePolicy, hash_function_1, hash_function_fnv1a
+
+
+@pytest.mark.parametrize('policy', [None, ResizePolicy(max_load=1.0, min_load=0.1)])
+def test_matches_the_separate_chaining_map(policy):
+    compact = hash_map_sc_compact.HashMap(7, hash_function_fnv1a, policy=policy)
+    chained = hash_map_sc.HashMap(7, hash_function_fnv1a, policy=policy)
+    rng = random.Random(3)
+
+    for i in range(5000):
+        key = 'k' + str(rng.randrange(400))
+        put = rng.random() < 0.6
+        for m in (compact, chained):
+            if put:
+                m.put(key, i)
+            else:
+                m.remove(key)
+
+    assert compact.get_size() == chained.get_size()
+    assert compact.get_capacity() == chained.get_capacity()
+    assert dict(compact.items()) == dict(chained.items())
+    assert all(str(compact.get_bucket(i)) == str(chained.get_bucket(i)) for i in range(compact.get_capacity()))
+
+
+def test_grows_past_the_maximum_load_and_shrinks_back():
+    m = hash_map_sc_compact.HashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0, min_load=0.2))
+
+    for i in range(1000):
+        m.put('key' + str(i), i)
+        assert m.table_load() <= 1.0
+    grown = m.get_capacity()
+
+    for i in range(1000):
+        m.remove('key' + str(i))
+
+    assert grown > 500
+    assert m.get_capacity() == 11 and m.get_size() == 0
+
+
+def test_never_resizes_by_default():
+    m = hash_map_sc_compact.HashMap(11, hash_function_1)
+    for i in range(100):
+        m.put('key' + str(i), i)
+
+    assert m.get_capacity() == 11 and m.get_size() == 100
+
+
+def test_mapping_protocol():
+    m = hash_map_sc_compact.HashMap(11, hash_function_fnv1a)
+
+    m['a'] = 1
+    m['b'] = 2
+    m['a'] = 3
+
+    assert m['a'] == 3 and 'b' in m and 'c' not in m and len(m) == 2
+    assert sorted(m) == ['a', 'b'] and sorted(m.keys()) == ['a', 'b']
+    assert sorted(m.values()) == [2, 3] and dict(m.items()) == {'a': 3, 'b': 2}
+    assert 'a' in m.keys() and len(m.items()) == 2
+
+    del m['a']
+    with pytest.raises(KeyError):
+        m['a']
+    with pytest.raises(KeyError):
+        del m['a']
+    assert dict(m.items()) == {'b': 2}
+
+
+def test_views_reflect_later_changes_and_catch_changes_during_iteration():
+    m = hash_map_sc_compact.HashMap(11, hash_function_fnv1a)
+    keys = m.keys()
+    m['a'] = 1
+
+    assert list(keys) == ['a']
+
+    m['b'] = 2
+    with pytest.raises(RuntimeError):
+        for key in m:
+            m[key + key] = 0
@@ -0,0 +1,77 @@
+# Description: Tests for the sharded hash map's process-pool bulk loads.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import DynamicArray, hash_function_builtin, hash_function_fnv1a
+from hash_map_sharded import ShardedHashMap, find_mode
+
+
+@pytest.mark.parametrize('map_type, options', [
+    (hash_map_sc.HashMap, {}),
+    (hash_map_oa.HashMap, {}),
+    (hash_map_oa.HashMap, {'power_of_two': True}),
+])
+def test_parallel_put_many_twice_on_the_same_map(map_type, options):
+    m = ShardedHashMap(4, map_type, 11, hash_function_fnv1a, **options)
+    expected = {}
+
+    first = [('key' + str(i), i) for i in range(20000)]
+    m.put_many(first, workers=2)
+    expected.update(first)
+
+    # Half the keys are updates of existing ones, half are new
+    second = [('key' + str(i), -i) for i in range(10000, 30000)]
+    m.put_many(second, workers=2)
+    expected.update(second)
+
+    assert m.get_size() == len(expected)
+    assert dict(m.items()) == expected
+    assert all(m.get(key) == value for key, value in expected.items())
+
+
+def test_separate_chaining_shards_grow_by_default():
+    m = ShardedHashMap(2, hash_map_sc.HashMap, 11, hash_function_fnv1a)
+    m.put_many(('key' + str(i), i) for i in range(5000))
+
+    assert m.table_load() <= 1.0
+
+
+def test_parallel_put_many_rejects_a_per_process_hash_function():
+    m = ShardedHashMap(2, hash_map_sc.HashMap, 11, hash_function_builtin)
+
+    with pytest.raises(ValueError):
+        m.put_many([('key', 1)], workers=2)
+
+
+def test_parallel_put_many_keeps_every_shard_setting():
+    m = ShardedHashMap(4, hash_map_oa.HashMap, 11, hash_function_fnv1a,
+                       probing=hash_map_oa.RobinHoodProbing(), power_of_two=True)
+    m.put_many((('key' + str(i), i) for i in range(1000)), workers=2)
+
+    for index in range(m.get_shard_count()):
+        shard = m.get_shard(index)
+        assert isinstance(shard._probing, hash_map_oa.RobinHoodProbing)
+        assert shard._power_of_two
+
+
+@pytest.mark.parametrize('workers', [2, 3, 50])
+def test_parallel_find_mode_adds_up_counts_across_chunks(workers):
+    # Every word is spread over all the chunks, and the two modes only pull
+    # ahead in the last one
+    elements = ['word' + str(i % 10) for i in range(1000)] + ['word9', 'word8']
+    da = DynamicArray(elements)
+
+    modes, frequency = find_mode(da, workers)
+    expected_modes, expected_frequency = hash_map_sc.find_mode(da)
+
+    assert frequency == expected_frequency == 101
+    assert sorted(modes.get_list()) == sorted(expected_modes.get_list()) == ['word8', 'word9']
+
+
+def test_parallel_find_mode_of_an_empty_array():
+    modes, frequency = find_mode(DynamicArray(), 2)
+
+    assert modes.length() == 0 and frequency == 0
@@ -0,0 +1,125 @@
+# Description: Tests for binary snapshots of the separate chaining and open addressing maps.
+
+
+import os
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ResizePolicy, hash_function_2, hash_function_builtin, hash_function_fnv1a
+from hash_map_snapshot import dumps_snapshot, load_snapshot, loads_snapshot, save_snapshot
+
+
+MAPS = {
+    'SC': lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, policy=ResizePolicy(max_load=1.0, min_load=0.1)),
+    'SC power of two': lambda: hash_map_sc.HashMap(11, hash_function_2, power_of_two=True,
+                                                   policy=ResizePolicy(max_load=2.0)),
+    'SC incremental': lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, incremental=True,
+                                                  policy=ResizePolicy(max_load=1.0)),
+    'OA quadratic': lambda: hash_map_oa.HashMap(11, hash_function_fnv1a),
+    'OA linear, Bloom filter': lambda: hash_map_oa.HashMap(11, hash_function_fnv1a,
+                                                           probing=hash_map_oa.LinearProbing(),
+                                                           bloom_bits_per_key=10),
+    'OA double, power of two': lambda: hash_map_oa.HashMap(11, hash_function_fnv1a,
+                                                           probing=hash_map_oa.DoubleHashing(),
+                                                           power_of_two=True),
+    'OA robin hood, incremental': lambda: hash_map_oa.HashMap(11, hash_function_fnv1a,
+                                                              probing=hash_map_oa.RobinHoodProbing(),
+                                                              policy=ResizePolicy(max_load=0.9),
+                                                              incremental=True),
+}
+
+
+def filled(name):
+    m = MAPS[name]()
+    for i in range(400):
+        m.put('key' + str(i), [i])
+    for i in range(0, 400, 4):
+        m.remove('key' + str(i))
+    return m
+
+
+def layout(m):
+    """Return what every bucket holds, with tombstones (whose removed key a snapshot drops) as 'TS'."""
+    if isinstance(m, hash_map_sc.HashMap):
+        return [[(node.key, node.value) for node in chain] for chain in m.get_buckets()]
+    return [entry if entry == None else 'TS' if entry.is_tombstone else (entry.key, entry.value)
+            for entry in m.get_buckets()]
+
+
+def settings(m):
+    return (type(m), m.get_capacity(), m._power_of_two, m._incremental, m._rehash_step, repr(m._policy),
+            getattr(m, '_bloom_bits_per_key', None), type(getattr(m, '_probing', None)))
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_file_round_trip_keeps_layout_and_settings(tmp_path, name):
+    m = filled(name)
+    path = os.path.join(tmp_path, 'map.snapshot')
+
+    save_snapshot(m, path)
+    loaded = load_snapshot(path)
+
+    assert settings(loaded) == settings(m)
+    assert layout(loaded) == layout(m)
+    assert loaded.get_size() == m.get_size() == 300
+    assert all(loaded.get('key' + str(i)) == (None if i % 4 == 0 else [i]) for i in range(400))
+    if isinstance(m, hash_map_oa.HashMap):
+        assert loaded.get_tombstone_count() == m.get_tombstone_count()
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_bytes_round_trip_gives_a_working_map(name):
+    m = filled(name)
+
+    loaded = loads_snapshot(dumps_snapshot(m))
+    for i in range(400, 600):
+        loaded.put('key' + str(i), [i])
+        m.put('key' + str(i), [i])
+    loaded.remove('key1')
+    m.remove('key1')
+
+    assert dict(loaded.items()) == dict(m.items())
+
+
+def test_empty_map_round_trip():
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+
+    loaded = loads_snapshot(dumps_snapshot(m))
+
+    assert loaded.get_size() == 0 and loaded.get_capacity() == 11
+
+
+def test_other_data_is_rejected(tmp_path):
+    path = os.path.join(tmp_path, 'map.snapshot')
+    with open(path, 'wb') as file:
+        file.write(b'not a snapshot at all')
+
+    with pytest.raises(ValueError):
+        load_snapshot(path)
+    with pytest.raises(ValueError):
+        loads_snapshot(b'not a snapshot at all')
+
+
+def test_a_per_process_hash_function_is_rejected(tmp_path):
+    m = hash_map_sc.HashMap(11, hash_function_builtin)
+    m.put('a', 1)
+
+    with pytest.raises(ValueError):
+        save_snapshot(m, os.path.join(tmp_path, 'map.snapshot'))
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_a_failed_save_leaves_no_partial_file(tmp_path):
+    m = hash_map_sc.HashMap(11, hash_function_fnv1a)
+    m.put('a', 1)
+
+    # Renaming the written file over a directory fails
+    path = os.path.join(tmp_path, 'map.snapshot')
+    os.mkdir(path)
+    with pytest.raises(OSError):
+        save_snapshot(m, path)
+
+    assert os.listdir(tmp_path) == ['map.snapshot']
@@ -0,0 +1,208 @@
+# Description: Tests for the probe counts recorded by hash_map_stats.
+
+
+import os
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ResizePolicy, describe_hash_function, hash_function_fnv1a
+from hash_map_mmap import MappedHashMap, build_mapped
+from hash_map_sharded import ShardedHashMap
+from hash_map_snapshot import dumps_snapshot, loads_snapshot
+from hash_map_stats import disable_stats, enable_stats
+from hash_vectorized import is_accelerated, is_vectorized, np
+
+
+def hash_number(key: str) -> int:
+    """Hash 'k<n>' to n, so tests can choose the buckets keys land in."""
+    return int(key[1:])
+
+
+def maps():
+    return [
+        hash_map_sc.HashMap(11, hash_number, policy=ResizePolicy(max_load=1.0)),
+        hash_map_oa.HashMap(11, hash_number),
+        hash_map_oa.HashMap(11, hash_number, probing=hash_map_oa.RobinHoodProbing(),
+                            policy=ResizePolicy(max_load=0.7)),
+    ]
+
+
+@pytest.mark.parametrize('m', maps())
+def test_every_single_key_operation_is_recorded(m):
+    stats = enable_stats(m)
+
+    m.put('k1', 1)
+    m.get('k1')
+    m.contains_key('k1')
+    m.setdefault('k2', 2)
+    m.update_with('k2', lambda value: value * 10)
+    m.increment('k3')
+    m['k4'] = 4
+    m['k4']
+    'k4' in m
+    del m['k4']
+    m.remove('k3')
+
+    counts = {operation: sum(histogram.values()) for operation, histogram in stats.probes.items()}
+    assert counts == {'get': 1, 'contains_key': 2, 'put': 2, 'remove': 2, 'setdefault': 1,
+                      'update_with': 1, 'increment': 1, '__getitem__': 1}
+
+
+@pytest.mark.parametrize('m', maps())
+def test_a_miss_on_an_empty_bucket_examines_nothing(m):
+    stats = enable_stats(m)
+
+    m.get('k5')
+
+    assert stats.probes['get'] == {0: 1}
+
+
+@pytest.mark.parametrize('m', maps())
+def test_a_hit_in_the_home_bucket_examines_one_entry(m):
+    stats = enable_stats(m)
+    m.put('k1', 1)
+
+    assert m['k1'] == 1
+    assert stats.probes['__getitem__'] == {1: 1}
+
+
+def test_robin_hood_misses_stop_at_a_richer_entry():
+    linear = hash_map_oa.HashMap(11, hash_number, probing=hash_map_oa.LinearProbing(),
+                                 policy=ResizePolicy(max_load=0.7))
+    robin_hood = hash_map_oa.HashMap(11, hash_number, probing=hash_map_oa.RobinHoodProbing(),
+                                     policy=ResizePolicy(max_load=0.7))
+
+    for m in (linear, robin_hood):
+        for key in ('k0', 'k1', 'k2'):
+            m.put(key, key)
+        enable_stats(m)
+
+        # k11 starts at bucket 0, ahead of k1 and k2 in their home buckets
+        assert m.get('k11') == None
+
+    # Linear probing runs on to the empty bucket after k2, Robin Hood stops
+    # at k1, which sits in its own home bucket
+    assert enable_stats(linear).probes['get'] == {3: 1}
+    assert enable_stats(robin_hood).probes['get'] == {2: 1}
+
+
+def test_put_is_counted_after_the_resize_it_triggers():
+    m = hash_map_oa.HashMap(11, hash_number)
+    for key in ('k0', 'k1', 'k2', 'k3', 'k4', 'k5'):
+        m.put(key, key)
+    stats = enable_stats(m)
+
+    # The table grows to 23 buckets first, where bucket 11 is empty, while
+    # in the old table k11 would have probed past k0, k1 and k4
+    m.put('k11', 11)
+
+    assert m.get_capacity() == 23
+    assert stats.probes['put'] == {0: 1}
+
+
+@pytest.mark.parametrize('options', [{}, {'bloom_bits_per_key': 10}, {'incremental': True}])
+def test_recording_does_not_change_results(options):
+    plain = hash_map_oa.HashMap(11, hash_function_fnv1a, **options)
+    watched = hash_map_oa.HashMap(11, hash_function_fnv1a, **options)
+    enable_stats(watched)
+
+    for i in range(2000):
+        key = 'key' + str(i * 7 % 500)
+        for m in (plain, watched):
+            if i % 3 == 0:
+                m.remove(key)
+            else:
+                m.increment(key)
+
+    assert dict(watched.items()) == dict(plain.items())
+    assert [watched.get('key' + str(i)) for i in range(600)] == [plain.get('key' + str(i)) for i in range(600)]
+
+
+@pytest.mark.parametrize('m', maps())
+def test_disable_stats_detaches_everything(m):
+    stats = enable_stats(m)
+    m.put('k1', 1)
+
+    assert disable_stats(m) is stats
+    assert m._stats is None
+
+    m.put('k2', 2)
+    m['k2']
+    assert sum(stats.probes['put'].values()) == 1
+    assert stats.probes['__getitem__'] == {}
+
+
+@pytest.mark.parametrize('m', maps())
+def test_resizes_are_counted_and_timed(m):
+    stats = enable_stats(m)
+
+    m.resize_table(50)
+
+    assert stats.resizes == 1 and stats.resize_seconds > 0
+
+
+def test_batch_lookups_do_not_count_toward_the_next_operation():
+    m = hash_map_oa.HashMap(11, hash_number, probing=hash_map_oa.LinearProbing(),
+                            policy=ResizePolicy(max_load=0.7))
+    for key in ('k0', 'k11', 'k22'):
+        m.put(key, key)
+    stats = enable_stats(m)
+
+    m.get_many(['k22', 'k33'])
+    m.remove_many(['k44'])
+    m.get('k5')
+
+    assert stats.probes['get'] == {0: 1}
+
+
+def test_stats_leave_the_hash_function_alone():
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    stats = enable_stats(m)
+    m.put('key', 1)
+
+    # So describe_hash_function() and the batch hashing paths still know it
+    assert m._hash_function is hash_function_fnv1a
+    assert describe_hash_function(m._hash_function) == describe_hash_function(hash_function_fnv1a)
+    assert is_accelerated(m._hash_function) or is_vectorized(m._hash_function) or np == None
+    assert stats.as_dict()['hash_calls'] == 1 and stats.as_dict()['hash_seconds_per_call'] > 0
+
+
+@pytest.mark.parametrize('map_type', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_maps_with_stats_enabled_can_be_snapshotted(map_type):
+    m = map_type(11, hash_function_fnv1a)
+    enable_stats(m)
+    for i in range(100):
+        m.put('key' + str(i), i)
+
+    loaded = loads_snapshot(dumps_snapshot(m))
+
+    assert dict(loaded.items()) == dict(m.items())
+    assert loaded._stats is None
+
+
+def test_maps_with_stats_enabled_can_be_memory_mapped(tmp_path):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    enable_stats(m)
+    for i in range(100):
+        m.put('key' + str(i), i)
+    path = os.path.join(tmp_path, 'map.bin')
+
+    build_mapped(m, path)
+    mapped = MappedHashMap(path)
+
+    assert all(mapped.get('key' + str(i)) == i for i in range(100))
+    mapped.close()
+
+
+def test_sharded_maps_with_stats_enabled_build_in_parallel():
+    m = ShardedHashMap(2, hash_map_oa.HashMap, 11, hash_function_fnv1a)
+    for index in range(m.get_shard_count()):
+        enable_stats(m.get_shard(index))
+
+    # The shards come back from the workers as new maps, without stats
+    m.put_many((('key' + str(i), i) for i in range(1000)), workers=2)
+
+    assert dict(m.items()) == {'key' + str(i): i for i in range(1000)}
+    assert all(m.get_shard(index)._stats is None for index in range(m.get_shard_count()))
@@ -0,0 +1,75 @@
+# Description: Tests for the NumPy vectorized hashing of key batches.
+
+
+import tracemalloc
+
+import pytest
+
+import hash_vectorized
+from base_structures import (MixedHash, accelerator, hash_function_1,
+                             hash_function_2, hash_function_fnv1a)
+
+pytest.importorskip('numpy')
+
+
+FUNCTIONS = [hash_function_1, hash_function_2, hash_function_fnv1a, MixedHash(hash_function_fnv1a)]
+
+
+@pytest.mark.parametrize('function', FUNCTIONS)
+def test_long_outlier_key_matches_scalar_hashes_without_padding_every_row(function):
+    keys = ['key' + str(i) for i in range(20000)]
+    keys.insert(777, 'x' * 5000)
+
+    tracemalloc.start()
+    try:
+        hashes = hash_vectorized.hash_many(function, keys)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert hashes == [function(key) for key in keys]
+    # Padding all 20000 rows to 5000 characters would take hundreds of MiB
+    assert peak < 32 * 2 ** 20
+
+
+@pytest.mark.parametrize('function', FUNCTIONS)
+def test_each_backend_hashes_batches_its_fastest_way(function, monkeypatch):
+    keys = ['key' + str(i) for i in range(1000)]
+    chunked = []
+    hash_chunks = hash_vectorized._hash_chunks
+    monkeypatch.setattr(hash_vectorized, '_hash_chunks', lambda *args: chunked.append(1) or hash_chunks(*args))
+
+    hashes = hash_vectorized.hash_many(function, keys)
+
+    # The accelerator's functions are called directly, the Python ones are
+    # computed with NumPy
+    assert hash_vectorized.is_accelerated(function) == (accelerator != None)
+    assert hash_vectorized.is_vectorized(function) == (accelerator == None)
+    assert bool(chunked) == (accelerator == None)
+    assert hashes == [function(key) for key in keys]
+
+
+@pytest.mark.parametrize('function', FUNCTIONS)
+def test_chunks_of_wide_keys_are_cut_to_the_cell_budget(function, monkeypatch):
+    monkeypatch.setattr(hash_vectorized, 'CHUNK_CELLS', 1000)
+    keys = ['k' * (i % 300) + str(i) for i in range(2000)]
+
+    assert hash_vectorized.hash_many(function, keys) == [function(key) for key in keys]
+
+
+@pytest.mark.parametrize('function', FUNCTIONS)
+def test_empty_and_non_ascii_keys_match_scalar_hashes(function):
+    keys = ['', 'a', 'é', 'naïve', '日本語', '🙂' * 3, 'mixed ascii ü 字 🙂', '\x00', 'a\x00b']
+
+    assert hash_vectorized.hash_many(function, keys) == [function(key) for key in keys]
+    assert hash_vectorized.hash_many(function, []) == []
+
+
+def test_functions_it_does_not_know_are_called_per_key():
+    def length(key):
+        return len(key)
+
+    assert not hash_vectorized.is_vectorized(length) and not hash_vectorized.is_accelerated(length)
+    assert hash_vectorized.hash_many(length, iter(['a', 'bb', ''])) == [1, 2, 0]
+    assert hash_vectorized.hash_many(MixedHash(length), ('a', 'bb')) == [MixedHash(length)('a'),
+                                                                        MixedHash(length)('bb')]
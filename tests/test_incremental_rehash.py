@@ -0,0 +1,122 @@
+# Description: Tests for incremental rehashing in both maps.
+
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ResizePolicy, hash_function_fnv1a
+
+
+MAPS = {
+    'SC': lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, incremental=True, rehash_step=2,
+                                      policy=ResizePolicy(max_load=1.0)),
+    'SC power of two': lambda: hash_map_sc.HashMap(11, hash_function_fnv1a, incremental=True, rehash_step=2,
+                                                   policy=ResizePolicy(max_load=1.0), power_of_two=True),
+    'OA': lambda: hash_map_oa.HashMap(11, hash_function_fnv1a, incremental=True, rehash_step=2),
+    'OA robin hood': lambda: hash_map_oa.HashMap(11, hash_function_fnv1a, incremental=True, rehash_step=2,
+                                                 probing=hash_map_oa.RobinHoodProbing(),
+                                                 policy=ResizePolicy(max_load=0.9)),
+}
+
+
+@pytest.fixture(params=MAPS.values(), ids=MAPS.keys())
+def new_map(request):
+    return request.param
+
+
+def filled(new_map, count=100):
+    m = new_map()
+    for i in range(count):
+        m.put('key' + str(i), i)
+    m.rehash_step(m.get_capacity() + 1000)
+    return m
+
+
+def test_resize_table_only_starts_the_migration(new_map):
+    m = filled(new_map)
+    old_capacity = m.get_capacity()
+
+    m.resize_table(1000)
+
+    assert m.is_rehashing()
+    assert m._rehash_index == 0 and m._old_capacity == old_capacity
+    assert m.get_size() == 100
+    assert all(m.get('key' + str(i)) == i for i in range(100))
+
+
+def test_each_operation_moves_a_bounded_number_of_buckets(new_map):
+    m = filled(new_map)
+    m.resize_table(1000)
+    old_capacity = m._old_capacity
+
+    operations = 0
+    while m.is_rehashing():
+        index = m._rehash_index
+        m.get('key' + str(operations % 100))
+        operations += 1
+        if m.is_rehashing():
+            assert m._rehash_index - index == 2
+
+    assert operations == -(-old_capacity // 2)
+    assert all(m.get('key' + str(i)) == i for i in range(100))
+
+
+def test_operations_during_the_migration(new_map):
+    m = filled(new_map)
+    expected = {'key' + str(i): i for i in range(100)}
+    m.resize_table(1000)
+    rng = random.Random(2)
+
+    for i in range(300):
+        key = 'key' + str(rng.randrange(150))
+        if i % 3 == 0:
+            m.remove(key)
+            expected.pop(key, None)
+        else:
+            m.put(key, -i)
+            expected[key] = -i
+
+        # Every pair is reported exactly once, from whichever table holds it
+        if i % 25 == 0:
+            pairs = m.get_keys_and_values().get_list()
+            assert len(pairs) == len(expected) and dict(pairs) == expected
+
+    assert m.get_size() == len(expected)
+    assert all(m.get(key) == value and m.contains_key(key) for key, value in expected.items())
+
+
+def test_growth_from_put_is_incremental(new_map):
+    m = new_map()
+
+    rehashing_seen = False
+    for i in range(200):
+        m.put('key' + str(i), i)
+        rehashing_seen |= m.is_rehashing()
+
+    assert rehashing_seen
+    assert all(m.get('key' + str(i)) == i for i in range(200))
+
+
+def test_a_second_resize_finishes_the_first_migration(new_map):
+    m = filled(new_map)
+    m.resize_table(500)
+    m.get('key1')
+
+    m.resize_table(1000)
+
+    assert m._old_capacity >= 500
+    assert dict(m.get_keys_and_values().get_list()) == {'key' + str(i): i for i in range(100)}
+
+
+def test_clear_abandons_the_migration(new_map):
+    m = filled(new_map)
+    m.resize_table(1000)
+
+    m.clear()
+
+    assert not m.is_rehashing() and m.get_size() == 0 and m.get('key1') == None
+    m.put('key1', 1)
+    assert m.get('key1') == 1
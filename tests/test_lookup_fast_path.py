@@ -0,0 +1,140 @@
+# Description: Tests that the direct lookup paths find exactly what the generic probe walk does.
+
+
+import random
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import HashEntry, ResizePolicy, hash_function_1, hash_function_fnv1a
+from hash_map_stats import enable_stats
+
+
+PROBING = {
+    'quadratic': (hash_map_oa.QuadraticProbing, 0.5),
+    'linear': (hash_map_oa.LinearProbing, 0.7),
+    'double': (hash_map_oa.DoubleHashing, 0.7),
+    'robin hood': (hash_map_oa.RobinHoodProbing, 0.9),
+}
+
+MODES = {
+    'prime': {},
+    'power of two': {'power_of_two': True},
+    'bloom': {'bloom_bits_per_key': 10},
+}
+
+
+def generic_find_index(m, key, hash):
+    """
+    The lookup every fast path must agree with: ask the probing strategy
+    for each bucket in turn, through the DynamicArray's checked accessors.
+    """
+    buckets, capacity, probing = m.get_buckets(), m.get_capacity(), m._probing
+    index = hash % capacity
+    step = probing.step(key, hash, capacity)
+
+    for j in range(capacity):
+        if j > 0:
+            index = probing.next_index(index, j, step, capacity)
+        entry = buckets.get_at_index(index)
+        if entry == None:
+            return None
+        if entry.is_tombstone == False:
+            if entry.hash == hash and entry.key == key:
+                return index
+            # Robin Hood: the key would have displaced this entry
+            if probing.robin_hood and (index - entry.hash % capacity) % capacity < j:
+                return None
+    return None
+
+
+@pytest.fixture(params=[(probing, mode) for probing in PROBING for mode in MODES],
+                ids=[f"{probing}, {mode}" for probing in PROBING for mode in MODES])
+def churned_map(request):
+    """A map with a mix of live entries and tombstones, and the keys it holds."""
+    probing, mode = request.param
+    probing_type, max_load = PROBING[probing]
+    m = hash_map_oa.HashMap(11, hash_function_1, probing=probing_type(),
+                            policy=ResizePolicy(max_load=max_load), **MODES[mode])
+    rng = random.Random(9)
+    live = set()
+
+    # hash_function_1 collides a lot, so the probe sequences get long
+    for i in range(3000):
+        key = 'k' + str(rng.randrange(300))
+        if rng.random() < 0.6:
+            m.put(key, i)
+            live.add(key)
+        else:
+            m.remove(key)
+            live.discard(key)
+    return m, live
+
+
+@pytest.mark.parametrize('stats', [False, True])
+def test_find_index_matches_the_generic_walk(churned_map, stats):
+    m, live = churned_map
+    if stats:
+        enable_stats(m)
+
+    for key in ['k' + str(i) for i in range(400)]:
+        hash = m._hash_function(key)
+        expected = generic_find_index(m, key, hash)
+
+        assert (expected != None) == (key in live)
+        assert m._find_index(key, hash, m.get_buckets(), m.get_capacity()) == expected
+        assert m._find_index(key, hash, m.get_buckets().get_list(), m.get_capacity()) == expected
+
+
+def test_public_lookups_match_the_generic_walk(churned_map):
+    m, live = churned_map
+
+    for key in ['k' + str(i) for i in range(400)]:
+        index = generic_find_index(m, key, m._hash_function(key))
+        value = None if index == None else m.get_buckets()[index].value
+
+        assert m.get(key) == value
+        assert m.contains_key(key) == (key in m) == (index != None)
+        if index == None:
+            with pytest.raises(KeyError):
+                m[key]
+        else:
+            assert m[key] == value
+
+
+@pytest.mark.parametrize('probing', [hash_map_oa.QuadraticProbing(), hash_map_oa.LinearProbing(),
+                                     hash_map_oa.DoubleHashing()])
+@pytest.mark.parametrize('capacity', [11, 16])
+def test_a_table_without_empty_buckets_still_ends_a_miss(probing, capacity):
+    m = hash_map_oa.HashMap(capacity, hash_function_fnv1a, probing=probing,
+                            power_of_two=capacity == 16)
+    buckets = m.get_buckets().get_list()
+    for index in range(len(buckets)):
+        buckets[index] = HashEntry('gone' + str(index), None, index)
+        buckets[index].is_tombstone = True
+
+    assert m.get('missing') == None and not m.contains_key('missing')
+
+
+@pytest.mark.parametrize('map_type', [hash_map_sc.HashMap, hash_map_oa.HashMap])
+def test_lookups_during_a_rehash_match_those_after_it(map_type):
+    policy = ResizePolicy(max_load=1.0 if map_type is hash_map_sc.HashMap else 0.5)
+    rehashing = map_type(11, hash_function_fnv1a, incremental=True, rehash_step=1, policy=policy)
+    settled = map_type(11, hash_function_fnv1a, policy=policy)
+    for m in (rehashing, settled):
+        for i in range(500):
+            m.put('key' + str(i), i if i % 7 else None)
+    rehashing.resize_table(5000)
+    assert rehashing.is_rehashing()
+
+    # The slow path runs while the old table is still being emptied
+    for i in range(0, 600, 3):
+        key = 'key' + str(i)
+        assert rehashing.get(key) == settled.get(key)
+        assert rehashing.contains_key(key) == settled.contains_key(key)
+        rehashing.remove(key)
+        settled.remove(key)
+
+    assert rehashing.is_rehashing()
+    assert dict(rehashing.items()) == dict(settled.items())
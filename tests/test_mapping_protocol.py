@@ -0,0 +1,116 @@
+# Description: Tests for the mapping protocol and views of both hash maps.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ItemsView, KeysView, ResizePolicy, ValuesView, hash_function_fnv1a
+
+
+MAPS = {
+    'SC': lambda **options: hash_map_sc.HashMap(11, hash_function_fnv1a,
+                                                policy=ResizePolicy(max_load=1.0, min_load=0.1), **options),
+    'OA': lambda **options: hash_map_oa.HashMap(11, hash_function_fnv1a,
+                                                policy=ResizePolicy(max_load=0.5, min_load=0.1), **options),
+    'OA incremental': lambda **options: hash_map_oa.HashMap(11, hash_function_fnv1a, incremental=True,
+                                                            rehash_step=1, **options),
+}
+
+
+@pytest.fixture(params=MAPS.values(), ids=MAPS.keys())
+def new_map(request):
+    return request.param
+
+
+def test_item_access(new_map):
+    m = new_map()
+
+    m['a'] = 1
+    m['b'] = None
+    m['a'] = 2
+
+    assert m['a'] == 2 and m['b'] == None
+    assert len(m) == 2 and 'a' in m and 'b' in m and 'c' not in m
+    with pytest.raises(KeyError):
+        m['c']
+
+
+def test_del(new_map):
+    m = new_map()
+    m['a'] = 1
+
+    del m['a']
+
+    assert len(m) == 0 and 'a' not in m
+    with pytest.raises(KeyError):
+        del m['a']
+
+
+def test_iteration_matches_a_dict(new_map):
+    m = new_map()
+    expected = {'key' + str(i): i for i in range(300)}
+    for key, value in expected.items():
+        m[key] = value
+    for i in range(0, 300, 4):
+        del m['key' + str(i)]
+        del expected['key' + str(i)]
+
+    assert sorted(m) == sorted(expected)
+    assert sorted(m.keys()) == sorted(expected.keys())
+    assert sorted(m.values()) == sorted(expected.values())
+    assert dict(m.items()) == expected
+    # Keys, values and items come out in the same order, like a dict's views
+    assert list(zip(m.keys(), m.values())) == list(m.items())
+
+
+def test_views_are_live(new_map):
+    m = new_map()
+    keys, values, items = m.keys(), m.values(), m.items()
+    assert isinstance(keys, KeysView) and isinstance(values, ValuesView) and isinstance(items, ItemsView)
+
+    m['a'] = 1
+    m['b'] = 2
+
+    assert len(keys) == len(values) == len(items) == 2
+    assert 'a' in keys and 'c' not in keys
+    assert ('a', 1) in items and ('a', 2) not in items and ('c', 1) not in items
+    assert sorted(values) == [1, 2]
+
+    del m['a']
+    assert list(keys) == ['b'] and repr(keys) == "KeysView(['b'])"
+
+
+def test_iterating_walks_the_entries_in_place(new_map):
+    m = new_map()
+    for i in range(20):
+        m['key' + str(i)] = [i]
+
+    # No copies are made, so the stored objects themselves come back
+    assert all(value is m[key] for key, value in m.items())
+
+
+@pytest.mark.parametrize('change', [
+    lambda m: m.put('new', 0),
+    lambda m: m.remove('key3'),
+    lambda m: m.resize_table(500),
+])
+def test_changing_the_map_during_iteration_raises(new_map, change):
+    m = new_map()
+    for i in range(20):
+        m['key' + str(i)] = i
+
+    with pytest.raises(RuntimeError):
+        for key in m:
+            change(m)
+
+
+def test_overwriting_during_iteration_is_allowed(new_map):
+    m = new_map()
+    for i in range(20):
+        m['key' + str(i)] = i
+
+    for key in m:
+        m[key] = -m[key]
+
+    assert dict(m.items()) == {'key' + str(i): -i for i in range(20)}
@@ -0,0 +1,75 @@
+# Description: Tests for the power of two capacity mode of both maps.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import (MixedHash, ResizePolicy, hash_function_1,
+                             hash_function_fnv1a, mix_hash)
+
+
+MAPS = {
+    'SC': lambda capacity, function: hash_map_sc.HashMap(capacity, function, power_of_two=True,
+                                                         policy=ResizePolicy(max_load=1.0, min_load=0.1)),
+    'OA': lambda capacity, function: hash_map_oa.HashMap(capacity, function, power_of_two=True,
+                                                         policy=ResizePolicy(max_load=0.5, min_load=0.1)),
+}
+
+
+@pytest.mark.parametrize('name', MAPS)
+@pytest.mark.parametrize('capacity, rounded', [(1, 1), (2, 2), (11, 16), (16, 16), (1000, 1024)])
+def test_capacities_round_up_to_a_power_of_two(name, capacity, rounded):
+    assert MAPS[name](capacity, hash_function_fnv1a).get_capacity() == rounded
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_capacity_stays_a_power_of_two_through_resizes(name):
+    m = MAPS[name](8, hash_function_fnv1a)
+
+    capacities = set()
+    for i in range(2000):
+        m.put('key' + str(i), i)
+        capacities.add(m.get_capacity())
+    for i in range(1990):
+        m.remove('key' + str(i))
+        capacities.add(m.get_capacity())
+    m.resize_table(3000)
+    capacities.add(m.get_capacity())
+
+    assert all(capacity & (capacity - 1) == 0 for capacity in capacities)
+    assert dict(m.items()) == {'key' + str(i): i for i in range(1990, 2000)}
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_keys_are_placed_by_the_low_bits_of_the_mixed_hash(name):
+    m = MAPS[name](64, hash_function_fnv1a)
+    for i in range(20):
+        m.put('key' + str(i), i)
+
+    assert isinstance(m._hash_function, MixedHash)
+    for index, bucket in enumerate(m.get_buckets()):
+        entries = [] if bucket == None else list(bucket) if name == 'SC' else [bucket]
+        for entry in entries:
+            assert entry.hash == mix_hash(hash_function_fnv1a(entry.key))
+            if name == 'SC':
+                assert entry.hash & 63 == index
+
+
+def test_mixing_spreads_hashes_that_only_differ_in_high_bits():
+    hashes = [i << 32 for i in range(256)]
+
+    assert len({hash & 255 for hash in hashes}) == 1
+    assert len({mix_hash(hash) & 255 for hash in hashes}) > 150
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_a_poor_hash_function_still_spreads(name):
+    # hash_function_1 gives 'key0'..'key999' only a few dozen distinct sums,
+    # all close together, which the mixing scatters over the whole table
+    m = MAPS[name](1024, hash_function_1)
+    for i in range(200):
+        m.put('key' + str(i), i)
+
+    assert all(m.get('key' + str(i)) == i for i in range(200))
+    assert m.get_capacity() == 1024
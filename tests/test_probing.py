@@ -0,0 +1,106 @@
+# Description: Tests for the open addressing map's probing strategies.
+
+
+import pytest
+
+import hash_map_oa
+from base_structures import ResizePolicy, hash_function_1, hash_function_fnv1a
+
+
+def probe_sequence(probing, key, hash, capacity):
+    """Return the buckets a lookup of the key would visit, in order."""
+    index = hash % capacity
+    sequence = [index]
+    for j in range(1, capacity):
+        if j == 1:
+            step = probing.step(key, hash, capacity)
+        index = probing.next_index(index, j, step, capacity)
+        sequence.append(index)
+    return sequence
+
+
+@pytest.mark.parametrize('capacity', [11, 101, 16, 128])
+@pytest.mark.parametrize('probing', [hash_map_oa.LinearProbing(), hash_map_oa.DoubleHashing(),
+                                     hash_map_oa.DoubleHashing(hash_function_1)])
+def test_linear_and_double_hashing_visit_every_bucket(probing, capacity):
+    for i in range(50):
+        key = 'key' + str(i)
+        sequence = probe_sequence(probing, key, hash_function_fnv1a(key), capacity)
+        assert sorted(sequence) == list(range(capacity))
+
+
+@pytest.mark.parametrize('capacity', [11, 101])
+def test_quadratic_probing_reaches_half_a_prime_table(capacity):
+    sequence = probe_sequence(hash_map_oa.QuadraticProbing(), 'key', 5, capacity)
+
+    assert sequence[:4] == [5, 6, 9, 14 % capacity]
+    assert len(set(sequence)) == (capacity + 1) // 2
+
+
+@pytest.mark.parametrize('capacity', [16, 128])
+def test_quadratic_probing_reaches_every_bucket_of_a_power_of_two_table(capacity):
+    sequence = probe_sequence(hash_map_oa.QuadraticProbing(), 'key', 5, capacity)
+
+    assert sequence[:4] == [5, 6, 8, 11]
+    assert sorted(sequence) == list(range(capacity))
+
+
+def test_double_hashing_separates_keys_that_share_a_home_bucket():
+    probing = hash_map_oa.DoubleHashing()
+
+    steps = {probing.step('key', hash, 101) for hash in range(7, 7 + 101 * 20, 101)}
+
+    assert len(steps) > 10
+
+
+@pytest.mark.parametrize('max_load', [0.7, 0.9])
+def test_robin_hood_keeps_probe_distances_even(max_load):
+    m = hash_map_oa.HashMap(101, hash_function_fnv1a, probing=hash_map_oa.RobinHoodProbing(),
+                            policy=ResizePolicy(max_load=max_load))
+    for i in range(int(101 * max_load)):
+        m.put('key' + str(i), i)
+    for i in range(0, int(101 * max_load), 4):
+        m.remove('key' + str(i))
+
+    # Walking the table, an entry is never more than one bucket further
+    # from home than the one before it, or it would have displaced it
+    buckets = m.get_buckets().get_list()
+    capacity = m.get_capacity()
+    for index in range(capacity):
+        entry, following = buckets[index], buckets[(index + 1) % capacity]
+        if following == None:
+            continue
+        distance = (index + 1 - following.hash % capacity) % capacity
+        previous = -1 if entry == None else (index - entry.hash % capacity) % capacity
+        assert distance <= previous + 1
+
+
+class StepOfThree(hash_map_oa.LinearProbing):
+    """Custom strategy probing every third bucket."""
+
+    def next_index(self, index: int, j: int, step: int, capacity: int) -> int:
+        return (index + 3) % capacity
+
+
+def test_custom_strategies_can_be_plugged_in():
+    m = hash_map_oa.HashMap(11, hash_function_1, probing=StepOfThree())
+    for key in ('abc', 'bca', 'cab', 'z'):
+        m.put(key, key)
+
+    # hash_function_1 puts the anagrams in the same home bucket
+    index = hash_function_1('abc') % m.get_capacity()
+    assert [m.get_buckets()[(index + 3 * j) % 11].key for j in range(3)] == ['abc', 'bca', 'cab']
+    assert all(m.get(key) == key for key in ('abc', 'bca', 'cab', 'z'))
+
+    with pytest.raises(ValueError):
+        hash_map_oa.describe_probing(StepOfThree())
+
+
+@pytest.mark.parametrize('probing', [hash_map_oa.LinearProbing(), hash_map_oa.QuadraticProbing(),
+                                     hash_map_oa.DoubleHashing(), hash_map_oa.DoubleHashing(hash_function_1),
+                                     hash_map_oa.RobinHoodProbing()])
+def test_built_in_strategies_can_be_described_and_reloaded(probing):
+    loaded = hash_map_oa.load_probing(hash_map_oa.describe_probing(probing))
+
+    assert type(loaded) is type(probing)
+    assert loaded.step('key', 12345, 101) == probing.step('key', 12345, 101)
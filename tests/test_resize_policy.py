@@ -0,0 +1,105 @@
+# Description: Tests for ResizePolicy and the automatic resizing it drives in both maps.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import ResizePolicy, hash_function_fnv1a
+
+
+@pytest.mark.parametrize('arguments', [
+    {'max_load': 0},
+    {'max_load': -1.0},
+    {'min_load': -0.1},
+    {'growth_factor': 1.0},
+    {'max_load': 1.0, 'min_load': 0.5, 'growth_factor': 2.0},
+])
+def test_inconsistent_thresholds_are_rejected(arguments):
+    with pytest.raises(ValueError):
+        ResizePolicy(**arguments)
+
+
+def test_grown_and_shrunk_capacities():
+    policy = ResizePolicy(max_load=1.0, growth_factor=1.5)
+
+    assert policy.grown(10) == 15 and policy.grown(1) == 2
+    assert policy.shrunk(15) == 10
+
+
+MAPS = {
+    'SC': lambda policy: hash_map_sc.HashMap(11, hash_function_fnv1a, policy=policy),
+    'OA': lambda policy: hash_map_oa.HashMap(11, hash_function_fnv1a, policy=policy),
+}
+
+
+def test_separate_chaining_never_resizes_by_default():
+    m = hash_map_sc.HashMap(11, hash_function_fnv1a)
+    for i in range(500):
+        m.put('key' + str(i), i)
+    for i in range(500):
+        m.remove('key' + str(i))
+
+    assert m.get_capacity() == 11
+
+
+def test_open_addressing_grows_at_half_load_by_default():
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    for i in range(6):
+        m.put('key' + str(i), i)
+    assert m.get_capacity() == 11
+
+    m.put('key6', 6)
+    assert m.get_capacity() == 23
+
+
+@pytest.mark.parametrize('name', MAPS)
+@pytest.mark.parametrize('growth_factor', [1.5, 2.0, 4.0])
+def test_growth_factor_sets_the_next_capacity(name, growth_factor):
+    m = MAPS[name](ResizePolicy(max_load=0.5, growth_factor=growth_factor))
+    capacities = [m.get_capacity()]
+
+    for i in range(300):
+        m.put('key' + str(i), i)
+        if m.get_capacity() != capacities[-1]:
+            capacities.append(m.get_capacity())
+
+    # Rounded up to the next prime
+    assert len(capacities) > 2
+    for smaller, larger in zip(capacities, capacities[1:]):
+        assert int(smaller * growth_factor) <= larger < int(smaller * growth_factor) + 20
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_removals_shrink_back_down_to_the_starting_capacity(name):
+    m = MAPS[name](ResizePolicy(max_load=0.5, min_load=0.1))
+    for i in range(1000):
+        m.put('key' + str(i), i)
+    grown = m.get_capacity()
+
+    for i in range(990):
+        m.remove('key' + str(i))
+        assert m.get_capacity() == 11 or m.get_size() / m.get_capacity() >= 0.1
+
+    assert grown > 2000 and m.get_capacity() < 200
+    for i in range(990, 1000):
+        m.remove('key' + str(i))
+    assert m.get_capacity() == 11
+    assert m.get_size() == 0
+
+
+@pytest.mark.parametrize('name', MAPS)
+def test_batches_resize_to_what_one_key_at_a_time_would(name):
+    policy = ResizePolicy(max_load=0.5, min_load=0.1)
+    one_by_one, batched = MAPS[name](policy), MAPS[name](policy)
+    keys = ['key' + str(i) for i in range(1000)]
+
+    for key in keys:
+        one_by_one.put(key, key)
+    batched.put_many((key, key) for key in keys)
+    assert batched.get_capacity() == one_by_one.get_capacity()
+
+    for key in keys[:950]:
+        one_by_one.remove(key)
+    batched.remove_many(keys[:950])
+    assert batched.get_capacity() == one_by_one.get_capacity()
@@ -0,0 +1,94 @@
+# Description: Tests for tombstone accounting and purging in the open addressing map.
+
+
+import random
+
+import pytest
+
+import hash_map_oa
+from base_structures import ResizePolicy, hash_function_fnv1a
+
+
+PROBING = [hash_map_oa.QuadraticProbing, hash_map_oa.LinearProbing, hash_map_oa.DoubleHashing]
+
+
+def test_removals_leave_tombstones_that_inserts_reuse():
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a)
+    for i in range(5):
+        m.put('key' + str(i), i)
+
+    m.remove('key1')
+    m.remove('key3')
+    m.remove('key3')
+
+    assert m.get_size() == 3 and m.get_tombstone_count() == 2
+    assert m.empty_buckets() == m.get_capacity() - 5
+
+    m.put('key1', 10)
+
+    assert m.get_tombstone_count() == 1 and m.get('key1') == 10
+
+
+@pytest.mark.parametrize('probing', PROBING)
+def test_tombstones_are_purged_at_the_same_capacity(probing):
+    m = hash_map_oa.HashMap(101, hash_function_fnv1a, probing=probing(), policy=ResizePolicy(max_load=0.5))
+    for i in range(50):
+        m.put('key' + str(i), i)
+    for i in range(45):
+        m.remove('key' + str(i))
+
+    # Live entries stay below half the threshold, tombstones push past it
+    for i in range(100, 120):
+        m.put('key' + str(i), i)
+        assert (m.get_size() + m.get_tombstone_count() - 1) / m.get_capacity() < 0.5
+
+    assert m.get_capacity() == 101 and m.get_tombstone_count() == 0
+    assert dict(m.items()) == {'key' + str(i): i for i in list(range(45, 50)) + list(range(100, 120))}
+    assert all(m.get('key' + str(i)) == None for i in range(45))
+
+
+@pytest.mark.parametrize('probing', PROBING)
+def test_churn_always_leaves_an_empty_bucket_to_end_a_miss(probing):
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a, probing=probing())
+    live = []
+    rng = random.Random(11)
+
+    for i in range(20000):
+        if len(live) < 50:
+            key = 'key' + str(i)
+            m.put(key, i)
+            live.append(key)
+        else:
+            m.remove(live.pop(rng.randrange(len(live))))
+        assert m.empty_buckets() > 0
+
+    assert m.get_capacity() < 1000
+    assert m.get('never added') == None
+    assert sorted(key for key, value in m.get_keys_and_values()) == sorted(live)
+
+
+@pytest.mark.parametrize('probing', PROBING)
+def test_compact_drops_every_tombstone(probing):
+    m = hash_map_oa.HashMap(53, hash_function_fnv1a, probing=probing())
+    for i in range(20):
+        m.put('key' + str(i), i)
+    for i in range(0, 20, 2):
+        m.remove('key' + str(i))
+
+    m.compact()
+
+    assert m.get_tombstone_count() == 0 and m.get_capacity() == 53
+    assert m.empty_buckets() == 53 - 10
+    assert dict(m.items()) == {'key' + str(i): i for i in range(1, 20, 2)}
+
+
+def test_robin_hood_removals_leave_no_tombstones():
+    m = hash_map_oa.HashMap(11, hash_function_fnv1a, probing=hash_map_oa.RobinHoodProbing(),
+                            policy=ResizePolicy(max_load=0.9))
+    for i in range(8):
+        m.put('key' + str(i), i)
+    for i in range(0, 8, 2):
+        m.remove('key' + str(i))
+
+    assert m.get_tombstone_count() == 0
+    assert dict(m.items()) == {'key' + str(i): i for i in range(1, 8, 2)}
@@ -0,0 +1,126 @@
+# Description: Tests for the single-probe upserts of both hash maps.
+
+
+import pytest
+
+import hash_map_oa
+import hash_map_sc
+from base_structures import DynamicArray, ResizePolicy, hash_function_fnv1a
+from hash_map_stats import enable_stats
+
+
+class CountingHash:
+    """FNV-1a that counts how often it is called."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, key: str) -> int:
+        self.calls += 1
+        return hash_function_fnv1a(key)
+
+
+MAPS = {
+    'SC': lambda function=hash_function_fnv1a: hash_map_sc.HashMap(11, function,
+                                                                   policy=ResizePolicy(max_load=1.0)),
+    'SC incremental': lambda function=hash_function_fnv1a: hash_map_sc.HashMap(
+        11, function, incremental=True, rehash_step=1, policy=ResizePolicy(max_load=1.0)),
+    'OA': lambda function=hash_function_fnv1a: hash_map_oa.HashMap(11, function),
+    'OA robin hood': lambda function=hash_function_fnv1a: hash_map_oa.HashMap(
+        11, function, probing=hash_map_oa.RobinHoodProbing(), policy=ResizePolicy(max_load=0.9)),
+    'OA incremental': lambda function=hash_function_fnv1a: hash_map_oa.HashMap(
+        11, function, incremental=True, rehash_step=1),
+}
+
+
+@pytest.fixture(params=MAPS.values(), ids=MAPS.keys())
+def new_map(request):
+    return request.param
+
+
+def test_setdefault(new_map):
+    m = new_map()
+
+    assert m.setdefault('a', []) == []
+    m.setdefault('a', []).append(1)
+    m.setdefault('a', 'ignored').append(2)
+
+    assert m.get('a') == [1, 2]
+    assert m.setdefault('b') == None and m.contains_key('b')
+    assert m.get_size() == 2
+
+
+def test_update_with(new_map):
+    m = new_map()
+
+    assert m.update_with('a', lambda value: value + 'x', default='') == 'x'
+    assert m.update_with('a', lambda value: value + 'y') == 'xy'
+    assert m.update_with('b', lambda value: [value]) == [None]
+
+    assert m.get('a') == 'xy' and m.get('b') == [None]
+
+
+def test_increment(new_map):
+    m = new_map()
+
+    assert m.increment('a') == 1
+    assert m.increment('a') == 2
+    assert m.increment('a', 10) == 12
+    assert m.increment('b', -3) == -3
+
+    assert dict(m.items()) == {'a': 12, 'b': -3}
+
+
+def test_upserts_grow_the_table_like_put(new_map):
+    counted, put = new_map(), new_map()
+
+    for i in range(1000):
+        counted.increment('key' + str(i % 400))
+        put.put('key' + str(i % 400), None)
+
+    assert counted.get_capacity() == put.get_capacity()
+    assert dict(counted.items()) == {'key' + str(i): 3 if i < 200 else 2 for i in range(400)}
+
+
+@pytest.mark.parametrize('upsert', [
+    lambda m, key: m.setdefault(key, 0),
+    lambda m, key: m.update_with(key, lambda value: value + 1, 0),
+    lambda m, key: m.increment(key),
+])
+def test_each_upsert_hashes_its_key_once(new_map, upsert):
+    function = CountingHash()
+    m = new_map(function)
+    for i in range(30):
+        m.put('key' + str(i), i)
+    m.rehash_step(m.get_capacity() + 1000)
+
+    for key in ('key5', 'missing'):
+        function.calls = 0
+        upsert(m, key)
+        assert function.calls == 1
+
+
+def test_an_upsert_of_an_existing_key_probes_like_get(new_map):
+    m = new_map()
+    for i in range(30):
+        m.put('key' + str(i), i)
+    m.rehash_step(m.get_capacity() + 1000)
+    stats = enable_stats(m)
+
+    for i in range(30):
+        m.get('key' + str(i))
+        m.increment('key' + str(i))
+
+    assert stats.probes['increment'] == stats.probes['get']
+
+
+def test_find_mode_counts_with_increment(monkeypatch):
+    def fail(self, key, value):
+        raise AssertionError("find_mode() called put()")
+
+    monkeypatch.setattr(hash_map_sc.HashMap, 'put', fail)
+    da = DynamicArray(['b', 'a', 'b', 'c', 'a', 'b'])
+
+    mode, count = hash_map_sc.find_mode(da)
+
+    assert mode.get_list() == ['b'] and count == 3